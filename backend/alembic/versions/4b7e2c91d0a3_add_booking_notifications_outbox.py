@@ -0,0 +1,55 @@
+"""add booking_notifications outbox
+
+Revision ID: 4b7e2c91d0a3
+Revises: dce6d3998db6
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d0a3'
+down_revision: Union[str, Sequence[str], None] = 'dce6d3998db6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('booking_notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('kind', sa.Enum('BOOKING_CREATED', 'BOOKING_STATUS_CHANGED', name='notificationkind'), nullable=False),
+    sa.Column('recipient', sa.String(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', name='notificationstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_booking_notifications_id'), 'booking_notifications', ['id'], unique=False)
+    op.create_index(op.f('ix_booking_notifications_booking_id'), 'booking_notifications', ['booking_id'], unique=False)
+    # Worker pyta tylko o oczekujące wiadomości - częściowy indeks pozostaje mały
+    op.create_index(
+        'ix_booking_notifications_pending',
+        'booking_notifications',
+        ['next_attempt_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_booking_notifications_pending', table_name='booking_notifications')
+    op.drop_index(op.f('ix_booking_notifications_booking_id'), table_name='booking_notifications')
+    op.drop_index(op.f('ix_booking_notifications_id'), table_name='booking_notifications')
+    op.drop_table('booking_notifications')
+    sa.Enum(name='notificationstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='notificationkind').drop(op.get_bind(), checkfirst=True)
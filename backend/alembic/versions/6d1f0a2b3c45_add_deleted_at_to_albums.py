@@ -0,0 +1,28 @@
+"""add deleted_at to albums
+
+Revision ID: 6d1f0a2b3c45
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1f0a2b3c45'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('albums', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Zadanie w tle pobiera zdjęcia albumu porcjami po album_id
+    op.create_index(op.f('ix_photos_album_id'), 'photos', ['album_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_photos_album_id'), table_name='photos')
+    op.drop_column('albums', 'deleted_at')
@@ -0,0 +1,37 @@
+"""add albums_sort_order_seq
+
+Revision ID: 7e2a9c4d5f60
+Revises: 6d1f0a2b3c45
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2a9c4d5f60'
+down_revision: Union[str, Sequence[str], None] = '6d1f0a2b3c45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sekwencja zastępuje zapytanie max(sort_order) + 1 przy tworzeniu albumu
+    op.execute(sa.schema.CreateSequence(sa.Sequence('albums_sort_order_seq')))
+    # Start za największą istniejącą pozycją (i za liczbą albumów - reorder nadaje 1..n)
+    op.execute(
+        "SELECT setval('albums_sort_order_seq', "
+        "GREATEST(COALESCE((SELECT MAX(sort_order) FROM albums), 0), "
+        "COALESCE((SELECT MAX(id) FROM albums), 0), 1))"
+    )
+    op.alter_column(
+        'albums', 'sort_order',
+        server_default=sa.text("nextval('albums_sort_order_seq')"),
+    )
+
+
+def downgrade() -> None:
+    op.alter_column('albums', 'sort_order', server_default=None)
+    op.execute(sa.schema.DropSequence(sa.Sequence('albums_sort_order_seq')))
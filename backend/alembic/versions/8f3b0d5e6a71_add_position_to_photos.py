@@ -0,0 +1,34 @@
+"""add position to photos
+
+Revision ID: 8f3b0d5e6a71
+Revises: 7e2a9c4d5f60
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b0d5e6a71'
+down_revision: Union[str, Sequence[str], None] = '7e2a9c4d5f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('position', sa.Float(), server_default='0', nullable=False))
+    # Istniejące zdjęcia dostają pozycje z odstępem 1024 w kolejności dodania
+    op.execute(
+        'UPDATE photos SET position = ranked.new_position '
+        'FROM (SELECT id, row_number() OVER (PARTITION BY album_id ORDER BY id) * 1024.0 AS new_position '
+        'FROM photos) AS ranked '
+        'WHERE photos.id = ranked.id'
+    )
+    op.create_index('ix_photos_album_id_position', 'photos', ['album_id', 'position'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_album_id_position', table_name='photos')
+    op.drop_column('photos', 'position')
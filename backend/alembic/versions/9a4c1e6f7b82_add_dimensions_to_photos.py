@@ -0,0 +1,27 @@
+"""add width and height to photos
+
+Revision ID: 9a4c1e6f7b82
+Revises: 8f3b0d5e6a71
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c1e6f7b82'
+down_revision: Union[str, Sequence[str], None] = '8f3b0d5e6a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('photos', sa.Column('height', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'height')
+    op.drop_column('photos', 'width')
@@ -0,0 +1,26 @@
+"""add thumbnail_profile to photos
+
+Revision ID: b5d2e8f4a1c3
+Revises: 9a4c1e6f7b82
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2e8f4a1c3'
+down_revision: Union[str, Sequence[str], None] = '9a4c1e6f7b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Istniejące miniatury nie mają profilu - są nieaktualne i zostaną odświeżone leniwie
+    op.add_column('photos', sa.Column('thumbnail_profile', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'thumbnail_profile')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, albums, photos, bookings
+from app.api.v1.endpoints import auth, albums, photos, bookings, maintenance
 
 api_router = APIRouter()
 
@@ -7,4 +7,5 @@ api_router = APIRouter()
 api_router.include_router(auth.router, tags=["Authentication"])
 api_router.include_router(albums.router, prefix="/albums", tags=["Albums"])
 api_router.include_router(photos.router, prefix="/photos", tags=["Photos"])
-api_router.include_router(bookings.router, prefix="/bookings", tags=["Bookings"])
\ No newline at end of file
+api_router.include_router(bookings.router, prefix="/bookings", tags=["Bookings"])
+api_router.include_router(maintenance.router, prefix="/maintenance", tags=["Maintenance"])
\ No newline at end of file
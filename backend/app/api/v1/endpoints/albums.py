@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-from fastapi_cache.decorator import cache
+from urllib.parse import quote
 
 from app import models, schemas, crud
-from app.dependencies import get_db_session, get_current_user, get_current_user_optional
+from app.core.response_cache import cached_json
+from app.core.zip_stream import parse_range
+from app.dependencies import (
+    get_db_session, get_current_user, get_current_user_optional, get_current_user_optional_query,
+)
+from app.services import album_archive, album_purge, cache_warmer, media_storage
 
 router = APIRouter()
 
@@ -22,12 +28,15 @@ def create_new_album(
     """
     # current_user jest obiektem, możemy go użyć do logów, ale
     # na razie sama jego obecność potwierdza autentykację.
-    return crud.crud_album.create_album(db=db, album=album)
+    db_album = crud.crud_album.create_album(db=db, album=album)
+    # Manifest i odpowiedzi z cache gotowe, zanim album odwiedzi pierwszy gość
+    cache_warmer.schedule_album_warmup(db_album.id, renditions=db_album.is_public)
+    return db_album
 
 
 # --- Endpointy PUBLICZNE ---
 @router.get("/", response_model=List[schemas.album.AlbumRead])
-@cache(expire=60)
+@cached_json(expire=60, response_model=List[schemas.album.AlbumRead])
 def read_all_albums(
     skip: int = 0,
     limit: int = 100,
@@ -39,12 +48,12 @@ def read_all_albums(
     - Dla niezalogowanych: tylko publiczne
     - Dla zalogowanych (admin): wszystkie
     """
-    if current_user is None:
-        return crud.crud_album.get_public_albums(db, skip=skip, limit=limit)
-    return crud.crud_album.get_albums(db, skip=skip, limit=limit)
+    # Same kolumny AlbumRead (bez obiektów ORM); JSON i jego skompresowane
+    # warianty powstają raz, przy zapisie do cache
+    return crud.crud_album.get_album_rows(db, skip=skip, limit=limit, public_only=current_user is None)
 
 @router.get("/{album_id}", response_model=schemas.album.AlbumRead)
-@cache(expire=60)
+@cached_json(expire=60, response_model=schemas.album.AlbumRead)
 def read_single_album(
     album_id: int,
     db: Session = Depends(get_db_session),
@@ -61,6 +70,56 @@ def read_single_album(
         raise HTTPException(status_code=404, detail="Album not found")
     return db_album
 
+@router.get("/{album_id}/download", response_class=StreamingResponse)
+def download_album(
+    album_id: int,
+    request: Request,
+    db: Session = Depends(get_db_session),
+    # Token także w ?access_token= - pobieranie zwykłym linkiem <a href>
+    current_user: models.user.User | None = Depends(get_current_user_optional_query)
+):
+    """
+    Pobiera wszystkie zdjęcia albumu jako ZIP (bez kompresji - oryginały są już
+    skompresowane). Archiwum jest strumieniowane prosto z plików, bez pliku
+    tymczasowego; Range/If-Range pozwala wznowić przerwane pobieranie.
+    Albumy ukryte - tylko dla zalogowanych (inaczej 404).
+    """
+    db_album = crud.crud_album.get_album(db, album_id=album_id)
+    if db_album is None or (current_user is None and not db_album.is_public):
+        raise HTTPException(status_code=404, detail="Album not found")
+    archive = album_archive.build_album_archive(db, album_id)
+    filename = f"{db_album.title or 'album'}.zip"
+    # Dalej tylko pliki z dysku - połączenie wraca do puli, zamiast czekać na koniec
+    # (wielogigabajtowego) transferu
+    db.close()
+    size = archive.zip.size
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=\"album-{album_id}.zip\"; filename*=UTF-8''{quote(filename)}",
+        # nginx nie buforuje odpowiedzi w pliku tymczasowym - bajty idą prosto do klienta
+        "X-Accel-Buffering": "no",
+    }
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == archive.etag:
+        byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        return StreamingResponse(
+            album_archive.iter_album_archive(archive),
+            media_type="application/zip",
+            headers={**headers, "Content-Length": str(size)},
+        )
+    start, end = byte_range
+    return StreamingResponse(
+        album_archive.iter_album_archive(archive, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/zip",
+        headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
+
 @router.patch("/{album_id}", response_model=schemas.album.AlbumRead)
 def update_album(
     album_id: int,
@@ -74,23 +133,57 @@ def update_album(
     db_album = crud.crud_album.update_album(db, album_id=album_id, album_update=album_update)
     if db_album is None:
         raise HTTPException(status_code=404, detail="Album not found")
+    if "is_public" in album_update.model_fields_set:
+        # Pliki przenosimy jeszcze w żądaniu - album prywatny nie może mieć plików
+        # pod publicznym /uploads (rename na tym samym wolumenie jest tani)
+        media_storage.sync_album_storage(album_id)
+    # Przebudowa manifestu (lub jego usunięcie, gdy album stał się prywatny) i odpowiedzi z cache;
+    # przy publikacji albumu dodatkowo uzupełniamy brakujące miniatury
+    cache_warmer.schedule_album_warmup(album_id, renditions="is_public" in album_update.model_fields_set)
     return db_album
 
-@router.delete("/{album_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{album_id}", response_model=schemas.album.AlbumDeletionStatus, status_code=status.HTTP_202_ACCEPTED)
 def delete_album(
     album_id: int,
     db: Session = Depends(get_db_session),
     current_user: models.user.User = Depends(get_current_user)
 ):
     """
-    Usuwa album. Wymaga autentykacji.
-    UWAGA: Zdjęcia w albumie zostaną usunięte przez CASCADE (jeśli skonfigurowane)
-    lub będą osieroconione.
+    Usuwa album wraz ze zdjęciami i plikami. Wymaga autentykacji.
+    Album jest od razu ukrywany, a zdjęcia i pliki usuwa zadanie w tle -
+    postęp można sprawdzić przez GET /albums/{album_id}/deletion.
     """
-    db_album = crud.crud_album.delete_album(db, album_id=album_id)
+    db_album = crud.crud_album.mark_album_deleted(db, album_id=album_id)
     if db_album is None:
         raise HTTPException(status_code=404, detail="Album not found")
-    return None
+    album_purge.schedule_album_purge(album_id)
+    cache_warmer.schedule_album_warmup(album_id)
+    return schemas.album.AlbumDeletionStatus(
+        album_id=album_id,
+        status="deleting",
+        remaining_photos=crud.crud_photo.count_photos_by_album(db, album_id=album_id),
+    )
+
+@router.get("/{album_id}/deletion", response_model=schemas.album.AlbumDeletionStatus)
+def read_album_deletion_status(
+    album_id: int,
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """
+    Zwraca postęp usuwania albumu (liczbę zdjęć, które zostały do usunięcia).
+    Gdy album zniknął z bazy, usuwanie jest zakończone. Wymaga autentykacji.
+    """
+    db_album = crud.crud_album.get_album_including_deleted(db, album_id=album_id)
+    if db_album is None:
+        return schemas.album.AlbumDeletionStatus(album_id=album_id, status="deleted")
+    if db_album.deleted_at is None:
+        raise HTTPException(status_code=404, detail="Album nie jest usuwany")
+    return schemas.album.AlbumDeletionStatus(
+        album_id=album_id,
+        status="deleting",
+        remaining_photos=crud.crud_photo.count_photos_by_album(db, album_id=album_id),
+    )
 
 
 @router.post("/reorder", status_code=status.HTTP_204_NO_CONTENT)
@@ -105,6 +198,10 @@ def reorder_albums(
     """
     if not payload.album_ids or len(payload.album_ids) == 0:
         raise HTTPException(status_code=400, detail="Brak album_ids")
-    # Opcjonalnie: walidacja czy wszystkie id istnieją
-    crud.crud_album.reorder_albums(db, payload.album_ids)
+    if len(set(payload.album_ids)) != len(payload.album_ids):
+        raise HTTPException(status_code=400, detail="Zduplikowane album_ids")
+    # Walidacja istnienia odbywa się w tym samym zapytaniu (RETURNING)
+    missing = crud.crud_album.reorder_albums(db, payload.album_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Nie znaleziono albumów: {missing}")
     return None
\ No newline at end of file
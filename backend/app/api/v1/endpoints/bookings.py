@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app import models, schemas, crud
+from app.core.serialization import RowsJSONResponse
 from app.dependencies import get_db_session, get_current_user
 
 router = APIRouter()
@@ -35,8 +36,8 @@ def read_all_bookings(
     Pobiera listę wszystkich rezerwacji. Wymaga autentykacji.
     Dla admina - zwraca pełne dane.
     """
-    bookings = crud.crud_booking.get_bookings(db, skip=skip, limit=limit)
-    return bookings
+    rows = crud.crud_booking.get_booking_rows(db, skip=skip, limit=limit)
+    return RowsJSONResponse(rows)
 
 @router.get("/public", response_model=List[schemas.booking.BookingPublicRead])
 def read_public_bookings(
@@ -48,8 +49,10 @@ def read_public_bookings(
     Publiczny endpoint zwracający tylko daty i czas trwania zarezerwowanych terminów.
     Nie wymaga autentykacji. Używany przez kalendarz do oznaczania zajętych slotów.
     """
-    bookings = crud.crud_booking.get_bookings(db, skip=skip, limit=limit)
-    return bookings
+    rows = crud.crud_booking.get_booking_rows(
+        db, schema=schemas.booking.BookingPublicRead, skip=skip, limit=limit
+    )
+    return RowsJSONResponse(rows)
 
 @router.patch("/{booking_id}", response_model=schemas.booking.BookingRead)
 def update_booking(
@@ -0,0 +1,65 @@
+# app/api/v1/endpoints/maintenance.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi_cache import FastAPICache
+
+from app import models, schemas
+from app.core import sql_profiler
+from app.core.config import settings
+from app.dependencies import get_current_user
+from app.services import orphan_gc
+
+router = APIRouter()
+
+# --- Endpointy ZABEZPIECZONE (zadania administracyjne) ---
+
+@router.post("/orphans", response_model=schemas.maintenance.OrphanScanStatus, status_code=status.HTTP_202_ACCEPTED)
+def start_orphan_scan(
+    response: Response,
+    dry_run: bool = True,
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """
+    Zleca w tle przegląd osieroconych plików w uploads/ i rekordów zdjęć bez plików.
+    Domyślnie dry_run=true - tylko raport, nic nie jest usuwane.
+    Gdy przegląd już trwa, zwraca 409 z jego aktualnym stanem.
+    """
+    started, state = orphan_gc.start_orphan_scan(dry_run=dry_run)
+    if not started:
+        response.status_code = status.HTTP_409_CONFLICT
+    return state
+
+@router.get("/orphans", response_model=schemas.maintenance.OrphanScanStatus)
+def read_orphan_scan_status(
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """Zwraca stan ostatniego przeglądu wraz z raportem. Wymaga autentykacji."""
+    return orphan_gc.get_orphan_scan_status()
+
+@router.get("/cache", response_model=schemas.maintenance.CacheStats)
+def read_cache_stats(
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """
+    Zwraca liczniki trafień/chybień cache odpowiedzi dla każdego poziomu
+    (lokalny LRU, Redis). Liczniki dotyczą procesu, który obsłużył żądanie.
+    """
+    backend = FastAPICache.get_backend()
+    stats = backend.get_stats() if hasattr(backend, "get_stats") else {}
+    return schemas.maintenance.CacheStats(backend=type(backend).__name__, **stats)
+
+@router.get("/sql-profile", response_model=List[schemas.maintenance.SqlRequestProfile])
+def read_sql_profiles(
+    limit: int = 20,
+    n_plus_one_only: bool = False,
+    current_user: models.user.User = Depends(get_current_user)
+):
+    """
+    Zwraca profile zapytań SQL ostatnich żądań (od najnowszego). Dostępne tylko
+    przy SQL_PROFILING=true. n_plus_one_only=true - tylko żądania z powtarzanymi zapytaniami.
+    """
+    if not settings.SQL_PROFILING:
+        raise HTTPException(status_code=404, detail="Profilowanie SQL jest wyłączone (SQL_PROFILING)")
+    profiles = [p for p in reversed(sql_profiler.recent_profiles) if p["n_plus_one"] or not n_plus_one_only]
+    return profiles[:limit]
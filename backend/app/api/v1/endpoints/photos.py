@@ -1,109 +1,36 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Response
+﻿from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from PIL import Image, ImageOps
+from typing import List, Literal
+import logging
 import shutil
 import os
+import secrets
 import time
-import gc
-from concurrent.futures import ThreadPoolExecutor
 
 from app import models, schemas, crud
-from app.dependencies import get_db_session, get_current_user
+from app.core import metrics
+from app.core.config import settings
+from app.core.image_validation import probe_image
+from app.core.media_signing import sign_media_url
+from app.core.serialization import RowsJSONResponse
+from app.core.uploads import IMMUTABLE_CACHE_CONTROL, media_response
+from app.dependencies import (
+    get_db_session, get_current_user, get_current_user_optional, get_current_user_optional_query, get_current_user_sse,
+)
+from app.services import album_manifests, file_reaper, media_storage, photo_events, photo_ordering, thumbnails
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Thread pool for background image thumbnail processing
-# Zmniejszamy max_workers do 1, aby uniknąć problemów z pamięcią na małych instancjach (np. Azure B1s)
-_thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail_")
-
-
-def _generate_thumbnail_sync(file_path: str, thumbnail_path: str) -> tuple[bool, str | None]:
-    """
-    Synchronous function to generate a thumbnail. Runs in a thread pool worker.
-    Returns (success: bool, thumbnail_url: str | None)
-    Produces highly compressed WebP thumbnails (max 400x400, quality=55).
-    Falls back to JPEG/PNG when necessary.
-    
-    Strategy:
-    - Always resize and compress thumbnails regardless of source format or size
-    - Resize to max 400x400 (small enough for web galleries)
-    - Use aggressive WebP compression (quality=55, method=6)
-    - For PNG fallback: quantize to 256 colors for massive size reduction
-    """
-    try:
-        with Image.open(file_path) as img:
-            # Correct orientation from EXIF if present
-            img = ImageOps.exif_transpose(img)
-            
-            # Check original dimensions
-            orig_width, orig_height = img.size
-            target_size = 400  # Reduced from 800 to 400 for smaller file sizes
-            
-            # Detect alpha channel
-            bands = img.getbands()
-            has_alpha = "A" in bands
-            
-            # Convert to appropriate mode for saving
-            if has_alpha:
-                img = img.convert("RGBA")
-            else:
-                img = img.convert("RGB")
-            
-            # Only resize if larger than target; never upscale
-            if orig_width > target_size or orig_height > target_size:
-                img.thumbnail((target_size, target_size), Image.Resampling.LANCZOS)
-            
-            # Ensure target directory exists
-            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
-            
-            # Prefer WebP for thumbnails with aggressive compression
-            save_format = "WEBP"
-            webp_kwargs: dict = {"quality": 55, "method": 6}  # Quality=55 for smaller files
-            
-            # Try saving as WebP; if that fails, fallback to JPEG/PNG
-            try:
-                img.save(thumbnail_path, format=save_format, **webp_kwargs)
-            except Exception:
-                if not has_alpha:
-                    # Fallback JPEG for no-alpha images
-                    img.save(thumbnail_path, format="JPEG", optimize=True, quality=55, progressive=True)
-                else:
-                    # Fallback PNG with aggressive quantization to 256 colors
-                    try:
-                        quantized = img.quantize(colors=256, method=Image.MEDIANCUT)
-                        quantized.save(thumbnail_path, format="PNG", optimize=True)
-                    except Exception:
-                        img.save(thumbnail_path, format="PNG", optimize=True)
-            
-            return True, f"/{thumbnail_path}"
-    except Exception as e:
-        print(f"Warning: could not create thumbnail for {file_path}: {e}")
-        import traceback
-        traceback.print_exc()
-        return False, None
-    finally:
-        # Wymuszamy zwolnienie pamięci po przetworzeniu każdego zdjęcia
-        gc.collect()
-
-
-def _update_photo_thumbnail(photo_id: int, thumbnail_url: str | None) -> None:
-    """
-    Background task to update photo record with thumbnail URL after generation completes.
-    Runs in a thread pool worker.
-    """
-    from app.database import SessionLocal
-    try:
-        db = SessionLocal()
-        photo = crud.crud_photo.get_photo(db, photo_id=photo_id)
-        if photo:
-            photo.thumbnail_url = thumbnail_url
-            db.commit()
-            db.refresh(photo)
-        db.close()
-    except Exception as e:
-        print(f"Warning: could not update thumbnail_url for photo {photo_id}: {e}")
-
+# Odpowiedzi list zdjec nie sa cache'owane przez przegladarke
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
 
 # --- Endpoint ZABEZPIECZONY (Przesylanie Pliku) ---
 @router.post("/", response_model=schemas.photo.PhotoRead, status_code=status.HTTP_201_CREATED)
@@ -124,35 +51,45 @@ async def create_new_photo(
     # Używamy namespace="fastapi-cache", ponieważ taki prefix został ustawiony w main.py
     # await FastAPICache.clear(namespace="fastapi-cache")
 
-    UPLOAD_DIR = "uploads"
-    THUMB_DIR = os.path.join(UPLOAD_DIR, "thumbnails")
+    # Sprawdzamy album PRZED zapisem pliku - inaczej blad zostawialby sierote na dysku
+    db_album = crud.crud_album.get_album(db, album_id=album_id)
+    if not db_album:
+        raise HTTPException(status_code=404, detail=f"Album o ID {album_id} nie istnieje.")
+
+    # Zdjecia albumow prywatnych trafiaja do uploads/private/ - poza publicznym /uploads
+    UPLOAD_DIR = media_storage.upload_dir(db_album.is_public)
     os.makedirs(UPLOAD_DIR, exist_ok=True)
-    os.makedirs(THUMB_DIR, exist_ok=True)
 
     original_name = os.path.basename(file.filename or "")
     if not original_name:
         raise HTTPException(status_code=400, detail="Brak nazwy pliku")
-    name, ext = os.path.splitext(original_name)
+    name, _ = os.path.splitext(original_name)
+
+    # Typ i wymiary z naglowka pliku, zanim cokolwiek trafi do uploads/ i kolejki miniatur
+    # (415 - nieobslugiwany typ, 400 - uszkodzony naglowek, 413 - za duzo pikseli).
+    # Rozszerzenie wynika z wykrytego typu, nie z nazwy pliku od klienta.
+    try:
+        probe = await run_in_threadpool(probe_image, file.file, settings.UPLOAD_MAX_PIXELS)
+    except HTTPException:
+        file.file.close()
+        raise
+    ext = probe.extension
 
     safe_name = "".join(c for c in name if c.isalnum() or c in (" ", "-", "_")).rstrip()
     safe_name = safe_name.replace(" ", "_") or str(int(time.time()))
 
-    candidate = f"{safe_name}{ext}"
+    # Losowy sufiks - sciezki plikow nie daja sie odgadnac z nazwy oryginalu
+    # (klienci albumow prywatnych dostaja tylko podpisane URL-e /media/)
+    candidate = f"{safe_name}-{secrets.token_hex(8)}{ext}"
     file_path = os.path.join(UPLOAD_DIR, candidate)
-
-    if os.path.exists(file_path):
-        ts = int(time.time())
-        candidate = f"{safe_name}-{ts}{ext}"
+    while os.path.exists(file_path):
+        candidate = f"{safe_name}-{secrets.token_hex(8)}{ext}"
         file_path = os.path.join(UPLOAD_DIR, candidate)
-        counter = 1
-        while os.path.exists(file_path):
-            candidate = f"{safe_name}-{ts}-{counter}{ext}"
-            file_path = os.path.join(UPLOAD_DIR, candidate)
-            counter += 1
 
     try:
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+            metrics.UPLOAD_BYTES.inc(buffer.tell())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Nie mozna zapisac pliku: {e}")
     finally:
@@ -161,8 +98,6 @@ async def create_new_photo(
     # Generowanie miniatury asynchronicznie (w thread pool)
     # Nie blokujemy request — zwracamy odpowiedź szybko, miniatura będzie wygenerowana w tle
     thumbnail_url: str | None = None
-    # Używamy rozszerzenia .webp dla miniaturek, ponieważ taki jest docelowy format
-    thumbnail_path = os.path.join(THUMB_DIR, f"{candidate}.webp")
 
     photo_in = schemas.photo.PhotoCreate(
         title=title,
@@ -170,74 +105,239 @@ async def create_new_photo(
         image_url=f"/{file_path}",
         thumbnail_url=thumbnail_url,  # Initially None; will be filled in background
         album_id=album_id,
+        width=probe.width,
+        height=probe.height,
     )
 
-    db_album = crud.crud_album.get_album(db, album_id=album_id)
-    if not db_album:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=404, detail=f"Album o ID {album_id} nie istnieje.")
-
     # Create photo in database immediately
-    db_photo = crud.crud_photo.create_photo(db=db, photo=photo_in)
+    try:
+        db_photo = crud.crud_photo.create_photo(db=db, photo=photo_in)
+    except Exception as e:
+        # Bez rekordu w bazie plik bylby osierocony
+        db.rollback()
+        file_reaper.remove_files([file_path])
+        raise HTTPException(status_code=500, detail=f"Nie mozna zapisac zdjecia w bazie: {e}")
 
     # Queue thumbnail generation as background task (non-blocking)
-    _thumbnail_executor.submit(_generate_thumbnail_and_update, file_path, thumbnail_path, db_photo.id)
+    # "queued" publikujemy przed submit, zeby nie wyprzedzilo zdarzenia "rendering"
+    await run_in_threadpool(photo_events.publish_photo_event, album_id, db_photo.id, photo_events.QUEUED)
+    thumbnails.schedule_thumbnail(file_path, db_photo.id, album_id)
+    album_manifests.schedule_manifest_rebuild(album_id)
 
     return db_photo
 
 
-def _generate_thumbnail_and_update(file_path: str, thumbnail_path: str, photo_id: int) -> None:
-    """
-    Background task: generate thumbnail and update photo record.
-    Runs in a thread pool worker (does not block request).
-    """
-    success, thumbnail_url = _generate_thumbnail_sync(file_path, thumbnail_path)
-    if success:
-        _update_photo_thumbnail(photo_id, thumbnail_url)
-
+def _with_signed_urls(row) -> dict:
+    """Wiersz PhotoRead z plikami jako podpisane URL-e /media/ (zdjecia z albumow prywatnych)."""
+    photo = row._asdict()
+    photo["image_url"] = sign_media_url(photo["image_url"])
+    photo["thumbnail_url"] = sign_media_url(photo["thumbnail_url"])
+    return photo
 
 
 # --- Endpointy PUBLICZNE ---
 @router.get("/", response_model=List[schemas.photo.PhotoRead])
 def read_all_photos(
-    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db_session),
+    current_user: models.user.User | None = Depends(get_current_user_optional),
 ):
     """
     Pobiera liste wszystkich zdjec. Publicznie dostepne.
+    - Dla niezalogowanych: tylko zdjecia z albumow publicznych
+    - Dla zalogowanych: wszystkie, pliki albumow prywatnych jako podpisane URL-e
     """
-    # Disable browser caching for API response
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    
-    photos = crud.crud_photo.get_all_photos(db, skip=skip, limit=limit)
-    return photos
+    # Same kolumny PhotoRead jako krotki, kodowane od razu do JSON (bez ORM i walidacji)
+    rows = crud.crud_photo.get_all_photo_rows(db, skip=skip, limit=limit, public_only=current_user is None)
+    if current_user is not None:
+        public_album_ids = crud.crud_album.get_public_album_ids(db)
+        rows = [row if row.album_id in public_album_ids else _with_signed_urls(row) for row in rows]
+    return RowsJSONResponse(rows, headers=NO_CACHE_HEADERS)
 
 
 @router.get("/album/{album_id}", response_model=List[schemas.photo.PhotoRead])
 def read_photos_for_album(
     album_id: int,
-    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db_session),
+    current_user: models.user.User | None = Depends(get_current_user_optional),
 ):
     """
-    Pobiera liste zdjec dla konkretnego albumu. Publicznie dostepne.
+    Pobiera liste zdjec dla konkretnego albumu. Publicznie dostepne dla albumow
+    publicznych; album prywatny widza tylko zalogowani (inaczej 404), a pliki
+    dostaja jako podpisane, wygasajace URL-e.
     """
-    # Disable browser caching for API response
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-
-    photos = crud.crud_photo.get_photos_by_album(
+    db_album = crud.crud_album.get_album(db, album_id=album_id)
+    is_private = db_album is not None and not db_album.is_public
+    if is_private and current_user is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    rows = crud.crud_photo.get_photo_rows_by_album(
         db, album_id=album_id, skip=skip, limit=limit
     )
-    return photos
+    # Miniatury z nieaktualnym profilem sa odswiezane w tle (raz na album w procesie)
+    if db_album is not None:
+        thumbnails.refresh_stale_thumbnails(album_id)
+    if is_private:
+        rows = [_with_signed_urls(row) for row in rows]
+    return RowsJSONResponse(rows, headers=NO_CACHE_HEADERS)
+
+
+@router.get("/album/{album_id}/events")
+async def stream_photo_events_for_album(
+    album_id: int,
+    request: Request,
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User = Depends(get_current_user_sse),
+):
+    """
+    Strumien SSE ze zdarzeniami przetwarzania zdjec albumu (queued, rendering, done, failed).
+    Dashboard nasluchuje go po uploadzie zamiast odpytywac liste zdjec.
+    Wymaga autentykacji (token w naglowku lub w parametrze ?access_token=).
+    """
+    # Sesja nie jest potrzebna w trakcie streamu - oddajemy polaczenie do puli od razu,
+    # inaczej kazdy otwarty dashboard trzymalby jedno polaczenie z baza
+    db.close()
+
+    return StreamingResponse(
+        photo_events.stream_album_events(album_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Wylacza buforowanie odpowiedzi w nginx (proxy /api)
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+UPLOAD_ROOT = "uploads"
+# Prywatne zdjecia moga byc cache'owane tylko przez przegladarke i krotko
+PRIVATE_MEDIA_CACHE_CONTROL = "private, max-age=300"
+
+
+@router.get("/{photo_id}/image")
+def read_photo_image(
+    photo_id: int,
+    request: Request,
+    variant: Literal["original", "thumbnail"] = "original",
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User | None = Depends(get_current_user_optional_query),
+):
+    """
+    Zwraca plik zdjecia (oryginal lub miniature) z kontrola dostepu: zdjecia
+    z albumow niepublicznych tylko dla zalogowanych (token w naglowku lub
+    ?access_token=), dla pozostalych 404. Endpoint tylko autoryzuje - za nginx
+    plik wysyla nginx (X-Accel-Redirect), wiec koszt jest taki jak dla /uploads.
+    """
+    media = crud.crud_photo.get_photo_media(db, photo_id=photo_id)
+    if media is None or (current_user is None and not media.is_public):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    db.close()  # dalej tylko plik - polaczenie wraca do puli
+
+    url = media.thumbnail_url if variant == "thumbnail" and media.thumbnail_url else media.image_url
+    behind_nginx = request.headers.get("x-sendfile-type", "").lower() == "x-accel-redirect"
+    return media_response(
+        request.headers,
+        UPLOAD_ROOT,
+        os.path.relpath(file_reaper.url_to_path(url), UPLOAD_ROOT),
+        cache_control=IMMUTABLE_CACHE_CONTROL if media.is_public else PRIVATE_MEDIA_CACHE_CONTROL,
+        accel_prefix=settings.MEDIA_ACCEL_PREFIX if settings.MEDIA_ACCEL_REDIRECT and behind_nginx else None,
+    )
+
+
+# --- Operacje zbiorcze (ZABEZPIECZONE) ---
+# Musza byc zadeklarowane przed /{photo_id}, inaczej "bulk" trafiloby do walidacji int
+@router.patch("/bulk", response_model=schemas.photo.PhotoBulkResult)
+def bulk_update_photos(
+    payload: schemas.photo.PhotoBulkUpdate,
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User = Depends(get_current_user),
+):
+    """
+    Aktualizuje wiele zdjec naraz (przeniesienie do albumu, tytul, opis)
+    jednym zapytaniem UPDATE. Wymaga autentykacji.
+    """
+    values = payload.model_dump(exclude_unset=True, exclude={"photo_ids"})
+    if not values:
+        raise HTTPException(status_code=400, detail="Brak pol do aktualizacji")
+    # PhotoRead.title jest wymagany (str) - NULL w bazie psulby odczyt zdjecia (500)
+    if "title" in values and values["title"] is None:
+        raise HTTPException(status_code=400, detail="title nie moze byc pusty")
+    if values.get("album_id") is not None:
+        if not crud.crud_album.get_album(db, album_id=values["album_id"]):
+            raise HTTPException(status_code=404, detail=f"Album o ID {values['album_id']} nie istnieje.")
+    elif "album_id" in values:
+        raise HTTPException(status_code=400, detail="album_id nie moze byc pusty")
+
+    photo_ids = list(dict.fromkeys(payload.photo_ids))
+    affected_albums = crud.crud_photo.get_album_ids_for_photos(db, photo_ids=photo_ids)
+    updated_ids = crud.crud_photo.bulk_update_photos(db, photo_ids=photo_ids, values=values)
+    if values.get("album_id") is not None:
+        # Pliki przeniesionych zdjec do drzewa zgodnego z widocznoscia albumu docelowego
+        media_storage.sync_album_storage(values["album_id"])
+    album_manifests.schedule_manifest_rebuild(*affected_albums, values.get("album_id"))
+    updated = set(updated_ids)
+    return schemas.photo.PhotoBulkResult(
+        count=len(updated_ids),
+        missing_ids=[pid for pid in photo_ids if pid not in updated],
+    )
+
+
+@router.post("/bulk/delete", response_model=schemas.photo.PhotoBulkResult)
+def bulk_delete_photos(
+    payload: schemas.photo.PhotoBulkDelete,
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User = Depends(get_current_user),
+):
+    """
+    Usuwa wiele zdjec naraz jednym zapytaniem DELETE. Pliki (oryginaly i miniatury)
+    usuwa w tle watek sprzatajacy - request nie czeka na dysk. Wymaga autentykacji.
+    """
+    photo_ids = list(dict.fromkeys(payload.photo_ids))
+    affected_albums = crud.crud_photo.get_album_ids_for_photos(db, photo_ids=photo_ids)
+    deleted = crud.crud_photo.bulk_delete_photos(db, photo_ids=photo_ids)
+    album_manifests.schedule_manifest_rebuild(*affected_albums)
+    file_reaper.schedule_removal(
+        url for _, image_url, thumbnail_url in deleted for url in (image_url, thumbnail_url)
+    )
+    deleted_ids = {photo_id for photo_id, _, _ in deleted}
+    return schemas.photo.PhotoBulkResult(
+        count=len(deleted),
+        missing_ids=[pid for pid in photo_ids if pid not in deleted_ids],
+    )
+
+
+@router.post("/{photo_id}/move", status_code=status.HTTP_204_NO_CONTENT)
+def move_photo(
+    photo_id: int,
+    payload: schemas.photo.PhotoMove,
+    db: Session = Depends(get_db_session),
+    current_user: models.user.User = Depends(get_current_user),
+):
+    """
+    Przenosi zdjecie w obrebie albumu za wskazane zdjecie (after_photo_id)
+    lub na poczatek (after_photo_id = null). Zmienia tylko jeden wiersz.
+    Wymaga autentykacji.
+    """
+    db_photo = crud.crud_photo.get_photo(db, photo_id=photo_id)
+    if db_photo is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    after = None
+    if payload.after_photo_id is not None:
+        if payload.after_photo_id == photo_id:
+            raise HTTPException(status_code=400, detail="Zdjecie nie moze byc swoim sasiadem")
+        after = crud.crud_photo.get_photo(db, photo_id=payload.after_photo_id)
+        if after is None:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        if after.album_id != db_photo.album_id:
+            raise HTTPException(status_code=400, detail="Zdjecia naleza do roznych albumow")
+
+    if crud.crud_photo.move_photo_after(db, db_photo=db_photo, after=after):
+        photo_ordering.schedule_rebalance(db_photo.album_id)
+    album_manifests.schedule_manifest_rebuild(db_photo.album_id)
+    return None
 
 
 @router.patch("/{photo_id}", response_model=schemas.photo.PhotoRead)
@@ -253,6 +353,7 @@ async def update_photo(
     db_photo = crud.crud_photo.update_photo(db, photo_id=photo_id, photo_update=photo_update)
     if db_photo is None:
         raise HTTPException(status_code=404, detail="Photo not found")
+    album_manifests.schedule_manifest_rebuild(db_photo.album_id)
     
     # Invalidate cache immediately
     # await FastAPICache.clear(namespace="fastapi-cache")
@@ -278,7 +379,7 @@ async def delete_photo(
         try:
             os.remove(file_path)
         except Exception as e:
-            print(f"Warning: Could not delete file {file_path}: {e}")
+            logger.warning("Could not delete file %s: %s", file_path, e)
 
     if db_photo.thumbnail_url:
         thumb_path = db_photo.thumbnail_url.lstrip("/")
@@ -286,9 +387,11 @@ async def delete_photo(
             try:
                 os.remove(thumb_path)
             except Exception as e:
-                print(f"Warning: Could not delete thumbnail {thumb_path}: {e}")
+                logger.warning("Could not delete thumbnail %s: %s", thumb_path, e)
 
+    album_id = db_photo.album_id
     crud.crud_photo.delete_photo(db, photo_id=photo_id)
+    album_manifests.schedule_manifest_rebuild(album_id)
     
     # Invalidate cache AFTER database commit to avoid race conditions
     # await FastAPICache.clear(namespace="fastapi-cache")
@@ -0,0 +1,100 @@
+# app/core/circuit_breaker.py
+"""
+Bezpiecznik (circuit breaker) dla wywołań zależności sieciowych (Redis).
+
+- closed    - wywołania przechodzą, każde z krótkim timeoutem;
+- open      - po `failure_threshold` kolejnych błędach/timeoutach wywołania są
+              od razu odrzucane (CircuitOpenError) przez `reset_timeout` sekund,
+              więc żądania nie czekają na timeouty niedziałającej usługi;
+- half_open - po tym czasie jedno wywołanie próbne: sukces zamyka obwód,
+              błąd otwiera go ponownie.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Obwód otwarty - wywołanie odrzucone bez kontaktu z usługą."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 10.0,
+        call_timeout: float = 0.25,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.last_error: str | None = None
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def _allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _record_success(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def _record_failure(self, error: BaseException) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self._state != OPEN and self._failures < self.failure_threshold:
+            return
+        if self._state != OPEN:
+            logger.warning("%s unavailable, circuit opened for %ss (%s)", self.name, self.reset_timeout, self.last_error)
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Wywołuje `func` z timeoutem; przy otwartym obwodzie - CircuitOpenError."""
+        if not self._allow():
+            self.rejected_calls += 1
+            raise CircuitOpenError(self.name)
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout=self.call_timeout)
+        except asyncio.CancelledError:
+            self._probe_in_flight = False
+            raise
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected_calls": self.rejected_calls,
+            "last_error": self.last_error,
+        }
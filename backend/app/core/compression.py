@@ -0,0 +1,190 @@
+# app/core/compression.py
+"""
+Kompresja odpowiedzi (brotli / gzip) po stronie backendu.
+
+nginx kompresuje tylko ruch idący przez /api - bezpośrednie żądania na port
+8000 szły bez kompresji. Middleware negocjuje kodowanie z Accept-Encoding
+i kompresuje odpowiedzi tekstowe (JSON). Odpowiedzi, które mają już
+Content-Encoding (np. gotowe warianty z cache - patrz response_cache), są
+przepuszczane bez zmian, tak samo strumienie zdarzeń (SSE), pliki binarne
+i odpowiedzi częściowe (206 / Content-Range). Skompresowana odpowiedź dostaje
+słaby ETag (W/) - silny opisywałby bajty przed kompresją.
+"""
+import gzip
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Kolejność preferencji, gdy klient akceptuje kilka kodowań z tą samą wagą
+SUPPORTED_ENCODINGS = ("br", "gzip")
+# Mniejszych odpowiedzi nie opłaca się kompresować
+MINIMUM_SIZE = 500
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Strumienie zdarzeń muszą docierać natychmiast - bez kompresji
+EXCLUDED_TYPES = ("text/event-stream",)
+
+# Kompresja "w locie" (każde żądanie) - szybkie ustawienia
+BROTLI_DYNAMIC_QUALITY = 5
+GZIP_DYNAMIC_LEVEL = 6
+# Kompresja raz na wpis w cache - można pozwolić sobie na więcej
+BROTLI_STATIC_QUALITY = 11
+GZIP_STATIC_LEVEL = 9
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Wybiera kodowanie (br/gzip) na podstawie nagłówka Accept-Encoding lub None."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_STATIC_QUALITY if static else BROTLI_DYNAMIC_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 - ta sama treść daje te same bajty (stabilne warianty w cache)
+        return gzip.compress(body, compresslevel=GZIP_STATIC_LEVEL if static else GZIP_DYNAMIC_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Kompresja odpowiedzi wysyłanej w kawałkach (każdy kawałek jest od razu wypychany)."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_DYNAMIC_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_DYNAMIC_LEVEL, zlib.DEFLATED, 31)  # 31 = nagłówek gzip
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    """
+    Silny ETag opisuje konkretne bajty - po kompresji już do nich nie pasuje.
+    Słaby (W/) nadal działa przy rewalidacji (If-None-Match porównuje słabo).
+    """
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def add_vary_accept_encoding(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """Czyste middleware ASGI (bez BaseHTTPMiddleware) kompresujące odpowiedzi tekstowe."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+        stream: StreamCompressor | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough, stream
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                # Fragment odpowiedzi (206/Content-Range) - skompresowane bajty nie pasowałyby
+                # do zakresu z nagłówka
+                passthrough = (
+                    message["status"] == 206
+                    or "content-range" in headers
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(EXCLUDED_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Nagłówki wysyłamy dopiero, gdy znamy treść (i jej rozmiar)
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                pending, start_message = start_message, None
+                headers = MutableHeaders(raw=pending["headers"])
+                if not more_body:
+                    # Cała odpowiedź w jednym kawałku
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(pending)
+                        await send(message)
+                        return
+                    compressed = compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(compressed))
+                    weaken_etag(headers)
+                    add_vary_accept_encoding(headers)
+                    await send(pending)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                # Odpowiedź w kawałkach (np. przez BaseHTTPMiddleware) - kompresja strumieniowa
+                stream = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                weaken_etag(headers)
+                add_vary_accept_encoding(headers)
+                await send(pending)
+
+            if stream is None:
+                await send(message)
+                return
+            data = stream.chunk(body) if body else b""
+            if not more_body:
+                data += stream.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,7 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env") 
+    model_config = SettingsConfigDict(env_file=".env")
     DATABASE_URL: str
 
     # Nowe zmienne dla JWT
@@ -9,4 +11,69 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
-settings = Settings()
\ No newline at end of file
+    # Redis - cache odpowiedzi API i pub/sub zdarzeń przetwarzania zdjęć
+    REDIS_URL: str = "redis://redis:6379"
+    # Lokalny cache odpowiedzi w każdym procesie (przed Redisem); 0 wyłącza
+    RESPONSE_CACHE_LOCAL_TTL: float = 5.0
+    RESPONSE_CACHE_LOCAL_MAX_ENTRIES: int = 512
+    # Bezpiecznik Redisa: timeout pojedynczej operacji (s), liczba błędów do otwarcia
+    # obwodu i czas (s), po którym próbujemy ponownie. Bez Redisa działa tylko cache lokalny.
+    REDIS_CACHE_TIMEOUT: float = 0.25
+    REDIS_CACHE_FAILURE_THRESHOLD: int = 3
+    REDIS_CACHE_RESET_TIMEOUT: float = 10.0
+
+    # Profilowanie zapytań SQL per żądanie (tylko do debugowania): nagłówek Server-Timing,
+    # GET /api/v1/maintenance/sql-profile i ostrzeżenia o N+1 (to samo zapytanie >= N razy)
+    SQL_PROFILING: bool = False
+    SQL_PROFILING_REPEAT_THRESHOLD: int = 5
+
+    # Logi strukturalne (JSON na stdout, zapis w osobnym wątku). LOG_SAMPLE_RATE to ułamek
+    # zapisywanych wpisów o sukcesie (udane żądania, gotowe miniatury); błędy zawsze trafiają do logu
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_REQUESTS: bool = True
+
+    # Miniatury przy uploadzie kodowane szybkim ustawieniem profilu, a docelowa kompresja
+    # w tle, gdy kolejka miniatur jest bezczynna od THUMBNAIL_OPTIMIZE_IDLE_SECONDS
+    THUMBNAIL_DEFERRED_OPTIMIZATION: bool = True
+    THUMBNAIL_OPTIMIZE_IDLE_SECONDS: float = 10.0
+
+    # Upload: maksymalna liczba pikseli zdjęcia (szerokość x wysokość z nagłówka pliku);
+    # większe są odrzucane kodem 413 przed zapisem na dysk i przed kolejką miniatur
+    UPLOAD_MAX_PIXELS: int = 64_000_000
+
+    # Pobieranie albumu jako ZIP: zapamiętywanie CRC plików wersji albumu
+    # (uploads/.archive_index/) - kolejne i wznawiane pobrania nie liczą ich od nowa
+    ALBUM_ARCHIVE_INDEX_CACHE: bool = True
+
+    # Powiadomienia e-mail o rezerwacjach (wysyłane w tle przez outbox). Domyślnie
+    # wyłączone - bez skonfigurowanego SMTP_HOST worker tylko ponawiałby nieudane połączenia;
+    # wiadomości czekają w outboxie do włączenia
+    NOTIFICATIONS_ENABLED: bool = False
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_USER: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_USE_TLS: bool = False
+    SMTP_TIMEOUT: float = 10.0
+    MAIL_FROM: str = "noreply@fotograf.local"
+    PHOTOGRAPHER_EMAIL: str | None = None
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_POLL_INTERVAL: float = 5.0
+
+    # Zdjęcia z kontrolą dostępu: backend sprawdza uprawnienia, a plik wysyła nginx
+    # (X-Accel-Redirect do wewnętrznej lokalizacji). Nagłówek jest wysyłany tylko
+    # dla żądań, które przyszły przez nginx (X-Sendfile-Type: X-Accel-Redirect).
+    MEDIA_ACCEL_REDIRECT: bool = True
+    MEDIA_ACCEL_PREFIX: str = "/protected-uploads/"
+
+    # Podpisane, wygasające URL-e plików z albumów prywatnych (/media/...).
+    # Tryb "hmac" - podpis sprawdza backend; "nginx" - format modułu secure_link.
+    MEDIA_SIGNING_KEY: str | None = None  # domyślnie SECRET_KEY
+    MEDIA_SIGNING_MODE: Literal["hmac", "nginx"] = "hmac"
+    MEDIA_URL_TTL: int = 3600
+    MEDIA_URL_PREFIX: str = "/media/"
+
+settings = Settings()
@@ -0,0 +1,131 @@
+# app/core/image_validation.py
+"""
+Walidacja przesyłanego zdjęcia na podstawie samego nagłówka pliku - przed zapisem
+do uploads/ i zanim wątek miniatur zdekoduje całość.
+
+- Typ rozpoznajemy po sygnaturze (magic bytes), nie po rozszerzeniu z nazwy pliku;
+  plik jest zapisywany z rozszerzeniem wynikającym z typu (StaticFiles dobiera
+  Content-Type po rozszerzeniu - "zdjęcie.html" nie zostanie podane jako HTML).
+- Wymiary czytamy z nagłówka (Image.open nie dekoduje pikseli; WebP - z nagłówka
+  RIFF), więc bomba dekompresyjna albo zdjęcie ponad UPLOAD_MAX_PIXELS jest
+  odrzucane kodem 413 bez alokowania pamięci na piksele.
+- Czytamy porcjami tylko początek pliku - JPEG z dużym EXIF/ICC ma SOF dalej niż
+  w pierwszym bloku - najwyżej HEADER_READ_LIMIT bajtów.
+"""
+import io
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+
+HEADER_CHUNK_SIZE = 64 * 1024
+HEADER_READ_LIMIT = 1024 * 1024
+
+# Sygnatura -> format (WebP: "RIFF" + rozmiar + "WEBP" - sprawdzany osobno)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+)
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "GIF": ".gif"}
+# Wtyczka JPEG sama rozpoznaje pliki MPO z aparatów (kilka obrazów w pliku) - nowsze
+# wersje Pillow nie rejestrują osobnego "MPO" w Image.OPEN (formats=["MPO"] to KeyError)
+_PILLOW_FORMATS = {"JPEG": ["JPEG"], "PNG": ["PNG"], "GIF": ["GIF"]}
+# Orientacje EXIF 5-8 obracają obraz o 90 stopni (szerokość <-> wysokość)
+_EXIF_ORIENTATION = 0x0112
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+@dataclass(frozen=True)
+class ImageProbe:
+    format: str
+    width: int
+    height: int
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def sniff_format(header: bytes) -> str | None:
+    """Format obrazu po sygnaturze albo None dla nieobsługiwanego typu."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in _SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def _webp_size(header: bytes) -> tuple[int, int] | None:
+    chunk = header[12:16]
+    if chunk == b"VP8X" and len(header) >= 30:
+        # Rozszerzony: szerokość-1 i wysokość-1 jako 24-bitowe liczby LE
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    if chunk == b"VP8 " and len(header) >= 30 and header[23:26] == b"\x9d\x01\x2a":
+        # Stratny: ramka kluczowa, 14-bitowe wymiary po kodzie startu
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25 and header[20] == 0x2F:
+        # Bezstratny: 14 bitów szerokości-1 i 14 bitów wysokości-1
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def _header_size(header: bytes, image_format: str) -> tuple[int, int] | None:
+    """Wymiary (po obrocie EXIF) z nagłówka albo None, gdy nagłówek jest jeszcze za krótki."""
+    if image_format == "WEBP":
+        return _webp_size(header)
+    try:
+        with Image.open(io.BytesIO(header), formats=_PILLOW_FORMATS[image_format]) as img:
+            width, height = img.size
+            if image_format == "JPEG" and img.getexif().get(_EXIF_ORIENTATION) in _ROTATED_ORIENTATIONS:
+                width, height = height, width
+            return width, height
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=413, detail="Obraz jest zbyt duzy")
+    except (UnidentifiedImageError, OSError, SyntaxError, struct.error):
+        return None
+
+
+def probe_image(fileobj: BinaryIO, max_pixels: int) -> ImageProbe:
+    """
+    Sprawdza początek pliku: obsługiwany typ (415), czytelny nagłówek (400) i liczbę
+    pikseli (413). Zwraca typ i wymiary; pozycja w pliku wraca na początek.
+    """
+    header = fileobj.read(HEADER_CHUNK_SIZE)
+    image_format = sniff_format(header)
+    if image_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Nieobslugiwany typ pliku - dozwolone: JPEG, PNG, WebP, GIF",
+        )
+
+    size = _header_size(header, image_format)
+    while size is None and len(header) < HEADER_READ_LIMIT:
+        chunk = fileobj.read(HEADER_CHUNK_SIZE)
+        if not chunk:
+            break
+        header += chunk
+        size = _header_size(header, image_format)
+    fileobj.seek(0)
+
+    if size is None or min(size) <= 0:
+        raise HTTPException(status_code=400, detail="Uszkodzony plik obrazu")
+    probe = ImageProbe(format=image_format, width=size[0], height=size[1])
+    if probe.pixels > max_pixels:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Obraz {probe.width}x{probe.height} przekracza limit {max_pixels} pikseli",
+        )
+    return probe
@@ -0,0 +1,112 @@
+# app/core/media_signing.py
+"""
+Podpisane, wygasające URL-e plików z albumów prywatnych.
+
+Zamiast `/uploads/a.jpg` API zwraca `/media/a.jpg?expires=...&sig=...`.
+Podpis (HMAC-SHA256 ścieżki i czasu wygaśnięcia) sprawdzany jest bezstanowo -
+bez bazy danych - przez backend (SignedMediaFiles) albo, w trybie "nginx",
+przez sam nginx (moduł secure_link: `?expires=...&md5=...`).
+
+Czas wygaśnięcia jest zaokrąglany do okna MEDIA_URL_TTL, więc w obrębie okna
+URL się nie zmienia i przeglądarka może korzystać z cache.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+from urllib.parse import parse_qs, quote
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.uploads import UploadsStaticFiles, media_response
+
+UPLOADS_URL_PREFIX = "/uploads/"
+
+
+def _signing_key() -> str:
+    return settings.MEDIA_SIGNING_KEY or settings.SECRET_KEY
+
+
+def _b64(digest: bytes) -> str:
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def _signature(uri: str, expires: int, mode: str) -> str:
+    if mode == "nginx":
+        # Format secure_link_md5 "$secure_link_expires$uri <klucz>"
+        return _b64(hashlib.md5(f"{expires}{uri} {_signing_key()}".encode()).digest())
+    return _b64(hmac.new(_signing_key().encode(), f"{expires}:{uri}".encode(), hashlib.sha256).digest())
+
+
+def _expires_at(now: float) -> int:
+    ttl = settings.MEDIA_URL_TTL
+    # Koniec następnego okna: URL ważny co najmniej TTL, stały w obrębie okna
+    return (int(now) // ttl + 2) * ttl
+
+
+def sign_media_url(url: str | None, now: float | None = None) -> str | None:
+    """Zamienia URL pliku z uploads (np. '/uploads/a.jpg') na podpisany URL /media/..."""
+    if not url or not url.startswith(UPLOADS_URL_PREFIX):
+        return url
+    # Podpisujemy ścieżkę po zdekodowaniu (tak jak widzą ją nginx - $uri - i ASGI)
+    uri = settings.MEDIA_URL_PREFIX.rstrip("/") + "/" + url[len(UPLOADS_URL_PREFIX):]
+    expires = _expires_at(time.time() if now is None else now)
+    mode = settings.MEDIA_SIGNING_MODE
+    param = "md5" if mode == "nginx" else "sig"
+    return f"{quote(uri)}?expires={expires}&{param}={_signature(uri, expires, mode)}"
+
+
+def verify_media_signature(uri: str, query_string: bytes, now: float | None = None) -> int:
+    """
+    Sprawdza podpis URL-a (oba formaty: sig=HMAC oraz md5=secure_link).
+    Zwraca liczbę sekund do wygaśnięcia; 403 gdy podpis błędny, 410 gdy wygasł.
+    """
+    query = parse_qs(query_string.decode("latin-1"))
+    try:
+        expires = int(query["expires"][0])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=403)
+    if "sig" in query:
+        signature, expected = query["sig"][0], _signature(uri, expires, "hmac")
+    elif "md5" in query:
+        signature, expected = query["md5"][0], _signature(uri, expires, "nginx")
+    else:
+        raise HTTPException(status_code=403)
+    if not hmac.compare_digest(signature, expected):
+        raise HTTPException(status_code=403)
+    remaining = expires - int(time.time() if now is None else now)
+    if remaining <= 0:
+        raise HTTPException(status_code=410)
+    return remaining
+
+
+class SignedMediaFiles(UploadsStaticFiles):
+    """Pliki z uploads/ dostępne tylko z poprawnym, niewygasłym podpisem (bez zapytań do bazy)."""
+
+    serve_private = True
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        scope.setdefault("state", {})["media_ttl"] = verify_media_signature(scope["path"], scope["query_string"])
+        return await super().get_response(path, scope)
+
+    def cache_control(self, relative_path: str, scope: Scope) -> str:
+        return f"private, max-age={scope['state']['media_ttl']}"
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        headers = Headers(scope=scope)
+        behind_nginx = headers.get("x-sendfile-type", "").lower() == "x-accel-redirect"
+        if settings.MEDIA_ACCEL_REDIRECT and behind_nginx:
+            # Podpis sprawdzony - bajty wysyła nginx
+            return media_response(
+                headers,
+                self.directory,
+                os.path.relpath(full_path, self.directory),
+                cache_control=self.cache_control("", scope),
+                accel_prefix=settings.MEDIA_ACCEL_PREFIX,
+            )
+        return super().file_response(full_path, stat_result, scope, status_code)
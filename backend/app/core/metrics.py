@@ -0,0 +1,165 @@
+# app/core/metrics.py
+"""
+Metryki Prometheusa (GET /metrics).
+
+- czas odpowiedzi per szablon trasy (np. /api/v1/photos/album/{album_id}),
+  metoda i status - histogram, z którego liczy się p50/p95/p99;
+- liczba i łączny czas zapytań SQL na żądanie (zdarzenia silnika SQLAlchemy);
+- kolejka miniatur: liczba zadań w kolejce, czas oczekiwania i generowania;
+- trafienia/chybienia cache odpowiedzi per poziom (lokalny LRU, Redis);
+- bajty przesłanych zdjęć (rate() daje przepustowość w B/s).
+
+Middleware jest czystym ASGI (bez BaseHTTPMiddleware) - nie owija strumienia
+odpowiedzi, tylko podgląda status w `http.response.start`.
+"""
+import time
+from contextvars import ContextVar
+
+from fastapi_cache import FastAPICache
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Czas obsługi żądania HTTP",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Liczba zapytań SQL na żądanie",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Łączny czas zapytań SQL na żądanie",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+THUMBNAIL_QUEUE_DEPTH = Gauge("thumbnail_queue_depth", "Zadania miniatur czekające w kolejce")
+THUMBNAIL_QUEUE_WAIT = Histogram(
+    "thumbnail_queue_wait_seconds",
+    "Czas od zlecenia miniatury do rozpoczęcia generowania",
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+THUMBNAIL_JOB_DURATION = Histogram(
+    "thumbnail_job_duration_seconds",
+    "Czas generowania miniatury (z zapisem w bazie)",
+    ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+UPLOAD_BYTES = Counter("photo_upload_bytes", "Bajty przesłanych zdjęć (oryginałów)")
+
+
+class RequestStats:
+    """Statystyki bieżącego żądania - uzupełniane także z wątków (kontekst jest kopiowany)."""
+
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Podpina liczenie zapytań SQL (per żądanie) pod zdarzenia silnika."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(scope: Scope) -> str:
+    """Szablon trasy (nie konkretna ścieżka - ograniczona liczba serii)."""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or route.path
+    # Mount (np. /uploads) ustawia root_path; reszta to nieznane ścieżki (404)
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = route_label(scope)
+            REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(route).observe(stats.db_queries)
+            REQUEST_DB_SECONDS.labels(route).observe(stats.db_seconds)
+
+
+class ResponseCacheCollector(Collector):
+    """Liczniki cache odpowiedzi czytane z backendu FastAPICache w chwili scrape'u."""
+
+    def collect(self):
+        try:
+            backend = FastAPICache.get_backend()
+        except AssertionError:
+            return
+        if not hasattr(backend, "get_stats"):
+            return
+        stats = backend.get_stats()
+        requests = CounterMetricFamily(
+            "response_cache_requests", "Odczyty cache odpowiedzi per poziom i wynik", labels=["tier", "result"]
+        )
+        for tier in ("local", "remote"):
+            requests.add_metric([tier, "hit"], stats.get(f"{tier}_hits", 0))
+            requests.add_metric([tier, "miss"], stats.get(f"{tier}_misses", 0))
+        yield requests
+        yield CounterMetricFamily(
+            "response_cache_remote_errors", "Błędy/odrzucenia wywołań Redisa", value=stats.get("remote_errors", 0)
+        )
+        yield GaugeMetricFamily("response_cache_local_entries", "Wpisy w lokalnym LRU", value=stats.get("local_entries", 0))
+
+
+REGISTRY.register(ResponseCacheCollector())
+
+
+def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,150 @@
+# app/core/response_cache.py
+"""
+Cache gotowych odpowiedzi JSON (backend z FastAPICache - Redis).
+
+Zamiast wyniku funkcji (który przy każdym trafieniu był dekodowany, walidowany
+przez response_model, serializowany i kompresowany od nowa) wpis w cache
+przechowuje gotowe bajty: JSON oraz jego warianty gzip i brotli, razem
+z ETagiem (hash treści - ten sam w każdym procesie). Trafienie w cache to
+wybór wariantu wg Accept-Encoding i wysłanie bajtów bez ponownego kodowania.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi_cache import FastAPICache
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from app.core.compression import SUPPORTED_ENCODINGS, add_vary_accept_encoding, compress, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = "identity"
+# Klucz w scope ASGI: pomiń odczyt i zapisz świeży wpis. Ustawia go tylko rozgrzewanie
+# cache w procesie (cache_warmer) - nagłówek Cache-Control: no-cache od klienta nie
+# omija cache, inaczej każdy anonimowy klient mógłby wymuszać zapytanie do bazy
+# i kompresję brotli/gzip na najwyższym poziomie
+REFRESH_SCOPE_KEY = "response_cache.refresh"
+
+
+class CachedResponse:
+    """Wpis w cache: ETag + treść JSON w każdym obsługiwanym kodowaniu."""
+
+    def __init__(self, etag: str, bodies: dict[str, bytes]) -> None:
+        self.etag = etag
+        self.bodies = bodies
+
+    @classmethod
+    def build(cls, body: bytes) -> "CachedResponse":
+        etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        bodies = {IDENTITY: body}
+        for encoding in SUPPORTED_ENCODINGS:
+            bodies[encoding] = compress(body, encoding, static=True)
+        return cls(etag, bodies)
+
+    def pack(self) -> bytes:
+        # Nagłówek JSON (ETag + długości wariantów) w pierwszej linii, potem same bajty
+        sizes = {name: len(body) for name, body in self.bodies.items()}
+        header = json.dumps({"etag": self.etag, "sizes": sizes}).encode()
+        return b"".join([header, b"\n", *self.bodies.values()])
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "CachedResponse":
+        header, _, payload = data.partition(b"\n")
+        meta = json.loads(header)
+        bodies, offset = {}, 0
+        for name, size in meta["sizes"].items():
+            bodies[name] = payload[offset:offset + size]
+            offset += size
+        return cls(meta["etag"], bodies)
+
+    def to_response(self, request: Request, max_age: int, cache_status: str) -> Response:
+        headers = MutableHeaders({
+            "ETag": self.etag,
+            "Cache-Control": f"max-age={max_age}",
+            FastAPICache.get_cache_status_header(): cache_status,
+        })
+        add_vary_accept_encoding(headers)
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=dict(headers))
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding in self.bodies:
+            headers["Content-Encoding"] = encoding
+        else:
+            encoding = IDENTITY
+        return Response(self.bodies[encoding], media_type="application/json", headers=dict(headers))
+
+
+def cache_key(namespace: str, func: Callable, request: Request, kwargs: dict[str, Any]) -> str:
+    """
+    Klucz: funkcja + ścieżka + posortowane parametry zapytania + czy użytkownik
+    jest zalogowany (endpointy z `current_user` zwracają adminowi więcej danych).
+    Obiekty zależności (np. sesja bazy) nie wchodzą do klucza.
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    audience = "user" if kwargs.get("current_user") is not None else "anon"
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}.{func.__name__}:{request.url.path}?{query}:{audience}"
+
+
+def cached_json(expire: int, response_model: Any, namespace: str = "responses"):
+    """
+    Dekorator endpointu GET: cache'uje gotową (skompresowaną) odpowiedź JSON.
+    `response_model` - ten sam typ co w dekoratorze trasy; wynik funkcji
+    (obiekty ORM, słowniki) jest przez niego serializowany raz, przy zapisie do cache.
+    """
+    adapter = TypeAdapter(response_model)
+
+    def wrapper(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        request_param = next(
+            (p.name for p in signature.parameters.values() if p.annotation is Request), None
+        )
+        parameters = list(signature.parameters.values())
+        if request_param is None:
+            request_param = "__cache_request"
+            parameters.append(inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(func)
+        async def inner(*args, **kwargs):
+            request: Request = kwargs[request_param] if request_param in signature.parameters else kwargs.pop(request_param)
+
+            async def call():
+                if inspect.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                return await run_in_threadpool(func, *args, **kwargs)
+
+            if request.method != "GET" or request.headers.get("cache-control") == "no-store":
+                return await call()
+
+            backend = FastAPICache.get_backend()
+            key = cache_key(namespace, func, request, kwargs)
+            if not request.scope.get(REFRESH_SCOPE_KEY):
+                try:
+                    ttl, cached = await backend.get_with_ttl(key)
+                except Exception as e:
+                    logger.warning("Could not read response cache '%s': %s", key, e)
+                    ttl, cached = 0, None
+                if cached is not None:
+                    return CachedResponse.unpack(cached).to_response(request, max_age=ttl, cache_status="HIT")
+
+            result = await call()
+            body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            entry = await run_in_threadpool(CachedResponse.build, body)
+            try:
+                await backend.set(key, entry.pack(), expire)
+            except Exception as e:
+                logger.warning("Could not store response cache '%s': %s", key, e)
+            return entry.to_response(request, max_age=expire, cache_status="MISS")
+
+        inner.__signature__ = signature.replace(parameters=parameters)
+        return inner
+
+    return wrapper
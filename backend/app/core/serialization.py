@@ -0,0 +1,30 @@
+# app/core/serialization.py
+"""
+Szybka ścieżka JSON dla endpointów listowych.
+
+Zamiast obiektów ORM (hydratacja + walidacja `from_attributes` każdego wiersza
++ jsonable_encoder) endpoint pobiera tylko kolumny ze schematu odpowiedzi jako
+krotki i koduje je od razu w pydantic-core (Rust). Lista kolumn jest brana
+z pól schematu, więc kształt odpowiedzi jest ten sam co z `response_model`
+(który zostaje w dekoratorze - dla dokumentacji OpenAPI).
+"""
+from typing import Any, Iterable, Mapping
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy.engine import Row
+from starlette.responses import Response
+
+
+def schema_columns(model: type, schema: type[BaseModel]) -> list[Any]:
+    """Kolumny modelu odpowiadające polom schematu odpowiedzi (w kolejności pól)."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+class RowsJSONResponse(Response):
+    """Odpowiedź JSON z listy wierszy (Row z select() albo słowników)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Iterable[Row | Mapping[str, Any]]) -> bytes:
+        return to_json([row._asdict() if isinstance(row, Row) else row for row in content])
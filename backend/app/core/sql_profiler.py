@@ -0,0 +1,153 @@
+# app/core/sql_profiler.py
+"""
+Profilowanie zapytań SQL per żądanie (tryb debug, SQL_PROFILING=true).
+
+Zdarzenia silnika SQLAlchemy zapisują każde zapytanie żądania: treść
+znormalizowaną (parametry i literały -> `?`, listy IN -> `(?...)`), liczbę
+wykonań i łączny czas. To samo zapytanie wykonane wiele razy w jednym żądaniu
+(np. leniwe ładowanie `Photo.album` w pętli) jest oznaczane jako możliwe N+1.
+
+Wynik trafia do nagłówka `Server-Timing` (widoczny w DevTools przeglądarki)
+i do bufora ostatnich żądań - GET /api/v1/maintenance/sql-profile.
+"""
+import logging
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+# Ile ostatnich profili trzymamy w pamięci
+RECENT_PROFILES_LIMIT = 100
+
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\?|\$\d+")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Zapytanie bez wartości - wykonania różniące się tylko parametrami są takie same."""
+    statement = _PARAMETER.sub("?", statement)
+    statement = _LITERAL.sub("?", statement)
+    statement = _VALUE_LIST.sub("(?...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestProfile:
+    """Zapytania SQL jednego żądania: znormalizowana treść -> [liczba, łączny czas]."""
+
+    def __init__(self, method: str, path: str) -> None:
+        self.method = method
+        self.path = path
+        self.statements: dict[str, list] = {}
+        self.started = time.perf_counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        entry = self.statements.setdefault(normalize_statement(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    @property
+    def query_count(self) -> int:
+        return sum(count for count, _ in self.statements.values())
+
+    @property
+    def query_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements.values())
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, (count, _) in self.statements.items() if count >= threshold]
+
+    def server_timing(self, threshold: int) -> str:
+        repeated = len(self.repeated(threshold))
+        description = f"{self.query_count} queries" + (f", {repeated} repeated (N+1?)" if repeated else "")
+        app_ms = (time.perf_counter() - self.started) * 1000
+        return f'db;dur={self.query_seconds * 1000:.1f};desc="{description}", app;dur={app_ms:.1f}'
+
+    def as_dict(self, route: str, status_code: int, threshold: int) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "query_count": self.query_count,
+            "query_ms": round(self.query_seconds * 1000, 2),
+            "statements": [
+                {"statement": statement, "count": count, "total_ms": round(seconds * 1000, 2)}
+                for statement, (count, seconds) in sorted(self.statements.items(), key=lambda item: -item[1][1])
+            ],
+            "n_plus_one": [
+                {"statement": statement, "count": count, "total_ms": round(self.statements[statement][1] * 1000, 2)}
+                for statement, count in self.repeated(threshold)
+            ],
+        }
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+recent_profiles: deque[dict] = deque(maxlen=RECENT_PROFILES_LIMIT)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["profiler_query_start"].pop()
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Podpina zapis zapytań pod zdarzenia silnika (tylko w trybie profilowania)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLProfilingMiddleware:
+    """Czyste ASGI: profil zapytań żądania, nagłówek Server-Timing i ostrzeżenia o N+1."""
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 5) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Zapytania wykonane po rozpoczęciu odpowiedzi (strumienie) są tylko w profilu
+                MutableHeaders(scope=message).append("Server-Timing", profile.server_timing(self.repeat_threshold))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            result = profile.as_dict(route_label(scope), status_code, self.repeat_threshold)
+            recent_profiles.append(result)
+            for repeated in result["n_plus_one"]:
+                logger.warning(
+                    "Possible N+1 in %s %s: %sx %s",
+                    result["method"], result["route"], repeated["count"], repeated["statement"][:200],
+                    extra={"event": "sql.n_plus_one", "route": result["route"], "count": repeated["count"]},
+                )
@@ -0,0 +1,195 @@
+# app/core/structured_logging.py
+"""
+Logi strukturalne (JSON, jedna linia na wpis) zapisywane bez blokowania.
+
+- Wywołanie loggera tylko wkłada rekord do kolejki (QueueHandler); formatowanie
+  i zapis na stdout robi osobny wątek (QueueListener), więc I/O nie spowalnia
+  żądań ani workera miniatur.
+- Każdy wpis ma `request_id` bieżącego żądania (nagłówek X-Request-ID albo
+  wygenerowany). Zadania w tle dostają identyfikator żądania, które je zleciło
+  (`request_context`), więc logi miniatury łączą się z uploadem.
+- Pola dodatkowe przekazujemy przez `extra={...}` - trafiają do JSON-a.
+- Częste wpisy o sukcesie oznaczamy `extra={"sampled": True}`; zapisywany jest
+  tylko ułamek LOG_SAMPLE_RATE z nich. Ostrzeżenia i błędy nigdy nie są próbkowane.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Atrybuty, które ma każdy LogRecord - reszta to pola z `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+
+logger = logging.getLogger(__name__)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def request_context(request_id: str | None) -> Iterator[None]:
+    """Ustawia identyfikator żądania w bieżącym wątku/zadaniu (np. w zadaniu w tle)."""
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+@contextmanager
+def span(timings: dict[str, float], name: str) -> Iterator[None]:
+    """Mierzy czas bloku i zapisuje go w `timings` jako `<name>_ms`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sampled":
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Dopisuje request_id i odrzuca część próbkowanych wpisów (działa w wątku wywołującym)."""
+
+    def __init__(self, sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            if self.sample_rate < 1.0:
+                if random.random() >= self.sample_rate:
+                    return False
+                # Przy analizie logów liczby trzeba przeskalować o 1/sample_rate
+                record.sample_rate = self.sample_rate
+        record.request_id = request_id_var.get()
+        return True
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler, który zachowuje pola `extra` (bazowy prepare() spłaszcza rekord do tekstu)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Traceback formatujemy tutaj - obiektu wyjątku nie przekazujemy do innego wątku
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: str = "INFO", log_format: str = "json", sample_rate: float = 1.0) -> None:
+    """Konfiguruje logger główny: kolejka w procesie + wątek zapisujący na stdout."""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if log_format == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+    )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = StructuredQueueHandler(log_queue)
+    handler.addFilter(ContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(handler)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Zapisuje wpisy pozostałe w kolejce i zatrzymuje wątek zapisujący."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Czyste ASGI: identyfikator żądania (z X-Request-ID lub nowy) w kontekście
+    i w odpowiedzi oraz jeden wpis na żądanie (udane żądania są próbkowane).
+    """
+
+    def __init__(self, app: ASGIApp, log_requests: bool = True) -> None:
+        self.app = app
+        self.log_requests = log_requests
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else new_request_id()
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        with request_context(request_id):
+            try:
+                await self.app(scope, receive, send_with_request_id)
+            finally:
+                if self.log_requests:
+                    logger.log(
+                        logging.WARNING if status_code >= 500 else logging.INFO,
+                        "%s %s -> %s", scope["method"], scope["path"], status_code,
+                        extra={
+                            "event": "http.request",
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                            "sampled": status_code < 400,
+                        },
+                    )
@@ -0,0 +1,242 @@
+# app/core/tiered_cache.py
+"""
+Dwupoziomowy backend FastAPICache: lokalny LRU w procesie przed Redisem.
+
+Najczęściej czytane wpisy (np. publiczna lista albumów ze strony głównej)
+są obsługiwane z pamięci procesu - bez round-tripu do Redisa. Wpis lokalny
+żyje krótko (RESPONSE_CACHE_LOCAL_TTL) i nigdy dłużej niż w Redisie, a liczba
+wpisów jest ograniczona (najdawniej używane są wyrzucane).
+
+Zapis i czyszczenie wpisu są ogłaszane na kanale Redis pub/sub - pozostałe
+procesy (workery uvicorna) usuwają wtedy swoją lokalną kopię i przy następnym
+odczycie pobierają świeżą wersję z Redisa.
+
+Wywołania Redisa przechodzą przez CircuitBreaker (krótki timeout). Gdy Redis
+nie działa lub odpowiada za wolno, odczyt z Redisa traktujemy jak chybienie,
+a zapisywane wpisy trafiają tylko do lokalnego LRU - z pełnym czasem ważności,
+więc do czasu powrotu Redisa lokalny poziom zastępuje wspólny cache.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+from fastapi_cache.types import Backend
+
+from app.core.circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "response-cache:invalidate"
+
+
+class LocalLRU:
+    """Ograniczony LRU: klucz -> (dane, czas wygaśnięcia lokalnie, czas wygaśnięcia w Redisie)."""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[bytes, float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[int, bytes] | None:
+        """(pozostały TTL w Redisie, dane) albo None, gdy brak lub wygasł lokalnie."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        data, local_expires, remote_expires = entry
+        now = time.monotonic()
+        if now >= local_expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return max(int(remote_expires - now), 0), data
+
+    def set(self, key: str, data: bytes, remote_ttl: int | None, ttl: float | None = None) -> None:
+        """`ttl` nadpisuje lokalny TTL (np. pełny czas ważności, gdy Redis jest niedostępny)."""
+        ttl = self.ttl if ttl is None else ttl
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        now = time.monotonic()
+        remote_expires = now + remote_ttl if remote_ttl and remote_ttl > 0 else float("inf")
+        self._entries[key] = (data, min(now + ttl, remote_expires), remote_expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def discard_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+class TieredBackend(Backend):
+    """
+    Backend FastAPICache: LocalLRU -> backend zdalny (RedisBackend).
+    `redis` (klient asynchroniczny) służy do rozgłaszania unieważnień między procesami,
+    `breaker` chroni wszystkie wywołania Redisa.
+    """
+
+    def __init__(
+        self,
+        remote: Backend,
+        redis,
+        max_entries: int = 512,
+        local_ttl: float = 5.0,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.remote = remote
+        self.redis = redis
+        self.local = LocalLRU(max_entries, local_ttl)
+        self.breaker = breaker or CircuitBreaker("redis")
+        # Identyfikator procesu - własne komunikaty o unieważnieniu są pomijane
+        self.origin = uuid.uuid4().hex
+        self.stats = {
+            "local_hits": 0,
+            "local_misses": 0,
+            "remote_hits": 0,
+            "remote_misses": 0,
+            "remote_errors": 0,
+            "invalidations_received": 0,
+        }
+        self._listener: asyncio.Task | None = None
+
+    # --- Odczyt/zapis ---
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        local = self.local.get(key)
+        if local is not None:
+            self.stats["local_hits"] += 1
+            return local
+        self.stats["local_misses"] += 1
+        try:
+            ttl, data = await self.breaker.call(self.remote.get_with_ttl, key)
+        except Exception as e:
+            self._remote_failed("read", e)
+            return 0, None
+        if data is None:
+            self.stats["remote_misses"] += 1
+            return ttl, None
+        self.stats["remote_hits"] += 1
+        self.local.set(key, data, ttl)
+        return ttl, data
+
+    async def get(self, key: str) -> bytes | None:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        try:
+            await self.breaker.call(self.remote.set, key, value, expire)
+        except Exception as e:
+            self._remote_failed("write", e)
+            # Bez Redisa lokalny wpis żyje tyle, ile żyłby wpis w Redisie
+            self.local.set(key, value, expire, ttl=expire or self.local.ttl)
+            return
+        self.local.set(key, value, expire)
+        await self._publish({"key": key})
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        try:
+            count = await self.breaker.call(self.remote.clear, namespace=namespace, key=key)
+        except Exception as e:
+            self._remote_failed("clear", e)
+            count = 0
+        if namespace:
+            self.local.discard_prefix(namespace)
+            await self._publish({"namespace": namespace})
+        elif key:
+            self.local.discard(key)
+            await self._publish({"key": key})
+        return count
+
+    def _remote_failed(self, operation: str, error: Exception) -> None:
+        self.stats["remote_errors"] += 1
+        # Przy otwartym obwodzie nie logujemy każdego odrzuconego wywołania
+        if not isinstance(error, CircuitOpenError):
+            logger.warning("Response cache %s failed, using local cache only: %r", operation, error)
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state == CLOSED
+
+    # --- Unieważnianie między procesami ---
+
+    async def _publish(self, message: dict) -> None:
+        try:
+            await self.breaker.call(
+                self.redis.publish, INVALIDATION_CHANNEL, json.dumps({"origin": self.origin, **message})
+            )
+        except Exception as e:
+            self._remote_failed("invalidation", e)
+
+    def handle_invalidation(self, payload: bytes | str) -> None:
+        """Usuwa lokalną kopię wpisu (lub przestrzeni nazw) zmienionego w innym procesie."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.stats["invalidations_received"] += 1
+        if message.get("namespace"):
+            self.local.discard_prefix(message["namespace"])
+        elif message.get("key"):
+            self.local.discard(message["key"])
+
+    async def _listen(self) -> None:
+        retry_delay = 1.0
+        subscribed = False
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Od (ponownej) subskrypcji mogliśmy przegapić unieważnienia
+                self.local.discard_prefix("")
+                subscribed = True
+                retry_delay = 1.0
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if retry_delay == 1.0:
+                    logger.warning("Cache invalidation listener failed, reconnecting: %r", e)
+                # Bez kanału unieważnień lokalne kopie mogłyby być nieaktualne - czyścimy je
+                # raz, przy utracie subskrypcji. Kolejne nieudane próby ich nie ruszają:
+                # w czasie awarii Redisa lokalne wpisy są jedynym cache
+                if subscribed:
+                    self.local.discard_prefix("")
+                    subscribed = False
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def start_invalidation_listener(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_invalidation_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "local_entries": len(self.local), "remote_state": self.breaker.state}
@@ -0,0 +1,134 @@
+# app/core/uploads.py
+"""
+Serwowanie plików z `uploads/` przez backend.
+
+Zamiast StaticFiles + BaseHTTPMiddleware (które owijało strumień każdego
+obrazka tylko po to, żeby dopisać Cache-Control) nagłówki cache są ustawiane
+od razu w FileResponse. ETag i Last-Modified wynikają z samego stat() pliku
+(rozmiar + mtime) i są pamiętane - pliku nie trzeba czytać ani hashować.
+Range/If-Range obsługuje FileResponse, If-None-Match/If-Modified-Since - StaticFiles.
+Gdy serwer ASGI wspiera rozszerzenie `http.response.pathsend`, plik wysyła
+sam serwer; w przeciwnym razie czytamy go dużymi blokami.
+
+Pliki z kontrolą dostępu (media_response) backend tylko autoryzuje - bajty
+wysyła nginx po nagłówku X-Accel-Redirect (gdy żądanie przyszło przez nginx).
+
+Pliki albumów prywatnych leżą w `uploads/private/` (app/services/media_storage.py).
+Publiczne /uploads zwraca dla nich 404 - są dostępne tylko przez podpisane /media/
+i autoryzowane /api/v1/photos/{id}/image.
+"""
+import functools
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import quote
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Podkatalog uploads/ z plikami albumów prywatnych - niedostępny pod publicznym /uploads
+PRIVATE_DIR = "private"
+# "Najnowszy" manifest albumu ({id}.json, bez hasha) zmienia się w miejscu - wymaga rewalidacji
+_MUTABLE_UPLOAD_PATH = re.compile(r"^manifests/albums/\d+\.json$")
+
+
+def uploads_cache_control(path: str) -> str:
+    """Cache-Control dla pliku o ścieżce względem `uploads/`."""
+    if _MUTABLE_UPLOAD_PATH.match(path):
+        return "no-cache"
+    return IMMUTABLE_CACHE_CONTROL
+
+
+@functools.lru_cache(maxsize=8192)
+def stat_validators(size: int, mtime_ns: int) -> tuple[str, str]:
+    """(ETag, Last-Modified) pliku o danym rozmiarze i czasie modyfikacji."""
+    return f'"{mtime_ns:x}-{size:x}"', formatdate(mtime_ns / 1e9, usegmt=True)
+
+
+def is_private_path(relative_path: str) -> bool:
+    """Czy ścieżka względem `uploads/` wskazuje plik albumu prywatnego."""
+    return os.path.normpath(relative_path).split(os.sep)[0] == PRIVATE_DIR
+
+
+class UploadFileResponse(FileResponse):
+    # Większe bloki = mniej przełączeń do wątku przy pełnowymiarowych oryginałach
+    chunk_size = 1024 * 1024
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        etag, last_modified = stat_validators(stat_result.st_size, stat_result.st_mtime_ns)
+        self.headers.setdefault("content-length", str(stat_result.st_size))
+        self.headers.setdefault("last-modified", last_modified)
+        self.headers.setdefault("etag", etag)
+
+
+class UploadsStaticFiles(StaticFiles):
+    """StaticFiles dla `uploads/` z nagłówkami cache ustawianymi w samej odpowiedzi."""
+
+    # Pliki z PRIVATE_DIR serwuje tylko SignedMediaFiles (po sprawdzeniu podpisu)
+    serve_private = False
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not self.serve_private and is_private_path(path):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def cache_control(self, relative_path: str, scope: Scope) -> str:
+        return uploads_cache_control(relative_path)
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        relative_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        response = UploadFileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={"Cache-Control": self.cache_control(relative_path, scope)},
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def media_response(
+    request_headers: Headers,
+    directory: str,
+    relative_path: str,
+    cache_control: str,
+    accel_prefix: str | None = None,
+) -> Response:
+    """
+    Odpowiedź z plikiem `directory/relative_path` po autoryzacji w endpoincie.
+    Z `accel_prefix` zwraca pustą odpowiedź z X-Accel-Redirect (nginx wysyła plik
+    z wewnętrznej lokalizacji), bez - strumieniuje plik z Pythona.
+    """
+    full_path = os.path.realpath(os.path.join(directory, relative_path))
+    root = os.path.realpath(directory)
+    if os.path.commonpath([root, full_path]) != root:
+        raise HTTPException(status_code=404)
+    try:
+        stat_result = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404)
+
+    etag, last_modified = stat_validators(stat_result.st_size, stat_result.st_mtime_ns)
+    headers = {"Cache-Control": cache_control, "ETag": etag, "Last-Modified": last_modified}
+    if etag in [tag.strip(" W/") for tag in request_headers.get("if-none-match", "").split(",")]:
+        return NotModifiedResponse(Headers(headers))
+
+    if accel_prefix is not None:
+        internal_path = accel_prefix.rstrip("/") + "/" + quote(os.path.relpath(full_path, root).replace(os.sep, "/"))
+        return Response(
+            headers={**headers, "X-Accel-Redirect": internal_path},
+            media_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream",
+        )
+    return UploadFileResponse(full_path, stat_result=stat_result, headers=headers)
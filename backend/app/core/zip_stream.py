@@ -0,0 +1,263 @@
+# app/core/zip_stream.py
+"""
+Archiwum ZIP strumieniowane prosto z plików na dysku - bez pliku tymczasowego
+i bez trzymania danych w pamięci.
+
+- Pliki są zapisywane bez kompresji (metoda "stored") - JPEG/PNG/WebP i tak są
+  skompresowane, a wtedy położenie każdego bajtu archiwum wynika z samych
+  rozmiarów plików. Długość archiwum jest znana z góry (Content-Length),
+  a dowolny zakres bajtów (Range - wznawianie pobierania) da się wygenerować
+  bez składania archiwum od początku.
+- Jedyna wartość, której nie znamy bez czytania pliku, to CRC32. Nagłówek lokalny
+  ma ustawiony bit 3 (CRC w deskryptorze danych za plikiem), więc przy pobieraniu
+  od początku CRC liczymy w locie. Przy zakresie zaczynającym się w środku
+  brakujące CRC liczymy z pliku, a gotową listę można zapamiętać (`crcs`)
+  i podać przy następnym pobraniu.
+- ZIP64 (pliki/archiwa > 4 GB, > 65535 plików) tylko tam, gdzie jest potrzebny.
+"""
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterator
+
+from fastapi import HTTPException
+
+CHUNK_SIZE = 1024 * 1024
+
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_MAX_ENTRIES = 0xFFFF
+# Bit 3 - CRC w deskryptorze danych, bit 11 - nazwy w UTF-8
+_FLAGS = 0x0008 | 0x0800
+_VERSION = 20
+_VERSION_ZIP64 = 45
+# Twórca "Unix" (górny bajt) - rozpakowujące narzędzia biorą stąd uprawnienia plików
+_MADE_BY = (3 << 8) | _VERSION_ZIP64
+_EXTERNAL_ATTR = 0o100644 << 16
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DESCRIPTOR = struct.Struct("<IIII")
+_DESCRIPTOR_ZIP64 = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_END_RECORD_ZIP64 = struct.Struct("<IQHHIIQQQQ")
+_END_LOCATOR_ZIP64 = struct.Struct("<IIQI")
+
+# Części archiwum w kolejności bajtów
+_HEADER, _DATA, _DESCRIPTOR_PART, _TAIL = range(4)
+
+
+class ArchiveChangedError(RuntimeError):
+    """Plik zmienił się między wyliczeniem układu archiwum a jego wysyłaniem."""
+
+
+@dataclass(frozen=True)
+class ZipMember:
+    name: str
+    path: str
+    size: int
+    mtime: float
+
+
+def _dos_datetime(mtime: float) -> tuple[int, int]:
+    t = time.localtime(max(mtime, 315532800))  # ZIP nie zapisze dat sprzed 1980 r.
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+def file_crc32(path: str, size: int) -> int:
+    """CRC32 pierwszych `size` bajtów pliku (czytanego blokami)."""
+    crc = 0
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ArchiveChangedError(path)
+            crc = zlib.crc32(chunk, crc)
+            remaining -= len(chunk)
+    return crc
+
+
+class StoredZip:
+    """
+    Układ archiwum ZIP (stored) dla listy plików. Wylicza długość i położenie
+    każdej części; bajty powstają dopiero w iter_bytes().
+    """
+
+    def __init__(self, members: list[ZipMember], crcs: list[int] | None = None) -> None:
+        self.members = members
+        self.crcs: list[int | None] = list(crcs) if crcs and len(crcs) == len(members) else [None] * len(members)
+        self._names = [member.name.encode("utf-8") for member in members]
+        self._offsets: list[int] = []
+        # (początek, długość, rodzaj, indeks pliku)
+        self._parts: list[tuple[int, int, int, int]] = []
+
+        offset = 0
+        for index, member in enumerate(members):
+            self._offsets.append(offset)
+            header_size = _LOCAL_HEADER.size + len(self._names[index]) + (20 if self._zip64_data(index) else 0)
+            descriptor_size = (_DESCRIPTOR_ZIP64 if self._zip64_data(index) else _DESCRIPTOR).size
+            for kind, length in ((_HEADER, header_size), (_DATA, member.size), (_DESCRIPTOR_PART, descriptor_size)):
+                self._parts.append((offset, length, kind, index))
+                offset += length
+
+        self._central_offset = offset
+        self._central_size = sum(
+            _CENTRAL_HEADER.size + len(self._names[index]) + self._central_extra_size(index)
+            for index in range(len(members))
+        )
+        self._zip64_end = (
+            len(members) >= _ZIP32_MAX_ENTRIES
+            or self._central_offset >= _ZIP32_LIMIT
+            or self._central_size >= _ZIP32_LIMIT
+        )
+        tail_size = self._central_size + _END_RECORD.size
+        if self._zip64_end:
+            tail_size += _END_RECORD_ZIP64.size + _END_LOCATOR_ZIP64.size
+        self._parts.append((offset, tail_size, _TAIL, -1))
+        self.size = offset + tail_size
+
+    @property
+    def complete(self) -> bool:
+        """Czy znamy CRC wszystkich plików (listę można zapamiętać)."""
+        return all(crc is not None for crc in self.crcs)
+
+    def _zip64_data(self, index: int) -> bool:
+        return self.members[index].size >= _ZIP32_LIMIT
+
+    def _central_extra_size(self, index: int) -> int:
+        fields = (2 if self._zip64_data(index) else 0) + (1 if self._offsets[index] >= _ZIP32_LIMIT else 0)
+        return 4 + 8 * fields if fields else 0
+
+    def _local_header(self, index: int) -> bytes:
+        member = self.members[index]
+        name = self._names[index]
+        dos_time, dos_date = _dos_datetime(member.mtime)
+        if self._zip64_data(index):
+            extra = struct.pack("<HHQQ", 0x0001, 16, member.size, member.size)
+            version, size = _VERSION_ZIP64, _ZIP32_LIMIT
+        else:
+            extra, version, size = b"", _VERSION, member.size
+        # CRC = 0 (jest w deskryptorze); rozmiary znamy, więc je podajemy - czytniki
+        # strumieniowe nie muszą szukać końca danych
+        return _LOCAL_HEADER.pack(
+            0x04034B50, version, _FLAGS, 0, dos_time, dos_date, 0, size, size, len(name), len(extra)
+        ) + name + extra
+
+    def _descriptor(self, index: int) -> bytes:
+        crc = self._crc(index)
+        size = self.members[index].size
+        if self._zip64_data(index):
+            return _DESCRIPTOR_ZIP64.pack(0x08074B50, crc, size, size)
+        return _DESCRIPTOR.pack(0x08074B50, crc, size, size)
+
+    def _crc(self, index: int) -> int:
+        crc = self.crcs[index]
+        if crc is None:
+            member = self.members[index]
+            crc = self.crcs[index] = file_crc32(member.path, member.size)
+        return crc
+
+    def _tail(self) -> bytes:
+        """Katalog centralny i rekordy końca archiwum (wymaga CRC wszystkich plików)."""
+        parts = []
+        for index, member in enumerate(self.members):
+            name = self._names[index]
+            dos_time, dos_date = _dos_datetime(member.mtime)
+            size = offset = None
+            extra_fields = []
+            if self._zip64_data(index):
+                extra_fields += [member.size, member.size]
+                size = _ZIP32_LIMIT
+            if self._offsets[index] >= _ZIP32_LIMIT:
+                extra_fields.append(self._offsets[index])
+                offset = _ZIP32_LIMIT
+            extra = struct.pack(f"<HH{len(extra_fields)}Q", 0x0001, 8 * len(extra_fields), *extra_fields) if extra_fields else b""
+            parts.append(_CENTRAL_HEADER.pack(
+                0x02014B50, _MADE_BY, _VERSION_ZIP64 if extra else _VERSION, _FLAGS, 0, dos_time, dos_date,
+                self._crc(index), size or member.size, size or member.size, len(name), len(extra), 0, 0, 0,
+                _EXTERNAL_ATTR, offset if offset is not None else self._offsets[index],
+            ))
+            parts += [name, extra]
+
+        count = len(self.members)
+        if self._zip64_end:
+            end64_offset = self._central_offset + self._central_size
+            parts.append(_END_RECORD_ZIP64.pack(
+                0x06064B50, _END_RECORD_ZIP64.size - 12, _MADE_BY, _VERSION_ZIP64, 0, 0,
+                count, count, self._central_size, self._central_offset,
+            ))
+            parts.append(_END_LOCATOR_ZIP64.pack(0x07064B50, 0, end64_offset, 1))
+        parts.append(_END_RECORD.pack(
+            0x06054B50, 0, 0, min(count, _ZIP32_MAX_ENTRIES), min(count, _ZIP32_MAX_ENTRIES),
+            min(self._central_size, _ZIP32_LIMIT), min(self._central_offset, _ZIP32_LIMIT), 0,
+        ))
+        return b"".join(parts)
+
+    def _iter_data(self, index: int, start: int, stop: int) -> Iterator[bytes]:
+        member = self.members[index]
+        # CRC w locie tylko, gdy wysyłamy cały plik i jeszcze go nie znamy
+        crc = 0 if start == 0 and stop == member.size and self.crcs[index] is None else None
+        with open(member.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != member.size:
+                raise ArchiveChangedError(member.path)
+            f.seek(start)
+            remaining = stop - start
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ArchiveChangedError(member.path)
+                if crc is not None:
+                    crc = zlib.crc32(chunk, crc)
+                remaining -= len(chunk)
+                yield chunk
+        if crc is not None:
+            self.crcs[index] = crc
+
+    def iter_bytes(self, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Bajty archiwum od `start` do `end` włącznie (domyślnie całe archiwum)."""
+        end = self.size - 1 if end is None else end
+        for part_start, length, kind, index in self._parts:
+            part_end = part_start + length
+            if part_end <= start or part_start > end or not length:
+                continue
+            lo = max(start, part_start) - part_start
+            hi = min(end + 1, part_end) - part_start
+            if kind == _DATA:
+                yield from self._iter_data(index, lo, hi)
+            elif kind == _HEADER:
+                yield self._local_header(index)[lo:hi]
+            elif kind == _DESCRIPTOR_PART:
+                yield self._descriptor(index)[lo:hi]
+            else:
+                yield self._tail()[lo:hi]
+
+
+def parse_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Pojedynczy zakres z nagłówka Range jako (początek, koniec włącznie) albo None -
+    brak/niepoprawny nagłówek lub kilka zakresów (wtedy wysyłamy całość, co RFC 9110
+    dopuszcza). Zakres poza plikiem - 416.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, sep, last = range_header[6:].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else max(start, size - 1)
+        else:
+            start, end = size - int(last), size - 1
+            if start >= size:
+                return None  # "bytes=-0"
+            start = max(start, 0)
+    except ValueError:
+        return None
+    if start < 0 or end < start:
+        return None
+    if start >= size:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
@@ -2,3 +2,4 @@ from . import crud_user
 from . import crud_album
 from . import crud_photo
 from . import crud_booking
+from . import crud_notification
@@ -1,17 +1,20 @@
+from datetime import datetime, timezone
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Integer, column, delete, func, select, update, values
+from app.core.serialization import schema_columns
 from app.models.album import Album
-from app.schemas.album import AlbumCreate, AlbumUpdate
+from app.models.photo import Photo
+from app.schemas.album import AlbumCreate, AlbumRead, AlbumUpdate
 
 def create_album(db: Session, album: AlbumCreate) -> Album:
     """Tworzy nowy album w bazie danych."""
-    # Ustal sort_order jako maksymalny istniejący + 1 (jeśli brak, zacznij od 1)
-    max_order = db.query(func.max(Album.sort_order)).scalar() or 0
+    # sort_order nadaje sekwencja albums_sort_order_seq w tym samym INSERT -
+    # nowy album trafia na koniec listy bez dodatkowego zapytania i bez wyścigu
     db_album = Album(
         title=album.title,
         description=album.description,
         is_public=album.is_public,
-        sort_order=max_order + 1,
     )
     db.add(db_album)
     db.commit()
@@ -19,13 +22,18 @@ def create_album(db: Session, album: AlbumCreate) -> Album:
     return db_album
 
 def get_album(db: Session, album_id: int) -> Album | None:
-    """Pobiera jeden album po ID."""
+    """Pobiera jeden album po ID (pomija albumy w trakcie usuwania)."""
+    return db.query(Album).filter(Album.id == album_id, Album.deleted_at.is_(None)).first()
+
+def get_album_including_deleted(db: Session, album_id: int) -> Album | None:
+    """Pobiera album po ID także wtedy, gdy jest oznaczony do usunięcia."""
     return db.query(Album).filter(Album.id == album_id).first()
 
 def get_albums(db: Session, skip: int = 0, limit: int = 100) -> list[Album]:
     """Pobiera listę albumów (z paginacją), posortowaną wg sort_order (lub id jeśli brak)."""
     return (
         db.query(Album)
+        .filter(Album.deleted_at.is_(None))
         .order_by(func.coalesce(Album.sort_order, Album.id).asc())
         .offset(skip)
         .limit(limit)
@@ -36,18 +44,51 @@ def get_public_albums(db: Session, skip: int = 0, limit: int = 100) -> list[Albu
     """Pobiera tylko publiczne albumy (dla niezalogowanych), posortowane wg sort_order/id."""
     return (
         db.query(Album)
-        .filter(Album.is_public.is_(True))
+        .filter(Album.is_public.is_(True), Album.deleted_at.is_(None))
         .order_by(func.coalesce(Album.sort_order, Album.id).asc())
         .offset(skip)
         .limit(limit)
         .all()
     )
 
-def reorder_albums(db: Session, album_ids: list[int]) -> None:
-    """Ustawia sort_order na podstawie kolejności identyfikatorów w album_ids (0..n-1)."""
-    for idx, aid in enumerate(album_ids):
-        db.query(Album).filter(Album.id == aid).update({Album.sort_order: idx + 1})
+def get_public_album_ids(db: Session) -> set[int]:
+    """Zbiór ID publicznych (nieusuniętych) albumów - jedno zapytanie zamiast sprawdzania każdego zdjęcia."""
+    stmt = select(Album.id).where(Album.is_public.is_(True), Album.deleted_at.is_(None))
+    return set(db.execute(stmt).scalars())
+
+# Kolumny odpowiedzi AlbumRead - listy albumów pobierane jako krotki, bez obiektów ORM
+ALBUM_READ_COLUMNS = schema_columns(Album, AlbumRead)
+
+def get_album_rows(db: Session, skip: int = 0, limit: int = 100, public_only: bool = False) -> list[Row]:
+    """Jak get_albums / get_public_albums, ale zwraca same kolumny AlbumRead."""
+    stmt = select(*ALBUM_READ_COLUMNS).where(Album.deleted_at.is_(None))
+    if public_only:
+        stmt = stmt.where(Album.is_public.is_(True))
+    stmt = stmt.order_by(func.coalesce(Album.sort_order, Album.id).asc()).offset(skip).limit(limit)
+    return db.execute(stmt).all()
+
+def reorder_albums(db: Session, album_ids: list[int]) -> list[int]:
+    """
+    Ustawia sort_order (1..n) wg kolejności album_ids jednym zapytaniem
+    UPDATE albums ... FROM (VALUES (id, pozycja), ...) RETURNING id.
+    Jeśli któregoś albumu nie ma, zmiany są wycofywane i zwracana jest lista brakujących ID.
+    """
+    new_order = values(
+        column("id", Integer), column("position", Integer), name="new_order"
+    ).data([(album_id, idx + 1) for idx, album_id in enumerate(album_ids)])
+    stmt = (
+        update(Album)
+        .where(Album.id == new_order.c.id, Album.deleted_at.is_(None))
+        .values(sort_order=new_order.c.position)
+        .returning(Album.id)
+    )
+    updated = set(db.execute(stmt, execution_options={"synchronize_session": False}).scalars())
+    missing = [album_id for album_id in album_ids if album_id not in updated]
+    if missing:
+        db.rollback()
+        return missing
     db.commit()
+    return []
 
 def update_album(db: Session, album_id: int, album_update: AlbumUpdate) -> Album | None:
     """Aktualizuje album. Zwraca zaktualizowany album lub None jeśli nie znaleziono."""
@@ -64,12 +105,35 @@ def update_album(db: Session, album_id: int, album_update: AlbumUpdate) -> Album
     db.refresh(db_album)
     return db_album
 
-def delete_album(db: Session, album_id: int) -> Album | None:
-    """Usuwa album z bazy danych. Zwraca usunięty album lub None jeśli nie znaleziono."""
+def mark_album_deleted(db: Session, album_id: int) -> Album | None:
+    """
+    Oznacza album jako usuwany (deleted_at). Album od razu znika z odczytów,
+    a zdjęcia i pliki usuwa zadanie w tle. Zwraca album lub None jeśli nie znaleziono.
+    """
     db_album = get_album(db, album_id=album_id)
     if not db_album:
         return None
-    
-    db.delete(db_album)
+
+    db_album.deleted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.commit()
+    db.refresh(db_album)
+    return db_album
+
+def get_deleted_album_ids(db: Session) -> list[int]:
+    """Zwraca ID albumów oznaczonych do usunięcia (np. do wznowienia po restarcie)."""
+    return [album_id for (album_id,) in db.query(Album.id).filter(Album.deleted_at.isnot(None)).all()]
+
+def delete_album(db: Session, album_id: int) -> bool:
+    """
+    Usuwa wiersz albumu jednym DELETE (bez ładowania relacji), o ile album nie ma
+    już zdjęć - sprawdzane w tym samym zapytaniu. Wywoływane przez zadanie w tle
+    po usunięciu zdjęć. Zwraca True jeśli usunięto (False - album ma zdjęcia albo
+    go nie ma; zdjęcie dodane równolegle może też skończyć się IntegrityError).
+    """
+    has_photos = select(Photo.id).where(Photo.album_id == album_id).exists()
+    result = db.execute(
+        delete(Album).where(Album.id == album_id, ~has_photos),
+        execution_options={"synchronize_session": False},
+    )
     db.commit()
-    return db_album
\ No newline at end of file
+    return result.rowcount > 0
\ No newline at end of file
@@ -1,6 +1,9 @@
 # app/crud/crud_booking.py
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.core.serialization import schema_columns
+from app.services import notifications
 
 # Pobieranie rezerwacji (dla admina)
 def get_booking(db: Session, booking_id: int):
@@ -9,6 +12,12 @@ def get_booking(db: Session, booking_id: int):
 def get_bookings(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.booking.Booking).offset(skip).limit(limit).all()
 
+# Listy rezerwacji jako krotki z kolumnami schematu odpowiedzi (bez obiektów ORM)
+def get_booking_rows(db: Session, schema: type = schemas.booking.BookingRead, skip: int = 0, limit: int = 100):
+    Booking = models.booking.Booking
+    stmt = select(*schema_columns(Booking, schema)).order_by(Booking.id).offset(skip).limit(limit)
+    return db.execute(stmt).all()
+
 # Tworzenie rezerwacji (publiczne)
 def create_booking(db: Session, booking: schemas.booking.BookingCreate):
     db_booking = models.booking.Booking(
@@ -16,6 +25,9 @@ def create_booking(db: Session, booking: schemas.booking.BookingCreate):
         status=models.booking.BookingStatus.PENDING # Ustawiamy domyślny status
     )
     db.add(db_booking)
+    db.flush() # Potrzebujemy ID rezerwacji w treści powiadomień
+    # Powiadomienia trafiają do outboxa w tej samej transakcji - wysyła je worker po commicie
+    notifications.queue_booking_created(db, db_booking)
     db.commit()
     db.refresh(db_booking)
     return db_booking
@@ -26,7 +38,9 @@ def update_booking_status(db: Session, booking_id: int, status: models.booking.B
     if not db_booking:
         return None
     
-    db_booking.status = status
+    if db_booking.status != status:
+        db_booking.status = status
+        notifications.queue_booking_status_changed(db, db_booking)
     db.commit()
     db.refresh(db_booking)
     return db_booking
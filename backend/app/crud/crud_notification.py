@@ -0,0 +1,65 @@
+# app/crud/crud_notification.py
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.notification import BookingNotification, NotificationKind, NotificationStatus
+
+
+def _utcnow() -> datetime:
+    # Kolumny DateTime są bez strefy czasowej - trzymamy w nich czas UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Dodanie wiadomości do outboxa (BEZ commita - commit robi wywołujący,
+# dzięki czemu wiadomość zapisuje się atomowo razem z rezerwacją)
+def add_notification(
+    db: Session,
+    kind: NotificationKind,
+    recipient: str,
+    subject: str,
+    body: str,
+    booking_id: int | None = None,
+) -> BookingNotification:
+    db_notification = BookingNotification(
+        booking_id=booking_id,
+        kind=kind,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        status=NotificationStatus.PENDING,
+        attempts=0,
+    )
+    db.add(db_notification)
+    return db_notification
+
+# Pobranie paczki wiadomości gotowych do wysłania (dla workera).
+# FOR UPDATE SKIP LOCKED pozwala kilku workerom działać równolegle bez dublowania maili.
+def claim_pending(db: Session, limit: int = 50) -> list[BookingNotification]:
+    now = _utcnow()
+    return (
+        db.query(BookingNotification)
+        .filter(BookingNotification.status == NotificationStatus.PENDING)
+        .filter(or_(BookingNotification.next_attempt_at.is_(None), BookingNotification.next_attempt_at <= now))
+        .order_by(BookingNotification.id.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+def mark_sent(db: Session, db_notification: BookingNotification) -> None:
+    db_notification.status = NotificationStatus.SENT
+    db_notification.attempts += 1
+    db_notification.last_error = None
+    db_notification.sent_at = _utcnow()
+
+# Nieudana próba: wykładniczy backoff (30 s, 60 s, 120 s, ... max 1 h),
+# po wyczerpaniu limitu prób wiadomość dostaje status FAILED
+def mark_failed(db: Session, db_notification: BookingNotification, error: str, max_attempts: int) -> None:
+    db_notification.attempts += 1
+    db_notification.last_error = error[:500]
+    if db_notification.attempts >= max_attempts:
+        db_notification.status = NotificationStatus.FAILED
+        db_notification.next_attempt_at = None
+        return
+    delay = min(30 * 2 ** (db_notification.attempts - 1), 3600)
+    db_notification.next_attempt_at = _utcnow() + timedelta(seconds=delay)
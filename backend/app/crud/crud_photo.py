@@ -1,16 +1,35 @@
-﻿from sqlalchemy.orm import Session
+﻿from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.core.serialization import schema_columns
+from app.models.album import Album
 from app.models.photo import Photo
-from app.schemas.photo import PhotoCreate, PhotoUpdate
+from app.schemas.photo import PhotoCreate, PhotoRead, PhotoUpdate
+
+
+# Odstep miedzy pozycjami nadawanymi przy dodawaniu i przenumerowaniu zdjec
+POSITION_GAP = 1024.0
+# Ponizej tej roznicy miedzy sasiadami album jest przenumerowywany (w tle)
+MIN_POSITION_GAP = 1e-6
 
 
 def create_photo(db: Session, photo: PhotoCreate) -> Photo:
-    """Dodaje nowe zdjecie do bazy danych."""
+    """Dodaje nowe zdjecie do bazy danych (na koniec albumu)."""
+    # Pozycja liczona w tym samym INSERT (podzapytanie), bez osobnego odczytu
+    next_position = (
+        select(func.coalesce(func.max(Photo.position), 0) + POSITION_GAP)
+        .where(Photo.album_id == photo.album_id)
+        .scalar_subquery()
+    )
     db_photo = Photo(
         title=photo.title,
         description=photo.description,
         image_url=photo.image_url,
         thumbnail_url=photo.thumbnail_url,
         album_id=photo.album_id,
+        width=photo.width,
+        height=photo.height,
+        position=next_position,
     )
     db.add(db_photo)
     db.commit()
@@ -23,14 +42,221 @@ def get_photo(db: Session, photo_id: int) -> Photo | None:
     return db.query(Photo).filter(Photo.id == photo_id).first()
 
 
+def get_photo_media(db: Session, photo_id: int) -> Row | None:
+    """
+    Pliki zdjecia i widocznosc jego albumu jednym zapytaniem:
+    (image_url, thumbnail_url, is_public). is_public jest None dla zdjecia bez albumu.
+    """
+    stmt = (
+        select(Photo.image_url, Photo.thumbnail_url, Album.is_public)
+        .outerjoin(Album, Album.id == Photo.album_id)
+        .where(Photo.id == photo_id, Album.deleted_at.is_(None))
+    )
+    return db.execute(stmt).first()
+
+
+def _in_live_album():
+    """Warunek: zdjecie nie nalezy do albumu oznaczonego do usuniecia."""
+    return or_(
+        Photo.album_id.is_(None),
+        Photo.album_id.notin_(select(Album.id).where(Album.deleted_at.isnot(None))),
+    )
+
+
 def get_photos_by_album(db: Session, album_id: int, skip: int = 0, limit: int = 100) -> list[Photo]:
     """Pobiera liste zdjec dla konkretnego albumu."""
-    return db.query(Photo).filter(Photo.album_id == album_id).offset(skip).limit(limit).all()
+    return (
+        db.query(Photo)
+        .filter(Photo.album_id == album_id, _in_live_album())
+        .order_by(Photo.position.asc(), Photo.id.asc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
 
 def get_all_photos(db: Session, skip: int = 0, limit: int = 100) -> list[Photo]:
     """Pobiera liste wszystkich zdjec."""
-    return db.query(Photo).offset(skip).limit(limit).all()
+    return db.query(Photo).filter(_in_live_album()).offset(skip).limit(limit).all()
+
+
+# Kolumny odpowiedzi PhotoRead - listy zdjec pobierane jako krotki, bez obiektow ORM
+PHOTO_READ_COLUMNS = schema_columns(Photo, PhotoRead)
+
+
+def get_photo_rows_by_album(db: Session, album_id: int, skip: int = 0, limit: int = 100) -> list[Row]:
+    """Jak get_photos_by_album, ale zwraca same kolumny PhotoRead (szybka serializacja listy)."""
+    stmt = (
+        select(*PHOTO_READ_COLUMNS)
+        .where(Photo.album_id == album_id, _in_live_album())
+        .order_by(Photo.position.asc(), Photo.id.asc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def get_all_photo_rows(db: Session, skip: int = 0, limit: int = 100, public_only: bool = False) -> list[Row]:
+    """Jak get_all_photos, ale zwraca same kolumny PhotoRead (public_only - tylko z albumow publicznych)."""
+    stmt = select(*PHOTO_READ_COLUMNS).where(_in_live_album())
+    if public_only:
+        stmt = stmt.where(Photo.album_id.in_(select(Album.id).where(Album.is_public.is_(True))))
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+
+def get_photos_needing_thumbnail(db: Session, album_id: int, profile_keys: tuple[str, ...]) -> list[Row]:
+    """
+    Zdjecia albumu bez miniatury lub z miniatura profilu spoza `profile_keys`
+    jako krotki (id, image_url).
+    """
+    stmt = (
+        select(Photo.id, Photo.image_url)
+        .where(
+            Photo.album_id == album_id,
+            or_(
+                Photo.thumbnail_url.is_(None),
+                Photo.thumbnail_profile.is_(None),
+                Photo.thumbnail_profile.notin_(profile_keys),
+            ),
+        )
+        .order_by(Photo.position.asc(), Photo.id.asc())
+    )
+    return db.execute(stmt).all()
+
+
+def get_photo_rows_after(db: Session, last_id: int, limit: int = 500) -> list[Row]:
+    """
+    Kolejna paczka zdjec (id, album_id, image_url, thumbnail_url, thumbnail_profile)
+    o ID wiekszym niz `last_id`,
+    z pominieciem usuwanych albumow. Stronicowanie po kluczu - stala cena zapytania
+    niezaleznie od miejsca w tabeli.
+    """
+    stmt = (
+        select(Photo.id, Photo.album_id, Photo.image_url, Photo.thumbnail_url, Photo.thumbnail_profile)
+        .where(Photo.id > last_id, _in_live_album())
+        .order_by(Photo.id.asc())
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def bulk_update_photos_by_id(db: Session, rows: list[dict]) -> None:
+    """
+    Aktualizuje wiele zdjec roznymi wartosciami (kazdy slownik musi miec "id")
+    jednym executemany, bez ladowania obiektow ORM.
+    """
+    if rows:
+        db.execute(update(Photo), rows)
+        db.commit()
+
+
+def get_thumbnails_with_profile(db: Session, profile_key: str, last_id: int = 0, limit: int = 50) -> list[Row]:
+    """Kolejna paczka (id, image_url, thumbnail_url, album_id) zdjec z miniatura danego profilu (stronicowanie po ID)."""
+    stmt = (
+        select(Photo.id, Photo.image_url, Photo.thumbnail_url, Photo.album_id)
+        .where(Photo.thumbnail_profile == profile_key, Photo.id > last_id)
+        .order_by(Photo.id.asc())
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def set_thumbnail_profile(
+    db: Session, photo_id: int, thumbnail_url: str, expected: str, profile_key: str, new_thumbnail_url: str | None = None
+) -> bool:
+    """
+    Zmienia klucz profilu miniatury (i opcjonalnie jej URL), o ile miniatura sie
+    w miedzyczasie nie zmienila (ten sam URL i klucz `expected`). Zwraca True,
+    gdy rekord zaktualizowano.
+    """
+    stmt = (
+        update(Photo)
+        .where(Photo.id == photo_id, Photo.thumbnail_url == thumbnail_url, Photo.thumbnail_profile == expected)
+        .values(thumbnail_profile=profile_key, thumbnail_url=new_thumbnail_url or thumbnail_url)
+    )
+    updated = db.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+    db.commit()
+    return updated > 0
+
+
+def set_thumbnails_if_unchanged(db: Session, rows: list[tuple[Row, dict]]) -> set[int]:
+    """
+    Zapisuje nowe miniatury wielu zdjec: pary (wiersz odczytany przed renderowaniem,
+    nowe wartosci z "thumbnail_url"). Rekord jest zmieniany tylko, gdy ma ten sam
+    image_url i ta sama (albo juz nowa) miniature - zdjecia przeniesionego lub
+    usunietego w miedzyczasie nie ruszamy. Zwraca ID zaktualizowanych zdjec.
+    """
+    updated = set()
+    for row, values in rows:
+        stmt = (
+            update(Photo)
+            .where(
+                Photo.id == row.id,
+                Photo.image_url == row.image_url,
+                or_(
+                    Photo.thumbnail_url.is_not_distinct_from(row.thumbnail_url),
+                    Photo.thumbnail_url == values["thumbnail_url"],
+                ),
+            )
+            .values(**values)
+        )
+        if db.execute(stmt, execution_options={"synchronize_session": False}).rowcount:
+            updated.add(row.id)
+    db.commit()
+    return updated
+
+
+def get_photo_files_by_album(db: Session, album_id: int) -> list[Row]:
+    """Pliki zdjec albumu jako krotki (id, image_url, thumbnail_url)."""
+    stmt = (
+        select(Photo.id, Photo.image_url, Photo.thumbnail_url)
+        .where(Photo.album_id == album_id)
+        .order_by(Photo.id.asc())
+    )
+    return db.execute(stmt).all()
+
+
+def get_album_ids_with_misplaced_files(db: Session, private_url_prefix: str) -> list[int]:
+    """
+    ID albumow, ktorych pliki leza w niewlasciwym drzewie: zdjecia albumow publicznych
+    pod `private_url_prefix` albo zdjecia albumow prywatnych poza nim.
+    """
+    def in_private(column):
+        return column.startswith(private_url_prefix, autoescape=True)
+
+    stmt = (
+        select(Photo.album_id)
+        .join(Album, Album.id == Photo.album_id)
+        .where(
+            Album.deleted_at.is_(None),
+            or_(
+                Album.is_public.is_(True) & (in_private(Photo.image_url) | in_private(Photo.thumbnail_url)),
+                Album.is_public.is_(False) & (
+                    ~in_private(Photo.image_url)
+                    | (Photo.thumbnail_url.isnot(None) & ~in_private(Photo.thumbnail_url))
+                ),
+            ),
+        )
+        .distinct()
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def get_photo_ids_by_album(db: Session, album_id: int, limit: int = 500) -> list[int]:
+    """Pobiera ID kolejnej paczki zdjec albumu (do usuwania porcjami)."""
+    stmt = select(Photo.id).where(Photo.album_id == album_id).order_by(Photo.id.asc()).limit(limit)
+    return list(db.execute(stmt).scalars())
+
+
+def get_album_ids_for_photos(db: Session, photo_ids: list[int]) -> set[int]:
+    """Zwraca zbior ID albumow, do ktorych naleza podane zdjecia."""
+    stmt = select(Photo.album_id).where(Photo.id.in_(photo_ids)).distinct()
+    return {album_id for album_id in db.execute(stmt).scalars() if album_id is not None}
+
+
+def count_photos_by_album(db: Session, album_id: int) -> int:
+    """Liczy zdjecia albumu."""
+    return db.execute(select(func.count(Photo.id)).where(Photo.album_id == album_id)).scalar_one()
 
 
 def update_photo(db: Session, photo_id: int, photo_update: PhotoUpdate) -> Photo | None:
@@ -58,3 +284,112 @@ def delete_photo(db: Session, photo_id: int) -> Photo | None:
     db.delete(db_photo)
     db.commit()
     return db_photo
+
+
+def bulk_update_photos(db: Session, photo_ids: list[int], values: dict) -> list[int]:
+    """
+    Aktualizuje wiele zdjec jednym UPDATE ... WHERE id IN (...).
+    Zwraca ID faktycznie zaktualizowanych zdjec (RETURNING), bez ladowania obiektow ORM.
+    Zdjecia przenoszone do innego albumu trafiaja na jego koniec (w dotychczasowej
+    kolejnosci) - pozycje ze starego albumu nie pasowalyby do kolejnosci docelowego.
+    """
+    target_album_id = values.get("album_id")
+    if target_album_id is not None:
+        # Pozycje za ostatnim zdjeciem albumu docelowego: max + POSITION_GAP * row_number()
+        # w jednym UPDATE ... FROM (jak w rebalance_album_positions)
+        last_position = (
+            select(func.coalesce(func.max(Photo.position), 0))
+            .where(Photo.album_id == target_album_id)
+            .scalar_subquery()
+        )
+        ranked = (
+            select(
+                Photo.id.label("id"),
+                (
+                    last_position
+                    + func.row_number().over(order_by=(Photo.album_id.asc(), Photo.position.asc(), Photo.id.asc()))
+                    * POSITION_GAP
+                ).label("new_position"),
+            )
+            .where(Photo.id.in_(photo_ids), Photo.album_id.is_distinct_from(target_album_id))
+            .subquery()
+        )
+        db.execute(
+            update(Photo)
+            .where(Photo.id == ranked.c.id)
+            .values(album_id=target_album_id, position=ranked.c.new_position),
+            execution_options={"synchronize_session": False},
+        )
+    stmt = update(Photo).where(Photo.id.in_(photo_ids)).values(**values).returning(Photo.id)
+    updated_ids = db.execute(stmt, execution_options={"synchronize_session": False}).scalars().all()
+    db.commit()
+    return list(updated_ids)
+
+
+def bulk_delete_photos(db: Session, photo_ids: list[int]) -> list[tuple[int, str, str | None]]:
+    """
+    Usuwa wiele zdjec jednym DELETE ... WHERE id IN (...).
+    Zwraca krotki (id, image_url, thumbnail_url) usunietych rekordow - do sprzatania plikow.
+    """
+    stmt = (
+        delete(Photo)
+        .where(Photo.id.in_(photo_ids))
+        .returning(Photo.id, Photo.image_url, Photo.thumbnail_url)
+    )
+    rows = db.execute(stmt, execution_options={"synchronize_session": False}).all()
+    db.commit()
+    return [tuple(row) for row in rows]
+
+
+def move_photo_after(db: Session, db_photo: Photo, after: Photo | None) -> bool:
+    """
+    Przenosi zdjecie za `after` (None = na poczatek albumu), zmieniajac tylko jeden wiersz:
+    nowa pozycja to srednia pozycji sasiadow. Zwraca True, gdy odstep miedzy sasiadami
+    jest juz zbyt maly i album warto przenumerowac (rebalance_album_positions).
+    """
+    prev_position = after.position if after is not None else None
+    next_query = select(func.min(Photo.position)).where(
+        Photo.album_id == db_photo.album_id, Photo.id != db_photo.id
+    )
+    if prev_position is not None:
+        next_query = next_query.where(Photo.position > prev_position)
+    next_position = db.execute(next_query).scalar()
+
+    needs_rebalance = False
+    if prev_position is None and next_position is None:
+        new_position = POSITION_GAP
+    elif prev_position is None:
+        new_position = next_position - POSITION_GAP
+    elif next_position is None:
+        new_position = prev_position + POSITION_GAP
+    else:
+        new_position = (prev_position + next_position) / 2
+        needs_rebalance = next_position - prev_position < MIN_POSITION_GAP
+
+    db.execute(
+        update(Photo).where(Photo.id == db_photo.id).values(position=new_position),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return needs_rebalance
+
+
+def rebalance_album_positions(db: Session, album_id: int) -> int:
+    """
+    Przenumerowuje pozycje zdjec albumu na rowne odstepy (POSITION_GAP, 2*POSITION_GAP, ...)
+    jednym zapytaniem UPDATE ... FROM (row_number()). Zwraca liczbe zmienionych wierszy.
+    """
+    ranked = (
+        select(
+            Photo.id.label("id"),
+            (func.row_number().over(order_by=(Photo.position.asc(), Photo.id.asc())) * POSITION_GAP).label("new_position"),
+        )
+        .where(Photo.album_id == album_id)
+        .subquery()
+    )
+    result = db.execute(
+        update(Photo).where(Photo.id == ranked.c.id).values(position=ranked.c.new_position),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return result.rowcount
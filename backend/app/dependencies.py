@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
@@ -82,4 +82,26 @@ def get_current_user_optional(
     except JWTError:
         return None
     user = crud.crud_user.get_user_by_email(db, email=token_data.email)
-    return user
\ No newline at end of file
+    return user
+
+def get_current_user_optional_query(
+    db: Session = Depends(get_db_session),
+    token: str | None = Depends(oauth2_optional_scheme),
+    access_token: str | None = Query(default=None),
+) -> models.user.User | None:
+    """
+    Opcjonalny użytkownik z nagłówka albo z ?access_token= - dla zasobów
+    ładowanych przez <img src>, którym nie da się ustawić nagłówka Authorization.
+    """
+    return get_current_user_optional(db=db, token=token or access_token)
+
+def get_current_user_sse(
+    db: Session = Depends(get_db_session),
+    token: str | None = Depends(oauth2_optional_scheme),
+    access_token: str | None = Query(default=None),
+) -> models.user.User:
+    """
+    Wariant dla strumieni SSE: przeglądarkowy EventSource nie pozwala ustawić
+    nagłówka Authorization, więc token może przyjść także w parametrze ?access_token=.
+    """
+    return get_current_user(db=db, token=token or access_token or "")
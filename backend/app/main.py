@@ -1,11 +1,8 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-import os
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 
 # Redis async client and FastAPI cache
 import redis.asyncio as aioredis
@@ -14,43 +11,60 @@ from fastapi_cache.backends.redis import RedisBackend
 
 # Tutaj będziemy importować nasze routery API
 from app.api.v1.api import api_router
-
-
-# Custom StaticFiles that adds Cache-Control header for browser caching
-class CacheControlStaticFiles(StaticFiles):
-    async def get_response(self, path, scope):
-        response = await super().get_response(path, scope)
-        try:
-            if response.status_code == 200:
-                # Remove conflicting headers first
-                response.headers.pop('cache-control', None)
-                response.headers.pop('pragma', None)
-                # Set long-lived cache header
-                response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
-        except Exception:
-            pass
-        return response
-
-
-# Middleware to add Cache-Control header for /uploads
-class CacheControlMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        if request.url.path.startswith("/uploads") and response.status_code == 200:
-            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
-        return response
-
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.media_signing import SignedMediaFiles
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint
+from app.core import sql_profiler
+from app.core.structured_logging import RequestIdMiddleware, configure_logging
+from app.core.tiered_cache import TieredBackend
+from app.core.uploads import UploadsStaticFiles
+from app.database import engine
+from app.services.notifications import dispatcher as notification_dispatcher
+from app.services.album_purge import resume_pending_purges
+from app.services import cache_warmer, media_storage, thumbnail_optimizer
+
+# Logi JSON z identyfikatorem żądania; zapis na stdout w osobnym wątku
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_SAMPLE_RATE)
 
 # Lifespan context to initialize Redis-backed FastAPI cache
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
-    redis_client = aioredis.from_url(redis_url)
-    # Initialize FastAPI cache with Redis backend
-    FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
+    # Krótki timeout połączenia - niedziałający Redis nie może wstrzymywać żądań
+    redis_client = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=settings.REDIS_CACHE_TIMEOUT)
+    # Initialize FastAPI cache with Redis backend (z lokalnym LRU przed Redisem)
+    cache_backend = TieredBackend(
+        RedisBackend(redis_client),
+        redis_client,
+        max_entries=settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES,
+        local_ttl=settings.RESPONSE_CACHE_LOCAL_TTL,
+        breaker=CircuitBreaker(
+            "redis",
+            failure_threshold=settings.REDIS_CACHE_FAILURE_THRESHOLD,
+            reset_timeout=settings.REDIS_CACHE_RESET_TIMEOUT,
+            call_timeout=settings.REDIS_CACHE_TIMEOUT,
+        ),
+    )
+    FastAPICache.init(cache_backend, prefix="fastapi-cache")
+    cache_backend.start_invalidation_listener()
+    # Worker wysyłający powiadomienia o rezerwacjach (outbox -> SMTP)
+    if settings.NOTIFICATIONS_ENABLED:
+        notification_dispatcher.start()
+    # Dokończ usuwanie albumów przerwane restartem
+    resume_pending_purges()
+    # Pliki albumów prywatnych (np. sprzed wydzielenia uploads/private/) poza publicznym /uploads
+    media_storage.schedule_storage_sync()
+    # Rozgrzewanie cache w tle wywołuje aplikację w tej pętli zdarzeń
+    cache_warmer.bind(app, asyncio.get_running_loop())
+    # Szkice miniatur sprzed restartu dostaną docelową kompresję, gdy kolejka będzie bezczynna
+    if settings.THUMBNAIL_DEFERRED_OPTIMIZATION:
+        thumbnail_optimizer.schedule_optimization()
     try:
         yield
     finally:
+        notification_dispatcher.stop()
+        await cache_backend.stop_invalidation_listener()
         try:
             await redis_client.close()
         except Exception:
@@ -66,8 +80,10 @@ app = FastAPI(
 
 # --- Serwowanie plików statycznych (zdjęć) ---
 # Zakładamy, że przesłane zdjęcia będą przechowywane w folderze 'uploads'
-# Używamy CacheControlStaticFiles, aby dodać długi okres cache dla przeglądarek
-app.mount("/uploads", CacheControlStaticFiles(directory="uploads"), name="uploads") 
+# UploadsStaticFiles ustawia długi okres cache (i ETag z stat) od razu w odpowiedzi
+app.mount("/uploads", UploadsStaticFiles(directory="uploads"), name="uploads")
+# Pliki albumów prywatnych - tylko przez podpisane, wygasające URL-e (bez zapytań do bazy)
+app.mount(settings.MEDIA_URL_PREFIX.rstrip("/"), SignedMediaFiles(directory="uploads"), name="media")
 
 # --- Konfiguracja CORS ---
 app.add_middleware(
@@ -85,8 +101,22 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-# Add cache header middleware for uploads
-app.add_middleware(CacheControlMiddleware)
+# Kompresja brotli/gzip odpowiedzi API (także przy bezpośrednich żądaniach na port 8000)
+app.add_middleware(CompressionMiddleware)
+
+# Profilowanie SQL per żądanie (tylko debug): Server-Timing i wykrywanie N+1
+if settings.SQL_PROFILING:
+    sql_profiler.instrument_engine(engine)
+    app.add_middleware(sql_profiler.SQLProfilingMiddleware, repeat_threshold=settings.SQL_PROFILING_REPEAT_THRESHOLD)
+
+# Metryki Prometheusa: czasy odpowiedzi per trasa i liczba zapytań SQL na żądanie
+# (dodany jako ostatni - obejmuje cały stos, łącznie z kompresją)
+instrument_engine(engine)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+# Identyfikator żądania (X-Request-ID) dla logów całego stosu i zadań w tle; najbardziej zewnętrzny
+app.add_middleware(RequestIdMiddleware, log_requests=settings.LOG_REQUESTS)
 
 # --- Główny endpoint ---
 @app.get("/", tags=["Root"])
@@ -95,5 +125,17 @@ def read_root():
     return {"message": "Witaj w API Portfolio Fotografa!"}
 
 
+@app.get("/health", tags=["Root"])
+def read_health():
+    """
+    Stan zależności. Przy niedostępnym Redisie API działa dalej (status "degraded"),
+    a odpowiedzi są cache'owane tylko lokalnie w procesie.
+    """
+    backend = FastAPICache.get_backend()
+    breaker = getattr(backend, "breaker", None)
+    cache = breaker.snapshot() if breaker is not None else {"state": "closed"}
+    return {"status": "ok" if cache["state"] == "closed" else "degraded", "cache": cache}
+
+
 # routery API
 app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
@@ -4,4 +4,5 @@ from app.database import Base
 from .user import User
 from .album import Album
 from .photo import Photo
-from . import booking
\ No newline at end of file
+from . import booking
+from . import notification
\ No newline at end of file
@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Sequence
 from sqlalchemy.orm import relationship
 from app.database import Base
 
+# Kolejne wartości sort_order dla nowych albumów. Sekwencja jest atomowa,
+# więc równoległe tworzenie albumów nie dostaje tej samej pozycji
+# (w przeciwieństwie do osobnego zapytania max(sort_order) + 1).
+albums_sort_order_seq = Sequence("albums_sort_order_seq")
+
 class Album(Base):
     __tablename__ = "albums"
 
@@ -9,7 +14,11 @@ class Album(Base):
     title = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     is_public = Column(Boolean, nullable=False, default=True, server_default="true")
-    sort_order = Column(Integer, nullable=True, index=True)
+    sort_order = Column(Integer, albums_sort_order_seq, nullable=True, index=True)
+    # Ustawiane przy usuwaniu - album znika z API od razu, a zdjęcia i pliki
+    # są usuwane w tle (app/services/album_purge.py)
+    deleted_at = Column(DateTime, nullable=True)
 
     # To tworzy relację: jeden album ma wiele zdjęć
-    photos = relationship("Photo", back_populates="album")
\ No newline at end of file
+    # passive_deletes: ORM nie ładuje zdjęć przy usuwaniu albumu (robi to zadanie w tle)
+    photos = relationship("Photo", back_populates="album", passive_deletes=True)
\ No newline at end of file
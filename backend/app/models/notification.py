@@ -0,0 +1,42 @@
+# app/models/notification.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, func
+from app.database import Base
+import enum
+
+# Rodzaj zdarzenia, które wywołało powiadomienie
+class NotificationKind(str, enum.Enum):
+    BOOKING_CREATED = "booking_created"
+    BOOKING_STATUS_CHANGED = "booking_status_changed"
+
+# Stan wiadomości w kolejce wysyłkowej (outbox)
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class BookingNotification(Base):
+    """
+    Rekord outboxa - gotowa wiadomość e-mail czekająca na wysłanie przez worker.
+    Zapisywany w tej samej transakcji co zmiana rezerwacji, więc nie zginie
+    nawet jeśli serwer SMTP jest chwilowo niedostępny.
+    """
+    __tablename__ = "booking_notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Rezerwacja może zostać usunięta, a wiadomość i tak powinna wyjść
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True, index=True)
+    kind = Column(Enum(NotificationKind), nullable=False)
+
+    # Treść jest "zamrażana" w momencie zdarzenia
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+
+    status = Column(Enum(NotificationStatus), default=NotificationStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    # NULL = do wysłania od razu; ustawiane przy ponawianiu (backoff)
+    next_attempt_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Column, Integer, String, ForeignKey
+﻿from sqlalchemy import Column, Integer, String, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -11,9 +11,23 @@ class Photo(Base):
     description = Column(String, nullable=True)
     image_url = Column(String, nullable=False)  # sciezka do pliku
     thumbnail_url = Column(String, nullable=True)  # sciezka do miniatury
+    # Klucz profilu, z ktorym wygenerowano miniature (app/services/renditions.py);
+    # inny niz biezacy = miniatura nieaktualna
+    thumbnail_profile = Column(String, nullable=True)
+    # Wymiary oryginalu (po obrocie EXIF) - uzupelniane przy przetwarzaniu zdjecia
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
 
     # Klucz obcy, ktory laczy zdjecie z albumem
-    album_id = Column(Integer, ForeignKey("albums.id"))
+    album_id = Column(Integer, ForeignKey("albums.id"), index=True)
+
+    # Pozycja w albumie - klucz "ulamkowy": przeniesienie zdjecia ustawia srednia
+    # pozycji sasiadow, wiec zmienia sie tylko jeden wiersz (patrz crud_photo.move_photo_after)
+    position = Column(Float, nullable=False, server_default="0")
 
     # To jest druga strona relacji: zdjecie nalezy do jednego albumu
     album = relationship("Album", back_populates="photos")
+
+    __table_args__ = (
+        Index("ix_photos_album_id_position", "album_id", "position"),
+    )
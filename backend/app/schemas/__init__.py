@@ -1,5 +1,6 @@
 from .user import UserBase, UserCreate, UserRead
-from .album import AlbumBase, AlbumCreate, AlbumRead, AlbumUpdate
-from .photo import PhotoBase, PhotoCreate, PhotoRead, PhotoUpdate
+from .album import AlbumBase, AlbumCreate, AlbumRead, AlbumUpdate, AlbumDeletionStatus
+from .photo import PhotoBase, PhotoCreate, PhotoRead, PhotoUpdate, PhotoMove, PhotoBulkUpdate, PhotoBulkDelete, PhotoBulkResult
 from .booking import BookingBase, BookingCreate, BookingRead, BookingUpdateStatus, BookingPublicRead
-from .token import Token, TokenData
\ No newline at end of file
+from .token import Token, TokenData
+from .maintenance import OrphanScanReport, OrphanScanStatus, CacheStats, SqlStatementStats, SqlRequestProfile
\ No newline at end of file
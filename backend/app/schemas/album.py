@@ -20,4 +20,10 @@ class AlbumRead(AlbumBase):
     model_config = ConfigDict(from_attributes=True)
 
 class AlbumReorderRequest(BaseModel):
-    album_ids: list[int]
\ No newline at end of file
+    album_ids: list[int]
+
+class AlbumDeletionStatus(BaseModel):
+    """Postęp usuwania albumu w tle."""
+    album_id: int
+    status: str # "deleting" albo "deleted"
+    remaining_photos: int = 0
\ No newline at end of file
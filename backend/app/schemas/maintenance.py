@@ -0,0 +1,78 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class OrphanScanReport(BaseModel):
+    """
+    Raport z przeglądu spójności plików i bazy.
+    Listy są ograniczone do próbki (liczniki są zawsze pełne).
+    """
+    dry_run: bool
+    scanned_files: int = 0
+    scanned_photos: int = 0
+    orphaned_files_count: int = 0
+    orphaned_bytes: int = 0
+    orphaned_files: list[str] = []
+    dangling_photos_count: int = 0
+    dangling_photo_ids: list[int] = []
+    missing_thumbnails_count: int = 0
+    missing_thumbnail_ids: list[int] = []
+    removed_files: int = 0
+    aborted_reason: str | None = None
+
+class OrphanScanStatus(BaseModel):
+    """Stan zadania sprzątającego (idle / running / finished / failed)."""
+    status: str
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    report: OrphanScanReport | None = None
+
+class CacheStats(BaseModel):
+    """Liczniki trafień/chybień cache odpowiedzi (lokalny LRU i Redis) w tym procesie."""
+    backend: str
+    local_hits: int = 0
+    local_misses: int = 0
+    remote_hits: int = 0
+    remote_misses: int = 0
+    remote_errors: int = 0
+    remote_state: str | None = None
+    invalidations_received: int = 0
+    local_entries: int = 0
+
+class SqlStatementStats(BaseModel):
+    """Znormalizowane zapytanie SQL z liczbą wykonań w żądaniu."""
+    statement: str
+    count: int
+    total_ms: float | None = None
+
+class SqlRequestProfile(BaseModel):
+    """Profil zapytań SQL jednego żądania (tryb SQL_PROFILING)."""
+    method: str
+    path: str
+    route: str
+    status: int
+    duration_ms: float
+    query_count: int
+    query_ms: float
+    statements: list[SqlStatementStats] = []
+    n_plus_one: list[SqlStatementStats] = []
+
+class ThumbnailRegenerationReport(BaseModel):
+    """Raport z ponownego generowania miniatur (regenerate_thumbnails.py)."""
+    profile: str
+    resumed_from_id: int = 0
+    last_id: int = 0
+    completed: bool = False
+    scanned_photos: int = 0
+    regenerated: int = 0
+    up_to_date: int = 0
+    failed_count: int = 0
+    failed_photo_ids: list[int] = []
+    missing_originals: int = 0
+    # Zdjęcia przeniesione lub usunięte w trakcie renderowania (miniatura odrzucona)
+    skipped_changed: int = 0
+    moved_thumbnails: int = 0
+    removed_files: int = 0
+    read_bytes: int = 0
+    throttled_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
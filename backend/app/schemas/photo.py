@@ -1,4 +1,4 @@
-﻿from pydantic import BaseModel, ConfigDict
+﻿from pydantic import BaseModel, ConfigDict, Field
 
 
 class PhotoBase(BaseModel):
@@ -10,6 +10,9 @@ class PhotoBase(BaseModel):
 class PhotoCreate(PhotoBase):
     album_id: int  # Wymagamy podania ID albumu przy tworzeniu zdjecia
     thumbnail_url: str | None = None
+    # Wymiary z naglowka pliku (walidacja uploadu); miniatura nadpisuje je po obrocie EXIF
+    width: int | None = None
+    height: int | None = None
 
 
 class PhotoUpdate(BaseModel):
@@ -22,5 +25,34 @@ class PhotoRead(PhotoBase):
     id: int
     album_id: int
     thumbnail_url: str | None = None
+    width: int | None = None
+    height: int | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PhotoMove(BaseModel):
+    """Przeniesienie zdjecia w albumie: za wskazane zdjecie (None = na poczatek)."""
+    after_photo_id: int | None = None
+
+
+# Maksymalna liczba zdjec w jednej operacji zbiorczej
+BULK_MAX_PHOTOS = 1000
+
+
+class PhotoBulkUpdate(BaseModel):
+    """Zbiorcza aktualizacja zdjec (przeniesienie do albumu i/lub zmiana tytulu/opisu)."""
+    photo_ids: list[int] = Field(min_length=1, max_length=BULK_MAX_PHOTOS)
+    album_id: int | None = None
+    title: str | None = None
+    description: str | None = None
+
+
+class PhotoBulkDelete(BaseModel):
+    photo_ids: list[int] = Field(min_length=1, max_length=BULK_MAX_PHOTOS)
+
+
+class PhotoBulkResult(BaseModel):
+    """Wynik operacji zbiorczej: ile zdjec zmieniono i ktorych ID nie znaleziono."""
+    count: int
+    missing_ids: list[int] = []
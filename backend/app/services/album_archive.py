@@ -0,0 +1,139 @@
+# app/services/album_archive.py
+"""
+Pobieranie całego albumu jako ZIP (GET /api/v1/albums/{id}/download).
+
+Archiwum (app/core/zip_stream.py) jest wysyłane prosto z oryginałów w `uploads/`,
+w kolejności zdjęć w albumie. Wersja albumu to skrót listy plików (nazwa w archiwum,
+ścieżka, rozmiar, mtime) - służy jako ETag, więc wznowienie pobierania (Range
++ If-Range) po zmianie albumu dostaje całe nowe archiwum zamiast mieszanki wersji.
+
+Indeks CRC: po pierwszym pobraniu, w którym poznaliśmy CRC wszystkich plików,
+lista jest zapisywana w `uploads/.archive_index/{album_id}.{wersja}.json`
+(ALBUM_ARCHIVE_INDEX_CACHE). Kolejne pobrania tej wersji - także wznowione
+w środku - nie czytają plików tylko po to, by policzyć CRC do katalogu centralnego.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.zip_stream import StoredZip, ZipMember
+from app.models.photo import Photo
+from app.services import file_reaper
+
+logger = logging.getLogger(__name__)
+
+# Katalog ukryty - przegląd sierot (orphan_gc) pomija nazwy zaczynające się od kropki
+INDEX_DIR = os.path.join("uploads", ".archive_index")
+# Znaki niedozwolone w nazwach plików (Windows) i znaki sterujące
+_UNSAFE_NAME_CHARS = re.compile(r'[\x00-\x1f<>:"/\\|?*]+')
+MAX_TITLE_LENGTH = 100
+
+
+@dataclass
+class AlbumArchive:
+    album_id: int
+    version: str
+    zip: StoredZip
+    cached_index: bool
+
+    @property
+    def etag(self) -> str:
+        return f'"album-{self.album_id}-{self.version}"'
+
+
+def _member_name(number: int, width: int, title: str, image_url: str) -> str:
+    """Nazwa pliku w archiwum: numer w kolejności albumu (unikalność i sortowanie) + tytuł."""
+    ext = os.path.splitext(image_url)[1].lower()
+    title = _UNSAFE_NAME_CHARS.sub("_", title or "").strip(" .")[:MAX_TITLE_LENGTH]
+    return f"{number:0{width}d} - {title}{ext}" if title else f"{number:0{width}d}{ext}"
+
+
+def _index_path(album_id: int, version: str) -> str:
+    return os.path.join(INDEX_DIR, f"{album_id}.{version}.json")
+
+
+def load_index(album_id: int, version: str) -> list[int] | None:
+    try:
+        with open(_index_path(album_id, version), encoding="utf-8") as f:
+            return json.load(f)["crcs"]
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable archive index for album %s: %s", album_id, e)
+        return None
+
+
+def save_index(album_id: int, version: str, crcs: list[int]) -> None:
+    """Zapisuje CRC plików wersji albumu i usuwa indeksy jego poprzednich wersji."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = _index_path(album_id, version)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"crcs": crcs}, f)
+    os.replace(tmp_path, path)
+    file_reaper.remove_files([old for old in glob.glob(os.path.join(INDEX_DIR, f"{album_id}.*.json")) if old != path])
+
+
+def remove_index(album_id: int) -> None:
+    """Usuwa indeksy CRC albumu (album usunięty)."""
+    file_reaper.remove_files(glob.glob(os.path.join(INDEX_DIR, f"{album_id}.*.json")))
+
+
+def build_album_archive(db: Session, album_id: int) -> AlbumArchive:
+    """Układ archiwum albumu z plików obecnych na dysku (brakujące oryginały są pomijane)."""
+    rows = db.execute(
+        select(Photo.title, Photo.image_url)
+        .where(Photo.album_id == album_id)
+        .order_by(Photo.position.asc(), Photo.id.asc())
+    ).all()
+    width = max(3, len(str(len(rows))))
+    members = []
+    for number, (title, image_url) in enumerate(rows, start=1):
+        path = file_reaper.url_to_path(image_url)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            logger.warning("Skipping missing file %s in album %s archive", path, album_id)
+            continue
+        members.append(ZipMember(
+            name=_member_name(number, width, title, image_url),
+            path=path,
+            size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+        ))
+
+    digest = hashlib.sha256()
+    for member in members:
+        digest.update(f"{member.name}\0{member.path}\0{member.size}\0{member.mtime!r}\n".encode("utf-8"))
+    version = digest.hexdigest()[:16]
+
+    crcs = load_index(album_id, version) if settings.ALBUM_ARCHIVE_INDEX_CACHE else None
+    archive = StoredZip(members, crcs)
+    return AlbumArchive(album_id=album_id, version=version, zip=archive, cached_index=archive.complete)
+
+
+def iter_album_archive(archive: AlbumArchive, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+    """
+    Bajty archiwum (lub zakresu) dla StreamingResponse. Po wysłaniu zapisuje indeks CRC,
+    jeśli go nie było, a pobranie pozwoliło poznać wszystkie CRC.
+    """
+    try:
+        yield from archive.zip.iter_bytes(start, end)
+    except Exception as e:
+        # Nagłówki już wysłane - klient dostanie przerwane pobieranie (i może je wznowić)
+        logger.warning("Album %s archive stream aborted: %s", archive.album_id, e)
+        raise
+    if settings.ALBUM_ARCHIVE_INDEX_CACHE and not archive.cached_index and archive.zip.complete:
+        try:
+            save_index(archive.album_id, archive.version, archive.zip.crcs)
+        except OSError as e:
+            logger.warning("Could not save archive index for album %s: %s", archive.album_id, e)
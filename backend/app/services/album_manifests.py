@@ -0,0 +1,150 @@
+# app/services/album_manifests.py
+"""
+Gotowe manifesty publicznych albumów jako statyczne pliki JSON.
+
+Manifest = metadane albumu + uporządkowana lista zdjęć (URL-e oryginału
+i miniatury, wymiary). Jest przebudowywany w tle po każdej zmianie albumu
+lub jego zdjęć i zapisywany w `uploads/manifests/albums/` w dwóch postaciach:
+
+- `{id}.{hash}.json` - niezmienny (hash treści w nazwie), cache na rok,
+- `{id}.json`        - "najnowszy", ta sama treść, cache z rewalidacją.
+
+nginx serwuje oba pliki bezpośrednio z wolumenu, więc publiczne strony
+albumów nie dotykają API. Albumy prywatne i usunięte nie mają manifestu.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_album
+from app.database import SessionLocal
+from app.models.photo import Photo
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DIR = os.path.join("uploads", "manifests", "albums")
+# Ile poprzednich wersji zostawiamy dla klientów, które pobrały jeszcze stary "najnowszy"
+KEEP_PREVIOUS_VERSIONS = 1
+
+_manifest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="album_manifest_")
+_scheduled: set[int] = set()
+_scheduled_lock = threading.Lock()
+
+
+def manifest_url(album_id: int, digest: str | None = None) -> str:
+    name = f"{album_id}.{digest}.json" if digest else f"{album_id}.json"
+    return "/" + "/".join([*MANIFEST_DIR.split(os.sep), name])
+
+
+def build_manifest(db: Session, album_id: int) -> dict | None:
+    """Buduje manifest albumu lub zwraca None, gdy album nie istnieje albo nie jest publiczny."""
+    db_album = crud_album.get_album(db, album_id=album_id)
+    if db_album is None or not db_album.is_public:
+        return None
+    # Tylko potrzebne kolumny - bez hydratacji obiektów ORM
+    rows = db.execute(
+        select(
+            Photo.id, Photo.title, Photo.description, Photo.image_url,
+            Photo.thumbnail_url, Photo.width, Photo.height,
+        )
+        .where(Photo.album_id == album_id)
+        .order_by(Photo.position.asc(), Photo.id.asc())
+    ).all()
+    return {
+        "album": {
+            "id": db_album.id,
+            "title": db_album.title,
+            "description": db_album.description,
+        },
+        "photos": [dict(row._mapping) for row in rows],
+    }
+
+
+def _write_atomic(path: str, body: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def _versions(album_id: int) -> list[str]:
+    return glob.glob(os.path.join(MANIFEST_DIR, f"{album_id}.*.json"))
+
+
+def write_manifest(album_id: int, manifest: dict) -> str:
+    """Zapisuje manifest (wersja z hashem + "najnowszy"). Zwraca URL wersji z hashem."""
+    body = json.dumps(manifest, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+
+    hashed_path = os.path.join(MANIFEST_DIR, f"{album_id}.{digest}.json")
+    if not os.path.exists(hashed_path):
+        _write_atomic(hashed_path, body)
+    _write_atomic(os.path.join(MANIFEST_DIR, f"{album_id}.json"), body)
+
+    # Sprzątanie starych wersji (najnowsze wg mtime zostają)
+    old_versions = sorted(
+        (path for path in _versions(album_id) if path != hashed_path),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for path in old_versions[KEEP_PREVIOUS_VERSIONS:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return manifest_url(album_id, digest)
+
+
+def remove_manifest(album_id: int) -> None:
+    """Usuwa wszystkie pliki manifestu albumu (album prywatny lub usunięty)."""
+    for path in [os.path.join(MANIFEST_DIR, f"{album_id}.json"), *_versions(album_id)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def rebuild_album_manifest(album_id: int) -> str | None:
+    """Przebudowuje (albo usuwa) manifest albumu. Zwraca URL wersji z hashem lub None."""
+    db = SessionLocal()
+    try:
+        manifest = build_manifest(db, album_id)
+    finally:
+        db.close()
+    if manifest is None:
+        remove_manifest(album_id)
+        return None
+    return write_manifest(album_id, manifest)
+
+
+def _rebuild_and_forget(album_id: int) -> None:
+    # Zdejmujemy album z listy PRZED budową - zmiany w trakcie budowy zlecą kolejną
+    with _scheduled_lock:
+        _scheduled.discard(album_id)
+    try:
+        rebuild_album_manifest(album_id)
+    except Exception as e:
+        logger.warning("Could not rebuild manifest for album %s: %s", album_id, e)
+
+
+def schedule_manifest_rebuild(*album_ids: int | None) -> None:
+    """
+    Zleca przebudowę manifestów w tle. Zlecenia dla albumu, który już czeka
+    w kolejce, są scalane - seria uploadów do jednego albumu to jedna przebudowa.
+    """
+    for album_id in album_ids:
+        if album_id is None:
+            continue
+        with _scheduled_lock:
+            if album_id in _scheduled:
+                continue
+            _scheduled.add(album_id)
+        _manifest_executor.submit(_rebuild_and_forget, album_id)
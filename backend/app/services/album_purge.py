@@ -0,0 +1,97 @@
+# app/services/album_purge.py
+"""
+Usuwanie albumu w tle.
+
+Endpoint tylko oznacza album (deleted_at) i od razu odpowiada. Zadanie w tle
+usuwa zdjęcia porcjami (jeden DELETE na paczkę), kasuje ich pliki, a na końcu
+usuwa wiersz albumu. Postęp jest odczytywany z bazy (liczba pozostałych zdjęć),
+więc jest widoczny z każdego procesu i przetrwa restart - niedokończone
+albumy są wznawiane przy starcie aplikacji.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+
+from app.crud import crud_album, crud_photo
+from app.database import SessionLocal
+from app.services import album_archive, file_reaper
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 200
+
+# Jeden wątek - usuwanie dużych albumów nie powinno konkurować z miniaturami o dysk
+_purge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="album_purge_")
+_scheduled: set[int] = set()
+_scheduled_lock = threading.Lock()
+
+
+def purge_album(album_id: int, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Usuwa zdjęcia (rekordy i pliki) oznaczonego albumu, a potem sam album. Zwraca liczbę zdjęć."""
+    db = SessionLocal()
+    removed = 0
+    try:
+        db_album = crud_album.get_album_including_deleted(db, album_id=album_id)
+        if db_album is None or db_album.deleted_at is None:
+            return 0
+        while True:
+            photo_ids = crud_photo.get_photo_ids_by_album(db, album_id=album_id, limit=batch_size)
+            if photo_ids:
+                deleted = crud_photo.bulk_delete_photos(db, photo_ids=photo_ids)
+                file_reaper.remove_files([
+                    file_reaper.url_to_path(url)
+                    for _, image_url, thumbnail_url in deleted
+                    for url in (image_url, thumbnail_url)
+                    if url
+                ])
+                removed += len(deleted)
+                continue
+            # Upload, który sprawdził album tuż przed oznaczeniem, mógł dodać zdjęcie
+            # po ostatniej paczce - album znika tylko wtedy, gdy w chwili DELETE jest pusty,
+            # inaczej usuwamy kolejną paczkę
+            try:
+                if crud_album.delete_album(db, album_id=album_id):
+                    break
+            except IntegrityError:
+                db.rollback()
+            if crud_album.get_album_including_deleted(db, album_id=album_id) is None:
+                break
+        album_archive.remove_index(album_id)
+        return removed
+    finally:
+        db.close()
+
+
+def _purge_and_forget(album_id: int) -> None:
+    try:
+        purge_album(album_id)
+    except Exception as e:
+        logger.warning("Could not purge album %s: %s", album_id, e)
+    finally:
+        with _scheduled_lock:
+            _scheduled.discard(album_id)
+
+
+def schedule_album_purge(album_id: int) -> None:
+    """Kolejkuje usunięcie albumu (ponowne zlecenie tego samego albumu jest ignorowane)."""
+    with _scheduled_lock:
+        if album_id in _scheduled:
+            return
+        _scheduled.add(album_id)
+    _purge_executor.submit(_purge_and_forget, album_id)
+
+
+def resume_pending_purges() -> None:
+    """Wznawia usuwanie albumów przerwane np. restartem serwera."""
+    db = SessionLocal()
+    try:
+        album_ids = crud_album.get_deleted_album_ids(db)
+    except Exception as e:
+        logger.warning("Could not resume album purges: %s", e)
+        return
+    finally:
+        db.close()
+    for album_id in album_ids:
+        schedule_album_purge(album_id)
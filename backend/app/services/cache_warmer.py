@@ -0,0 +1,145 @@
+# app/services/cache_warmer.py
+"""
+Rozgrzewanie cache po zmianach albumów i po wygenerowaniu miniatur.
+
+Zamiast czekać, aż pierwszy odwiedzający zapłaci za pusty cache, zadanie
+w tle (po uploadzie, utworzeniu/edycji albumu i przełączeniu is_public):
+
+1. uzupełnia brakujące i nieaktualne miniatury zdjęć albumu (tylko przy publikacji albumu),
+2. przebudowuje manifest albumu,
+3. odświeża odpowiedzi API z cache (lista albumów i album - tak, jak widzi je
+   niezalogowany gość) - przez wywołanie aplikacji ASGI w procesie, więc klucze
+   i treść wpisów są dokładnie takie jak przy prawdziwym żądaniu.
+
+Zadania działają w jednym wątku o obniżonym priorytecie (nice) i są scalane:
+seria uploadów do albumu to jedno rozgrzanie po krótkiej przerwie.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.response_cache import REFRESH_SCOPE_KEY
+from app.crud import crud_album, crud_photo
+from app.database import SessionLocal
+from app.services import album_manifests
+from app.services.renditions import THUMBNAIL
+
+logger = logging.getLogger(__name__)
+
+# Przerwa przed rozgrzaniem - kolejne zmiany w tym czasie są scalane
+WARMUP_DELAY_SECONDS = 2.0
+# O ile obniżamy priorytet wątku (nice) - żywy ruch ma pierwszeństwo
+WARMUP_NICENESS = 10
+WARMUP_REQUEST_TIMEOUT = 10.0
+
+
+def _lower_priority() -> None:
+    # Linux pozwala ustawić nice pojedynczego wątku (PRIO_PROCESS + id wątku)
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), WARMUP_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+_warmup_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="cache_warmer_", initializer=_lower_priority
+)
+_scheduled: dict[int, bool] = {}
+_scheduled_lock = threading.Lock()
+
+# Aplikacja i pętla zdarzeń, w której działa cache (ustawiane przy starcie aplikacji)
+_app = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def bind(app, loop: asyncio.AbstractEventLoop) -> None:
+    """Podpina aplikację ASGI i jej pętlę - bez tego odpowiedzi API nie są rozgrzewane."""
+    global _app, _loop
+    _app, _loop = app, loop
+
+
+async def _prime(path: str) -> int:
+    """Wywołuje GET w procesie z REFRESH_SCOPE_KEY w scope - response_cache zapisuje świeży wpis."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"cache-warmer")],
+        "client": ("127.0.0.1", 0), "server": ("cache-warmer", 80),
+        REFRESH_SCOPE_KEY: True,
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await _app(scope, receive, send)
+    return status
+
+
+def _prime_api_responses(album_id: int) -> None:
+    if _app is None or _loop is None or _loop.is_closed():
+        return
+    for path in ("/api/v1/albums/", f"/api/v1/albums/{album_id}"):
+        future = asyncio.run_coroutine_threadsafe(_prime(path), _loop)
+        future.result(timeout=WARMUP_REQUEST_TIMEOUT)
+
+
+def warm_album(album_id: int, renditions: bool = False) -> None:
+    """Rozgrzewa album: (opcjonalnie) brakujące/nieaktualne miniatury, manifest i odpowiedzi API."""
+    # Import tutaj - thumbnails zleca rozgrzewanie po wygenerowaniu miniatury
+    from app.services import thumbnails
+
+    db = SessionLocal()
+    try:
+        db_album = crud_album.get_album(db, album_id=album_id)
+        is_public = db_album is not None and db_album.is_public
+        missing = (
+            crud_photo.get_photos_needing_thumbnail(db, album_id=album_id, profile_keys=THUMBNAIL.current_keys)
+            if renditions and is_public else []
+        )
+    finally:
+        db.close()
+
+    for photo_id, image_url in missing:
+        file_path = image_url.lstrip("/")
+        if os.path.exists(file_path):
+            thumbnails.schedule_thumbnail(file_path, photo_id, album_id)
+
+    # Manifest albumu prywatnego/usuniętego jest usuwany - to też trzeba zrobić
+    album_manifests.rebuild_album_manifest(album_id)
+    # Lista albumów zmienia się także wtedy, gdy album przestał być publiczny
+    _prime_api_responses(album_id)
+
+
+def _warm_and_forget(album_id: int) -> None:
+    time.sleep(WARMUP_DELAY_SECONDS)
+    with _scheduled_lock:
+        renditions = _scheduled.pop(album_id, False)
+    try:
+        warm_album(album_id, renditions=renditions)
+    except Exception as e:
+        logger.warning("Could not warm cache for album %s: %s", album_id, e)
+
+
+def schedule_album_warmup(album_id: int | None, renditions: bool = False) -> None:
+    """
+    Zleca rozgrzanie albumu w tle. renditions=True dodatkowo uzupełnia brakujące
+    miniatury (przy publikacji albumu; po zadaniu miniatury nie - błąd generowania
+    nie może zapętlić rozgrzewania).
+    """
+    if album_id is None:
+        return
+    with _scheduled_lock:
+        if album_id in _scheduled:
+            _scheduled[album_id] = _scheduled[album_id] or renditions
+            return
+        _scheduled[album_id] = renditions
+    _warmup_executor.submit(_warm_and_forget, album_id)
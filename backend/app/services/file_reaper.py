@@ -0,0 +1,47 @@
+# app/services/file_reaper.py
+"""
+Usuwanie plików zdjęć w tle.
+
+Endpointy usuwające wiele zdjęć naraz nie czekają na operacje dyskowe -
+oddają listę URL-i do jednego wątku, który usuwa pliki sekwencyjnie.
+"""
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Jeden wątek wystarczy - usuwanie plików jest tanie, a nie chcemy konkurować
+# z generowaniem miniatur o dysk na małych instancjach
+_reaper_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file_reaper_")
+
+
+def url_to_path(url: str) -> str:
+    """Zamienia URL zapisany w bazie (np. '/uploads/a.jpg') na ścieżkę względną."""
+    return url.lstrip("/")
+
+
+def remove_files(paths: list[str]) -> int:
+    """Usuwa pliki synchronicznie (dla zadań, które już działają w tle). Zwraca liczbę usuniętych."""
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not delete file %s: %s", path, e)
+    return removed
+
+
+def schedule_removal(urls: Iterable[str | None]) -> Future | None:
+    """
+    Kolejkuje usunięcie plików wskazanych przez URL-e (None są pomijane).
+    Zwraca Future z liczbą usuniętych plików albo None, gdy nie ma nic do zrobienia.
+    """
+    paths = [url_to_path(url) for url in urls if url]
+    if not paths:
+        return None
+    return _reaper_executor.submit(remove_files, paths)
@@ -0,0 +1,146 @@
+# app/services/media_storage.py
+"""
+Rozmieszczenie plików zdjęć według widoczności albumu.
+
+- Albumy publiczne: `uploads/` (oryginały) i `uploads/thumbnails/` - pliki serwowane
+  statycznie pod /uploads z rocznym cache.
+- Albumy prywatne: `uploads/private/` (i `uploads/private/thumbnails/`). Tego drzewa
+  nie serwuje publiczne /uploads ani backendu, ani nginx - pliki są dostępne tylko
+  przez podpisane URL-e /media/ i autoryzowane /api/v1/photos/{id}/image. Sam podpis
+  nic by nie dawał, gdyby ten sam plik był osiągalny pod /uploads bez podpisu.
+
+Zmiana widoczności albumu albo przeniesienie do niego zdjęć przenosi pliki do
+właściwego drzewa (os.rename - ten sam wolumen, bez kopiowania) i aktualizuje URL-e
+w bazie. Przy starcie aplikacji w tle porządkowane są albumy, których pliki leżą
+w niewłaściwym drzewie (np. albumy prywatne sprzed tego podziału).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.uploads import PRIVATE_DIR
+from app.crud import crud_album, crud_photo
+from app.database import SessionLocal
+from app.services import album_manifests, file_reaper
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROOT = "uploads"
+PRIVATE_UPLOAD_DIR = os.path.join(UPLOAD_ROOT, PRIVATE_DIR)
+UPLOADS_URL_PREFIX = "/uploads/"
+PRIVATE_URL_PREFIX = f"{UPLOADS_URL_PREFIX}{PRIVATE_DIR}/"
+# Ile zdjęć przenosimy przed zapisem ich URL-i w bazie
+MOVE_BATCH_SIZE = 200
+
+_startup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media_storage_")
+# Przenosiny plików jednego albumu naraz (żądanie i porządki przy starcie); bierze ją
+# też optymalizator miniatur przy podmianie szkicu, żeby nie zapisać pliku w starym drzewie
+move_lock = threading.Lock()
+
+
+def upload_dir(is_public: bool) -> str:
+    """Katalog oryginałów dla albumu o danej widoczności."""
+    return UPLOAD_ROOT if is_public else PRIVATE_UPLOAD_DIR
+
+
+def relocated_url(url: str, is_public: bool) -> str:
+    """URL pliku w drzewie zgodnym z widocznością albumu (np. /uploads/a.jpg <-> /uploads/private/a.jpg)."""
+    if not url.startswith(UPLOADS_URL_PREFIX):
+        return url
+    if is_public and url.startswith(PRIVATE_URL_PREFIX):
+        return UPLOADS_URL_PREFIX + url[len(PRIVATE_URL_PREFIX):]
+    if not is_public and not url.startswith(PRIVATE_URL_PREFIX):
+        return PRIVATE_URL_PREFIX + url[len(UPLOADS_URL_PREFIX):]
+    return url
+
+
+def _move_file(url: str, new_url: str, moved: list[tuple[str, str]]) -> bool:
+    source, target = file_reaper.url_to_path(url), file_reaper.url_to_path(new_url)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.rename(source, target)
+    except FileNotFoundError:
+        # Przerwane wcześniejsze przenosiny (plik już na miejscu) albo brak pliku -
+        # rekord i tak ma wskazywać właściwe drzewo
+        if not os.path.exists(target):
+            logger.warning("Missing file %s while moving it to %s", source, target)
+        return True
+    except OSError as e:
+        logger.warning("Could not move %s to %s: %s", source, target, e)
+        return False
+    moved.append((source, target))
+    return True
+
+
+def _undo_moves(moved: list[tuple[str, str]]) -> None:
+    for source, target in reversed(moved):
+        try:
+            os.rename(target, source)
+        except OSError as e:
+            logger.warning("Could not move %s back to %s: %s", target, source, e)
+
+
+def sync_album_storage(album_id: int) -> int:
+    """
+    Przenosi pliki zdjęć albumu do drzewa zgodnego z jego widocznością i zapisuje
+    nowe URL-e. Zwraca liczbę zdjęć, których pliki przeniesiono.
+    """
+    with move_lock:
+        db = SessionLocal()
+        try:
+            db_album = crud_album.get_album(db, album_id=album_id)
+            if db_album is None:
+                return 0
+            is_public = db_album.is_public
+            rows = crud_photo.get_photo_files_by_album(db, album_id=album_id)
+            db.rollback()
+
+            updated = 0
+            for start in range(0, len(rows), MOVE_BATCH_SIZE):
+                updates = []
+                moved: list[tuple[str, str]] = []
+                for photo_id, image_url, thumbnail_url in rows[start:start + MOVE_BATCH_SIZE]:
+                    values = {}
+                    for column, url in (("image_url", image_url), ("thumbnail_url", thumbnail_url)):
+                        new_url = relocated_url(url, is_public) if url else url
+                        if new_url != url and _move_file(url, new_url, moved):
+                            values[column] = new_url
+                    if values:
+                        updates.append({"id": photo_id, **values})
+                try:
+                    crud_photo.bulk_update_photos_by_id(db, updates)
+                except Exception:
+                    # Bez nowych URL-i w bazie pliki muszą wrócić tam, gdzie wskazują rekordy
+                    db.rollback()
+                    _undo_moves(moved)
+                    raise
+                updated += len(updates)
+            return updated
+        finally:
+            db.close()
+
+
+def _sync_misplaced_albums() -> None:
+    db = SessionLocal()
+    try:
+        album_ids = crud_photo.get_album_ids_with_misplaced_files(db, PRIVATE_URL_PREFIX)
+    except Exception as e:
+        logger.warning("Could not look up misplaced album files: %s", e)
+        return
+    finally:
+        db.close()
+    for album_id in album_ids:
+        try:
+            moved = sync_album_storage(album_id)
+        except Exception as e:
+            logger.warning("Could not move files of album %s: %s", album_id, e)
+            continue
+        logger.info("Moved files of %s photos in album %s", moved, album_id, extra={"event": "media.moved"})
+        # Manifest albumu publicznego zawiera URL-e plików
+        album_manifests.schedule_manifest_rebuild(album_id)
+
+
+def schedule_storage_sync() -> None:
+    """Przy starcie: w tle przenosi pliki albumów ułożone niezgodnie z ich widocznością."""
+    _startup_executor.submit(_sync_misplaced_albums)
@@ -0,0 +1,270 @@
+# app/services/notifications.py
+"""
+Powiadomienia e-mail o rezerwacjach.
+
+Przepływ:
+1. CRUD rezerwacji dodaje wiadomości do tabeli `booking_notifications` (outbox)
+   w tej samej transakcji co zmiana rezerwacji - request nie dotyka SMTP.
+2. Hook `after_commit` na SessionLocal budzi worker, gdy w transakcji
+   pojawiły się nowe wiadomości.
+3. Worker (osobny wątek) pobiera paczki wiadomości, wysyła je jednym
+   połączeniem SMTP i ponawia nieudane próby z wykładniczym backoffem.
+"""
+import logging
+import smtplib
+import threading
+from email.message import EmailMessage
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_notification
+from app.database import SessionLocal
+from app.models.booking import Booking
+from app.models.notification import NotificationKind
+
+logger = logging.getLogger(__name__)
+
+# Klucz w session.info oznaczający, że transakcja dodała wiadomości do outboxa
+_PENDING_KEY = "booking_notifications_pending"
+
+
+class SMTPTransport:
+    """
+    Transport SMTP używany jako context manager: jedno połączenie na całą paczkę
+    wiadomości zamiast łączenia się osobno dla każdego maila.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._smtp: smtplib.SMTP | None = None
+
+    def __enter__(self) -> "SMTPTransport":
+        self._smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            self._smtp.starttls()
+        if self.username:
+            self._smtp.login(self.username, self.password or "")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (OSError, smtplib.SMTPException):
+            self._smtp.close()
+        finally:
+            self._smtp = None
+
+    def send(self, recipient: str, subject: str, body: str) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = recipient
+        msg["Subject"] = subject
+        msg.set_content(body)
+        self._smtp.send_message(msg)
+
+
+def smtp_transport_from_settings() -> SMTPTransport:
+    return SMTPTransport(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        sender=settings.MAIL_FROM,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT,
+    )
+
+
+# --- Treść wiadomości ---
+
+def _booking_summary(booking: Booking) -> str:
+    return (
+        f"Usługa: {booking.service_name}\n"
+        f"Termin: {booking.booking_date:%Y-%m-%d %H:%M}\n"
+        f"Klient: {booking.client_name} <{booking.client_email}>\n"
+        f"Telefon: {booking.client_phone or '-'}\n"
+        f"Uwagi: {booking.notes or '-'}\n"
+    )
+
+
+def queue_booking_created(db: Session, booking: Booking) -> None:
+    """
+    Dodaje do outboxa potwierdzenie dla klienta i (jeśli skonfigurowano)
+    powiadomienie dla fotografa. Rezerwacja musi mieć już nadane ID (flush).
+    """
+    summary = _booking_summary(booking)
+    crud_notification.add_notification(
+        db,
+        kind=NotificationKind.BOOKING_CREATED,
+        recipient=booking.client_email,
+        subject="Otrzymaliśmy Twoje zgłoszenie rezerwacji",
+        body=(
+            f"Dzień dobry {booking.client_name},\n\n"
+            "dziękujemy za zgłoszenie. Potwierdzimy termin najszybciej, jak to możliwe.\n\n"
+            f"{summary}"
+        ),
+        booking_id=booking.id,
+    )
+    if settings.PHOTOGRAPHER_EMAIL:
+        crud_notification.add_notification(
+            db,
+            kind=NotificationKind.BOOKING_CREATED,
+            recipient=settings.PHOTOGRAPHER_EMAIL,
+            subject=f"Nowa rezerwacja #{booking.id}: {booking.service_name}",
+            body=summary,
+            booking_id=booking.id,
+        )
+    db.info[_PENDING_KEY] = True
+
+
+def queue_booking_status_changed(db: Session, booking: Booking) -> None:
+    """Dodaje do outboxa informację dla klienta o zmianie statusu rezerwacji."""
+    crud_notification.add_notification(
+        db,
+        kind=NotificationKind.BOOKING_STATUS_CHANGED,
+        recipient=booking.client_email,
+        subject=f"Status rezerwacji: {booking.status.value}",
+        body=(
+            f"Dzień dobry {booking.client_name},\n\n"
+            f"status Twojej rezerwacji zmienił się na: {booking.status.value}.\n\n"
+            f"{_booking_summary(booking)}"
+        ),
+        booking_id=booking.id,
+    )
+    db.info[_PENDING_KEY] = True
+
+
+# --- Worker ---
+
+class NotificationDispatcher:
+    """
+    Wątek wysyłający wiadomości z outboxa paczkami.
+    Budzony po commicie (wake) lub co `poll_interval` sekund - ten drugi tryb
+    obsługuje ponowienia i wiadomości dodane przez inne procesy.
+    """
+
+    def __init__(
+        self,
+        transport_factory=smtp_transport_from_settings,
+        session_factory=SessionLocal,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        poll_interval: float = 5.0,
+    ):
+        self.transport_factory = transport_factory
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                # Pełna paczka = prawdopodobnie jest więcej, opróżniamy kolejkę od razu
+                while not self._stopping.is_set() and self.process_batch() == self.batch_size:
+                    pass
+            except Exception as e:
+                logger.warning("Notification dispatcher error: %s", e)
+
+    def process_batch(self) -> int:
+        """Wysyła jedną paczkę wiadomości. Zwraca liczbę przetworzonych rekordów."""
+        db = self.session_factory()
+        try:
+            batch = crud_notification.claim_pending(db, limit=self.batch_size)
+            if not batch:
+                db.rollback()
+                return 0
+
+            pending = list(batch)
+            try:
+                with self.transport_factory() as transport:
+                    while pending:
+                        notification = pending[0]
+                        try:
+                            transport.send(notification.recipient, notification.subject, notification.body)
+                        except smtplib.SMTPRecipientsRefused as e:
+                            # Błąd dotyczy tylko tego adresata - reszta paczki idzie dalej
+                            crud_notification.mark_failed(db, notification, repr(e), self.max_attempts)
+                        except smtplib.SMTPResponseException as e:
+                            # Serwer odrzucił tę wiadomość (nadawca, treść) - połączenie działa,
+                            # więc reszta paczki idzie dalej. 421 = serwer zamyka połączenie.
+                            if e.smtp_code == 421:
+                                raise
+                            crud_notification.mark_failed(db, notification, repr(e), self.max_attempts)
+                        else:
+                            crud_notification.mark_sent(db, notification)
+                        pending.pop(0)
+            except (OSError, smtplib.SMTPException) as e:
+                # Brak połączenia / zerwane połączenie / nieudane logowanie - ponawiamy
+                # całą resztę paczki (błędy pojedynczych wiadomości obsłużono wyżej)
+                for notification in pending:
+                    crud_notification.mark_failed(db, notification, repr(e), self.max_attempts)
+
+            db.commit()
+            return len(batch)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+dispatcher = NotificationDispatcher(
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+    poll_interval=settings.NOTIFICATION_POLL_INTERVAL,
+)
+
+
+# --- Hook po commicie ---
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_dispatcher_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        dispatcher.wake()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_pending_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,214 @@
+# app/services/orphan_gc.py
+"""
+Sprzątanie osieroconych plików i wiszących rekordów zdjęć.
+
+Dwa niezależne przebiegi, oba paczkami i bez ładowania całości do pamięci:
+1. Pliki: drzewo `uploads/` jest przeglądane przez os.scandir, pliki zbierane
+   w posortowane paczki, a dla każdej paczki jedno zapytanie sprawdza, które
+   ścieżki są wskazywane przez kolumny z `FILE_COLUMNS`. Reszta to sieroty.
+2. Rekordy: tabela `photos` jest czytana stronicowaniem po kluczu (id > ostatnie),
+   a rekordy bez pliku oryginału są usuwane (brakujące miniatury - zerowane).
+
+Świeże pliki (młodsze niż `grace_seconds`) są pomijane, żeby nie usunąć
+uploadu w trakcie zapisu ani miniatury, której URL nie trafił jeszcze do bazy.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app.crud import crud_photo
+from app.database import SessionLocal
+from app.models.photo import Photo
+from app.schemas.maintenance import OrphanScanReport, OrphanScanStatus
+from app.services import album_manifests, file_reaper
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROOT = "uploads"
+# Katalogi z plikami generowanymi, niezwiązanymi z rekordami zdjęć
+EXCLUDED_DIRS = (os.path.dirname(album_manifests.MANIFEST_DIR),)
+
+# Kolumny przechowujące URL-e plików - plik wskazany przez którąkolwiek nie jest sierotą
+FILE_COLUMNS = (Photo.image_url, Photo.thumbnail_url)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_GRACE_SECONDS = 3600
+# Ile elementów list trafia do raportu (liczniki są pełne)
+REPORT_SAMPLE = 200
+# Jeśli brakuje plików dla większej części zdjęć, to raczej nie podpięty wolumen
+# niż prawdziwe sieroty - wtedy nie usuwamy rekordów
+MAX_DANGLING_RATIO = 0.5
+
+
+def _path_to_url(path: str) -> str:
+    return "/" + path.replace(os.sep, "/")
+
+
+def _iter_file_batches(root: str, batch_size: int, cutoff: float) -> Iterator[list[tuple[str, int]]]:
+    """Zwraca posortowane paczki (ścieżka, rozmiar) plików starszych niż `cutoff`."""
+    batch: list[tuple[str, int]] = []
+    pending_dirs = [root]
+    while pending_dirs:
+        directory = pending_dirs.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.normpath(entry.path) not in EXCLUDED_DIRS:
+                        pending_dirs.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    continue
+                batch.append((entry.path, stat.st_size))
+                if len(batch) >= batch_size:
+                    yield sorted(batch)
+                    batch = []
+    if batch:
+        yield sorted(batch)
+
+
+def _is_empty_dir(path: str) -> bool:
+    with os.scandir(path) as entries:
+        return next(entries, None) is None
+
+
+def _referenced_urls(db: Session, urls: list[str]) -> set[str]:
+    stmt = union_all(*(select(column.label("url")).where(column.in_(urls)) for column in FILE_COLUMNS))
+    return set(db.execute(stmt).scalars())
+
+
+def _scan_files(db: Session, report: OrphanScanReport, root: str, batch_size: int, cutoff: float) -> None:
+    for batch in _iter_file_batches(root, batch_size, cutoff):
+        report.scanned_files += len(batch)
+        referenced = _referenced_urls(db, [_path_to_url(path) for path, _ in batch])
+        orphans = [(path, size) for path, size in batch if _path_to_url(path) not in referenced]
+        if not orphans:
+            continue
+        report.orphaned_files_count += len(orphans)
+        report.orphaned_bytes += sum(size for _, size in orphans)
+        room = REPORT_SAMPLE - len(report.orphaned_files)
+        report.orphaned_files.extend(path for path, _ in orphans[:max(room, 0)])
+        if not report.dry_run:
+            report.removed_files += file_reaper.remove_files([path for path, _ in orphans])
+
+
+def _scan_photos(db: Session, report: OrphanScanReport, batch_size: int) -> tuple[list[int], list[int]]:
+    """Zwraca (ID zdjęć bez oryginału, ID zdjęć z brakującą miniaturą)."""
+    dangling: list[int] = []
+    missing_thumbnails: list[int] = []
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Photo.id, Photo.image_url, Photo.thumbnail_url)
+            .where(Photo.id > last_id)
+            .order_by(Photo.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        report.scanned_photos += len(rows)
+        for photo_id, image_url, thumbnail_url in rows:
+            if not os.path.exists(file_reaper.url_to_path(image_url)):
+                dangling.append(photo_id)
+            elif thumbnail_url and not os.path.exists(file_reaper.url_to_path(thumbnail_url)):
+                missing_thumbnails.append(photo_id)
+    return dangling, missing_thumbnails
+
+
+def run_orphan_scan(
+    dry_run: bool = True,
+    root: str = UPLOAD_ROOT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    grace_seconds: int = DEFAULT_GRACE_SECONDS,
+) -> OrphanScanReport:
+    """Przegląda pliki i rekordy; przy dry_run=False usuwa sieroty. Zwraca raport."""
+    report = OrphanScanReport(dry_run=dry_run)
+    if not os.path.isdir(root) or _is_empty_dir(root):
+        report.aborted_reason = f"Katalog {root} nie istnieje lub jest pusty"
+        return report
+
+    db = SessionLocal()
+    try:
+        _scan_files(db, report, root, batch_size, cutoff=time.time() - grace_seconds)
+        db.rollback()  # Zamykamy transakcję tylko-do-odczytu przed długim przebiegiem
+
+        dangling, missing_thumbnails = _scan_photos(db, report, batch_size)
+        report.dangling_photos_count = len(dangling)
+        report.dangling_photo_ids = dangling[:REPORT_SAMPLE]
+        report.missing_thumbnails_count = len(missing_thumbnails)
+        report.missing_thumbnail_ids = missing_thumbnails[:REPORT_SAMPLE]
+
+        if report.dry_run:
+            return report
+        if report.scanned_photos and len(dangling) / report.scanned_photos > MAX_DANGLING_RATIO:
+            report.aborted_reason = (
+                f"Brak plików dla {len(dangling)} z {report.scanned_photos} zdjęć - "
+                "rekordy nie zostały usunięte (sprawdź wolumen uploads)"
+            )
+            return report
+
+        for start in range(0, len(dangling), batch_size):
+            deleted = crud_photo.bulk_delete_photos(db, dangling[start:start + batch_size])
+            # Oryginału już nie ma, ale miniatura mogła zostać
+            report.removed_files += file_reaper.remove_files(
+                [file_reaper.url_to_path(thumb) for _, _, thumb in deleted if thumb]
+            )
+        for start in range(0, len(missing_thumbnails), batch_size):
+            crud_photo.bulk_update_photos(
+                db, missing_thumbnails[start:start + batch_size], {"thumbnail_url": None}
+            )
+        return report
+    finally:
+        db.close()
+
+
+# --- Uruchamianie w tle (jedno zadanie naraz na proces) ---
+
+_gc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="orphan_gc_")
+_state_lock = threading.Lock()
+_state = OrphanScanStatus(status="idle")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _run_in_background(dry_run: bool) -> None:
+    global _state
+    try:
+        report = run_orphan_scan(dry_run=dry_run)
+        with _state_lock:
+            _state = _state.model_copy(update={"status": "finished", "finished_at": _utcnow(), "report": report})
+    except Exception as e:
+        logger.warning("Orphan scan failed: %s", e)
+        with _state_lock:
+            _state = _state.model_copy(update={"status": "failed", "finished_at": _utcnow(), "error": str(e)})
+
+
+def start_orphan_scan(dry_run: bool = True) -> tuple[bool, OrphanScanStatus]:
+    """Zleca przegląd w tle. Zwraca (czy_uruchomiono, aktualny_stan)."""
+    global _state
+    with _state_lock:
+        if _state.status == "running":
+            return False, _state
+        _state = OrphanScanStatus(status="running", started_at=_utcnow())
+        current = _state
+    _gc_executor.submit(_run_in_background, dry_run)
+    return True, current
+
+
+def get_orphan_scan_status() -> OrphanScanStatus:
+    with _state_lock:
+        return _state
@@ -0,0 +1,101 @@
+# app/services/photo_events.py
+"""
+Zdarzenia przetwarzania zdjęć (queued -> rendering -> done/failed) przez Redis pub/sub.
+
+Worker miniatur publikuje zdarzenia synchronicznym klientem (działa w wątku),
+a endpoint SSE subskrybuje kanał albumu klientem asynchronicznym i przekazuje
+zdarzenia do przeglądarki. Dzięki temu dashboard nie musi odpytywać listy zdjęć.
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statusy zdarzeń
+QUEUED = "queued"
+RENDERING = "rendering"
+DONE = "done"
+FAILED = "failed"
+
+# Co ile sekund wysyłamy komentarz ":ping", żeby proxy nie zamknęło połączenia
+SSE_HEARTBEAT_SECONDS = 15.0
+
+_publisher: redis.Redis | None = None
+_publisher_lock = threading.Lock()
+
+
+def album_channel(album_id: int) -> str:
+    return f"photo-events:album:{album_id}"
+
+
+def _get_publisher() -> redis.Redis:
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                # Krótkie timeouty - publikacja zdarzenia nie może blokować workera miniatur
+                _publisher = redis.Redis.from_url(
+                    settings.REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0
+                )
+    return _publisher
+
+
+def publish_photo_event(
+    album_id: int,
+    photo_id: int,
+    status: str,
+    thumbnail_url: str | None = None,
+) -> None:
+    """
+    Publikuje zdarzenie dla zdjęcia. Błędy Redisa są tylko logowane -
+    zdarzenia są "best effort", źródłem prawdy pozostaje baza danych.
+    """
+    payload = {"photo_id": photo_id, "album_id": album_id, "status": status}
+    if thumbnail_url is not None:
+        payload["thumbnail_url"] = thumbnail_url
+    try:
+        _get_publisher().publish(album_channel(album_id), json.dumps(payload))
+    except redis.RedisError as e:
+        logger.warning("Could not publish photo event for photo %s: %s", photo_id, e)
+
+
+async def stream_album_events(album_id: int, is_disconnected) -> AsyncIterator[str]:
+    """
+    Generator ramek SSE dla kanału albumu. Kończy się, gdy klient się rozłączy
+    (`is_disconnected` to np. `request.is_disconnected`).
+    """
+    client = aioredis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(album_channel(album_id))
+        # Podpowiedź dla EventSource, po jakim czasie wznowić połączenie
+        yield "retry: 3000\n\n"
+        while not await is_disconnected():
+            message = await pubsub.get_message(timeout=SSE_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": ping\n\n"
+                continue
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            event = json.loads(data)
+            yield f"event: {event['status']}\ndata: {data}\n\n"
+    except asyncio.CancelledError:
+        raise
+    except aioredis.RedisError as e:
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    finally:
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+        except aioredis.RedisError:
+            pass
@@ -0,0 +1,41 @@
+# app/services/photo_ordering.py
+"""
+Przenumerowanie pozycji zdjęć w tle.
+
+Przeniesienie zdjęcia zmienia tylko jego wiersz (średnia pozycji sąsiadów).
+Po wielu przeniesieniach w to samo miejsce odstępy maleją - wtedy album jest
+przenumerowywany jednym zapytaniem, ale poza requestem i najwyżej raz naraz.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.crud import crud_photo
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_rebalance_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="photo_rebalance_")
+_scheduled: set[int] = set()
+_scheduled_lock = threading.Lock()
+
+
+def _rebalance(album_id: int) -> None:
+    db = SessionLocal()
+    try:
+        crud_photo.rebalance_album_positions(db, album_id=album_id)
+    except Exception as e:
+        logger.warning("Could not rebalance photo positions in album %s: %s", album_id, e)
+    finally:
+        db.close()
+        with _scheduled_lock:
+            _scheduled.discard(album_id)
+
+
+def schedule_rebalance(album_id: int) -> None:
+    """Kolejkuje przenumerowanie albumu (jeśli nie jest już zlecone)."""
+    with _scheduled_lock:
+        if album_id in _scheduled:
+            return
+        _scheduled.add(album_id)
+    _rebalance_executor.submit(_rebalance, album_id)
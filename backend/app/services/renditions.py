@@ -0,0 +1,76 @@
+# app/services/renditions.py
+"""
+Profile wariantów zdjęć (renditions) - na razie jeden: miniatura.
+
+Profil to nazwany zestaw parametrów z numerem wersji. Jego klucz
+(`<nazwa>-v<wersja>-<skrót parametrów>`) jest częścią nazwy pliku i jest zapisywany
+przy zdjęciu (`photos.thumbnail_profile`), dzięki czemu:
+- zmiana parametrów daje nowe URL-e - roczny nagłówek `immutable` nie zatrzymuje
+  w przeglądarkach starych miniatur, a stare i nowe pliki nigdy się nie mieszają;
+- miniatury z innym kluczem są rozpoznawane jako nieaktualne i odświeżane leniwie
+  (thumbnails.refresh_stale_thumbnails) albo hurtem (regenerate_thumbnails.py).
+
+Skrót obejmuje parametry, od których zależy wynik; wersję podbijamy przy zmianie
+samego kodu generowania (np. inny filtr skalowania), której parametry nie opisują.
+
+Szybkość kodowania: z `fast_webp_method` miniatura jest najpierw kodowana szybkim
+ustawieniem (wpis szkicowy - klucz z sufiksem DRAFT_SUFFIX), a docelową kompresję
+(`webp_method`) dostaje później, gdy kolejka miniatur jest bezczynna
+(app/services/thumbnail_optimizer.py). Szkic ma własną nazwę pliku (DRAFT_FILE_SUFFIX) -
+docelowa miniatura dostaje nowy URL, więc przeglądarki nie trzymają szkicu pod
+rocznym `immutable`.
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+
+DRAFT_SUFFIX = "+draft"
+# Część nazwy pliku szkicu (a.jpg.thumbnail-v1-1a2b3c4d.draft.webp)
+DRAFT_FILE_SUFFIX = ".draft"
+# Pola, które nie zmieniają docelowego pliku - nie wchodzą do skrótu
+_UNHASHED_FIELDS = ("name", "version", "fast_webp_method")
+
+
+@dataclass(frozen=True)
+class RenditionProfile:
+    name: str
+    version: int
+    max_size: int
+    webp_quality: int
+    # Metoda enkodera WebP 0-6 (6 = najmniejsze pliki, najwolniej)
+    webp_method: int
+    # Szybsza metoda dla pierwszego kodowania (None = od razu webp_method)
+    fast_webp_method: int | None = None
+    # Kolory PNG, gdy WebP zawiedzie dla obrazu z przezroczystością
+    png_colors: int = 256
+
+    @property
+    def params_hash(self) -> str:
+        params = {key: value for key, value in asdict(self).items() if key not in _UNHASHED_FIELDS}
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}-v{self.version}-{self.params_hash}"
+
+    @property
+    def draft_key(self) -> str:
+        """Klucz miniatury zakodowanej szybko, czekającej na docelową kompresję."""
+        return f"{self.key}{DRAFT_SUFFIX}"
+
+    @property
+    def current_keys(self) -> tuple[str, ...]:
+        """Klucze miniatur, które nie są nieaktualne (szkic dostanie kompresję bez regeneracji)."""
+        return (self.key, self.draft_key)
+
+
+PROFILES = {
+    profile.name: profile
+    for profile in (
+        # 400 px, WebP quality 55 / method 6 - małe pliki dla galerii; method 2 przy uploadzie
+        # koduje kilka razy szybciej przy podobnym rozmiarze (benchmarks/bench_thumbnails.py)
+        RenditionProfile("thumbnail", version=1, max_size=400, webp_quality=55, webp_method=6, fast_webp_method=2),
+    )
+}
+
+THUMBNAIL = PROFILES["thumbnail"]
@@ -0,0 +1,140 @@
+# app/services/thumbnail_optimizer.py
+"""
+Odroczona kompresja miniatur.
+
+Przy uploadzie miniatura jest kodowana szybkim ustawieniem profilu
+(`fast_webp_method`) - pojawia się szybciej, a seria uploadów nie zajmuje CPU
+najwolniejszym enkoderem. Takie miniatury mają w `photos.thumbnail_profile`
+klucz szkicu (`profile.draft_key`) i własną nazwę pliku. Ten moduł, gdy kolejka
+miniatur jest bezczynna, koduje je ponownie z oryginału z docelową kompresją
+(`webp_method`) do pliku docelowej miniatury i przepina na niego rekord - nowy URL,
+więc przeglądarki nie zostają przy szkicu zapisanym pod rocznym `immutable`.
+
+Przebieg działa w jednym wątku o obniżonym priorytecie; nowe zadanie miniatury
+wstrzymuje go do kolejnej bezczynności. Przy starcie aplikacji przebieg jest
+zlecany ponownie, więc szkice sprzed restartu też zostaną skompresowane.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.crud import crud_photo
+from app.database import SessionLocal
+from app.services import cache_warmer, file_reaper
+from app.services.renditions import THUMBNAIL, RenditionProfile
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+# Jak często sprawdzamy, czy kolejka miniatur jest już bezczynna
+IDLE_POLL_SECONDS = 1.0
+OPTIMIZER_NICENESS = 10
+
+
+def _lower_priority() -> None:
+    # Linux pozwala ustawić nice pojedynczego wątku (PRIO_PROCESS + id wątku)
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), OPTIMIZER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+_optimizer_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="thumbnail_optimizer_", initializer=_lower_priority
+)
+_scheduled = False
+_scheduled_lock = threading.Lock()
+
+
+def _wait_for_idle() -> None:
+    # Import tutaj - thumbnails zleca optymalizację po wygenerowaniu szkicu
+    from app.services import thumbnails
+
+    while not thumbnails.is_idle(settings.THUMBNAIL_OPTIMIZE_IDLE_SECONDS):
+        time.sleep(IDLE_POLL_SECONDS)
+
+
+def optimize_thumbnail(photo_id: int, image_url: str, thumbnail_url: str, profile: RenditionProfile = THUMBNAIL) -> bool:
+    """Koduje szkic miniatury ponownie z docelową kompresją. Zwraca True po podmianie."""
+    from app.services import media_storage, thumbnails
+
+    source = file_reaper.url_to_path(image_url)
+    draft = file_reaper.url_to_path(thumbnail_url)
+    target = thumbnails.thumbnail_path_for(source, profile)
+    if not os.path.exists(source):
+        return False
+    tmp_path = f"{target}.tmp"
+    success, _, _ = thumbnails.generate_thumbnail_sync(source, tmp_path, profile=profile)
+    if not success:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    # Plik i rekord zmieniamy razem pod blokadą przenosin plików: jeśli w trakcie
+    # kodowania zdjęcie przeniesiono (zmiana widoczności albumu), usunięto albo dostało
+    # nową miniaturę, rekord nie wskazuje już szkicu i nowy plik jest usuwany
+    with media_storage.move_lock:
+        os.replace(tmp_path, target)
+        db = SessionLocal()
+        try:
+            updated = crud_photo.set_thumbnail_profile(
+                db, photo_id, thumbnail_url, expected=profile.draft_key, profile_key=profile.key,
+                new_thumbnail_url="/" + target,
+            )
+        except Exception:
+            file_reaper.remove_files([target])
+            raise
+        finally:
+            db.close()
+        if target != draft:
+            file_reaper.remove_files([draft if updated else target])
+        elif not updated:
+            file_reaper.remove_files([target])
+    return updated
+
+
+def optimize_drafts(profile: RenditionProfile = THUMBNAIL) -> int:
+    """Kompresuje wszystkie szkice miniatur, zawsze czekając na bezczynną kolejkę. Zwraca liczbę."""
+    optimized = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = crud_photo.get_thumbnails_with_profile(db, profile.draft_key, last_id=last_id, limit=BATCH_SIZE)
+        finally:
+            db.close()
+        if not rows:
+            return optimized
+        for photo_id, image_url, thumbnail_url, album_id in rows:
+            last_id = photo_id
+            _wait_for_idle()
+            if optimize_thumbnail(photo_id, image_url, thumbnail_url, profile):
+                optimized += 1
+                # Manifest i odpowiedzi API albumu wskazywały usunięty już szkic
+                cache_warmer.schedule_album_warmup(album_id)
+
+
+def _optimize_and_forget() -> None:
+    global _scheduled
+    # Zdejmujemy flagę PRZED przebiegiem - szkice dodane w trakcie zlecą kolejny
+    with _scheduled_lock:
+        _scheduled = False
+    try:
+        optimized = optimize_drafts()
+        if optimized:
+            logger.info("Optimized %s draft thumbnails", optimized, extra={"event": "thumbnail.optimized"})
+    except Exception as e:
+        logger.warning("Could not optimize draft thumbnails: %s", e)
+
+
+def schedule_optimization() -> None:
+    """Zleca w tle kompresję szkiców miniatur (najwyżej jeden oczekujący przebieg)."""
+    global _scheduled
+    with _scheduled_lock:
+        if _scheduled:
+            return
+        _scheduled = True
+    _optimizer_executor.submit(_optimize_and_forget)
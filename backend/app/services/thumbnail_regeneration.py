@@ -0,0 +1,192 @@
+# app/services/thumbnail_regeneration.py
+"""
+Hurtowe generowanie miniatur istniejących zdjęć - po zmianie profilu miniatur
+(app/services/renditions.py) albo przy migracji miniatur ze starego układu
+`uploads/<uuid>_thumb.jpg` (.backups/uuid-thumbnails-feature). Bez tego nieaktualne
+miniatury są odświeżane leniwie, album po albumie (thumbnails.refresh_stale_thumbnails).
+
+- Zdjęcia są czytane paczkami stronicowanymi po kluczu (id > ostatnie), a miniatury
+  renderuje pula procesów - dekodowanie i skalowanie w Pillow trzyma GIL.
+- Zdjęcia z miniaturą bieżącego profilu (`photos.thumbnail_profile`) są pomijane.
+- Po każdej paczce zapisujemy punkt kontrolny (ostatnie ID + klucz profilu), więc
+  przerwany przebieg jest wznawiany od ostatniej paczki. Nowy klucz profilu (zmiana
+  parametrów lub wersji) zaczyna przebieg od początku.
+- Budżet zasobów: procesy robocze mają obniżony priorytet (nice), a po każdej paczce
+  robimy przerwę tak, by praca zajmowała najwyżej `cpu_budget` czasu i czytała najwyżej
+  `max_read_mb_per_s` MB/s oryginałów.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from app.crud import crud_photo
+from app.database import SessionLocal
+from app.schemas.maintenance import ThumbnailRegenerationReport
+from app.services import album_manifests, file_reaper, renditions, thumbnails
+
+logger = logging.getLogger(__name__)
+
+# Plik ukryty - przegląd sierot (orphan_gc) pomija nazwy zaczynające się od kropki
+DEFAULT_CHECKPOINT_PATH = os.path.join("uploads", ".thumbnail_regeneration.json")
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_NICE = 10
+# Ile ID nieudanych zdjęć trafia do raportu (licznik jest pełny)
+REPORT_SAMPLE = 200
+
+
+def load_checkpoint(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+        return None
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(nice: int) -> None:
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def _render(job: tuple[int, str, str]) -> tuple[int, bool, tuple[int, int] | None, int]:
+    """Proces roboczy: renderuje miniaturę do pliku tymczasowego i podmienia ją atomowo."""
+    photo_id, source, target = job
+    try:
+        read_bytes = os.path.getsize(source)
+    except OSError:
+        return photo_id, False, None, 0
+    tmp_path = f"{target}.tmp"
+    success, _, size = thumbnails.generate_thumbnail_sync(source, tmp_path)
+    if success:
+        os.replace(tmp_path, target)
+    elif os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return photo_id, success, size, read_bytes
+
+
+def _throttle_delay(work_seconds: float, read_bytes: int, cpu_budget: float, max_read_mb_per_s: float | None) -> float:
+    """Przerwa po paczce, która utrzymuje średnie zużycie CPU i odczyt dysku w budżecie."""
+    delay = work_seconds * (1 / cpu_budget - 1) if 0 < cpu_budget < 1 else 0.0
+    if max_read_mb_per_s:
+        delay = max(delay, read_bytes / (max_read_mb_per_s * 1024 * 1024) - work_seconds)
+    return delay
+
+
+def regenerate_thumbnails(
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = None,
+    nice: int = DEFAULT_NICE,
+    cpu_budget: float = 1.0,
+    max_read_mb_per_s: float | None = None,
+    restart: bool = False,
+) -> ThumbnailRegenerationReport:
+    """Przetwarza zdjęcia od punktu kontrolnego do końca tabeli. Zwraca raport."""
+    started = time.perf_counter()
+    profile_key = renditions.THUMBNAIL.key
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    last_id = checkpoint["last_id"] if checkpoint and checkpoint.get("profile") == profile_key else 0
+    report = ThumbnailRegenerationReport(profile=profile_key, resumed_from_id=last_id, last_id=last_id)
+    changed_albums: set[int] = set()
+
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    # spawn - procesy robocze nie dziedziczą połączeń z bazą
+    context = multiprocessing.get_context("spawn")
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(nice,)) as pool:
+            while True:
+                rows = crud_photo.get_photo_rows_after(db, last_id, batch_size)
+                db.rollback()  # Nie trzymamy transakcji w trakcie renderowania
+                if not rows:
+                    break
+                batch_started = time.perf_counter()
+                report.scanned_photos += len(rows)
+
+                by_id = {}
+                jobs = []
+                for row in rows:
+                    source = file_reaper.url_to_path(row.image_url)
+                    if row.thumbnail_profile == profile_key and row.thumbnail_url:
+                        report.up_to_date += 1
+                        continue
+                    if not os.path.exists(source):
+                        report.missing_originals += 1
+                        continue
+                    by_id[row.id] = row
+                    jobs.append((row.id, source, thumbnails.thumbnail_path_for(source)))
+
+                updates = []
+                replaced_paths = []
+                read_bytes = 0
+                for photo_id, success, size, job_bytes in pool.map(_render, jobs):
+                    read_bytes += job_bytes
+                    if not success:
+                        report.failed_count += 1
+                        if len(report.failed_photo_ids) < REPORT_SAMPLE:
+                            report.failed_photo_ids.append(photo_id)
+                        continue
+                    row = by_id[photo_id]
+                    thumbnail_url = "/" + thumbnails.thumbnail_path_for(file_reaper.url_to_path(row.image_url))
+                    values = {"thumbnail_url": thumbnail_url, "thumbnail_profile": profile_key}
+                    if size is not None:
+                        values["width"], values["height"] = size
+                    updates.append((row, values))
+
+                # Zapis tylko dla zdjęć niezmienionych od odczytu paczki - zdjęcie przeniesione
+                # (media_storage - np. do uploads/private/) albo usunięte w trakcie renderowania
+                # nie może dostać z powrotem miniatury ze starego drzewa
+                updated_ids = crud_photo.set_thumbnails_if_unchanged(db, updates)
+                stale_paths = []
+                for row, values in updates:
+                    if row.id not in updated_ids:
+                        stale_paths.append(file_reaper.url_to_path(values["thumbnail_url"]))
+                    elif row.thumbnail_url != values["thumbnail_url"]:
+                        # Miniatura pod nowym adresem (poprzedni profil, stary układ <uuid>_thumb.jpg albo jej brak)
+                        changed_albums.add(row.album_id)
+                        if row.thumbnail_url:
+                            report.moved_thumbnails += 1
+                            replaced_paths.append(file_reaper.url_to_path(row.thumbnail_url))
+                # Stare pliki usuwamy dopiero, gdy baza wskazuje nowe miniatury
+                report.removed_files += file_reaper.remove_files(replaced_paths)
+                file_reaper.remove_files(stale_paths)
+                report.skipped_changed += len(stale_paths)
+                report.regenerated += len(updated_ids)
+                report.read_bytes += read_bytes
+
+                last_id = report.last_id = rows[-1].id
+                save_checkpoint(checkpoint_path, {
+                    "profile": profile_key,
+                    "last_id": last_id,
+                    "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                })
+
+                delay = _throttle_delay(
+                    time.perf_counter() - batch_started, read_bytes, cpu_budget, max_read_mb_per_s
+                )
+                if delay > 0:
+                    report.throttled_seconds += delay
+                    time.sleep(delay)
+        report.completed = True
+    finally:
+        db.close()
+        # Manifesty albumów, w których zmieniły się adresy miniatur (także po przerwaniu)
+        for album_id in changed_albums - {None}:
+            album_manifests.rebuild_album_manifest(album_id)
+        report.throttled_seconds = round(report.throttled_seconds, 2)
+        report.elapsed_seconds = round(time.perf_counter() - started, 2)
+    return report
@@ -0,0 +1,308 @@
+# app/services/thumbnails.py
+"""
+Generowanie miniatur zdjęć w tle - po uploadzie i w zadaniach w tle
+(np. uzupełnianie brakujących miniatur przy rozgrzewaniu cache). Parametry miniatur
+pochodzą z profilu (app/services/renditions.py); miniatury starszych profili są
+odświeżane leniwie - refresh_stale_thumbnails().
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.structured_logging import request_context, request_id_var, span
+from app.crud import crud_photo
+from app.database import SessionLocal
+from app.services import cache_warmer, file_reaper, photo_events, renditions, thumbnail_optimizer
+
+THUMB_DIR = os.path.join("uploads", "thumbnails")
+
+logger = logging.getLogger(__name__)
+
+# Thread pool for background image thumbnail processing
+# Zmniejszamy max_workers do 1, aby uniknąć problemów z pamięcią na małych instancjach (np. Azure B1s)
+_thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail_")
+
+# Zadania w kolejce/w toku i koniec ostatniego - optymalizacja szkiców czeka na bezczynność
+_pending_jobs = 0
+_last_job_finished = 0.0
+_pending_lock = threading.Lock()
+
+# Albumy sprawdzone pod kątem nieaktualnych miniatur: album -> czas sprawdzenia (monotonic).
+# Po STALE_CHECK_TTL album jest sprawdzany ponownie - nieudane miniatury dostają kolejną próbę
+STALE_CHECK_TTL = 600.0
+_stale_checked: dict[int, float] = {}
+_stale_checked_lock = threading.Lock()
+
+
+def generate_thumbnail_sync(
+    file_path: str,
+    thumbnail_path: str,
+    timings: dict[str, float] | None = None,
+    profile: renditions.RenditionProfile = renditions.THUMBNAIL,
+    fast: bool = False,
+) -> tuple[bool, str | None, tuple[int, int] | None]:
+    """
+    Synchronous function to generate a thumbnail. Runs in a thread pool worker.
+    Returns (success: bool, thumbnail_url: str | None, original (width, height) | None)
+    Stage durations (decode/resize/encode) are stored in `timings` when given.
+    Produces highly compressed WebP thumbnails with the rendition `profile`
+    (default: max 400x400, quality=55). Falls back to JPEG/PNG when necessary.
+    With `fast=True` uses the profile's fast encoder settings (a draft that
+    thumbnail_optimizer re-encodes later at full compression).
+    
+    Strategy:
+    - Always resize and compress thumbnails regardless of source format or size
+    - Resize to max profile.max_size (400x400 - small enough for web galleries)
+    - Use aggressive WebP compression (quality=55, method=6)
+    - For PNG fallback: quantize to 256 colors for massive size reduction
+    """
+    timings = {} if timings is None else timings
+    try:
+        with Image.open(file_path) as img:
+            with span(timings, "decode"):
+                img.load()
+                # Correct orientation from EXIF if present
+                img = ImageOps.exif_transpose(img)
+            
+            # Check original dimensions
+            orig_width, orig_height = img.size
+            target_size = profile.max_size
+            
+            # Detect alpha channel
+            bands = img.getbands()
+            has_alpha = "A" in bands
+            
+            with span(timings, "resize"):
+                # Convert to appropriate mode for saving
+                if has_alpha:
+                    img = img.convert("RGBA")
+                else:
+                    img = img.convert("RGB")
+                
+                # Only resize if larger than target; never upscale
+                if orig_width > target_size or orig_height > target_size:
+                    img.thumbnail((target_size, target_size), Image.Resampling.LANCZOS)
+            
+            # Ensure target directory exists
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            
+            # Prefer WebP for thumbnails with aggressive compression
+            save_format = "WEBP"
+            fast = fast and profile.fast_webp_method is not None
+            webp_method = profile.fast_webp_method if fast else profile.webp_method
+            webp_kwargs: dict = {"quality": profile.webp_quality, "method": webp_method}
+            
+            with span(timings, "encode"):
+                # Try saving as WebP; if that fails, fallback to JPEG/PNG
+                try:
+                    img.save(thumbnail_path, format=save_format, **webp_kwargs)
+                except Exception:
+                    if not has_alpha:
+                        # Fallback JPEG for no-alpha images
+                        img.save(
+                            thumbnail_path, format="JPEG", optimize=not fast, quality=profile.webp_quality,
+                            progressive=True,
+                        )
+                    else:
+                        # Fallback PNG with aggressive quantization to 256 colors
+                        # (szkic: szybsza kwantyzacja FASTOCTREE i bez optimize)
+                        try:
+                            quantize_method = Image.FASTOCTREE if fast else Image.MEDIANCUT
+                            quantized = img.quantize(colors=profile.png_colors, method=quantize_method)
+                            quantized.save(thumbnail_path, format="PNG", optimize=not fast)
+                        except Exception:
+                            img.save(thumbnail_path, format="PNG", optimize=not fast)
+            
+            return True, f"/{thumbnail_path}", (orig_width, orig_height)
+    except Exception:
+        logger.exception("Could not create thumbnail for %s", file_path, extra={"event": "thumbnail.failed"})
+        return False, None, None
+    finally:
+        # Wymuszamy zwolnienie pamięci po przetworzeniu każdego zdjęcia
+        gc.collect()
+
+
+def update_photo_thumbnail(
+    photo_id: int,
+    thumbnail_url: str | None,
+    size: tuple[int, int] | None = None,
+    profile_key: str | None = renditions.THUMBNAIL.key,
+) -> bool:
+    """
+    Background task to update photo record with thumbnail URL, its rendition profile key
+    (and original dimensions) after generation completes. Runs in a thread pool worker.
+    Returns True when the photo record was updated.
+    """
+    try:
+        db = SessionLocal()
+        photo = crud_photo.get_photo(db, photo_id=photo_id)
+        image_path = file_reaper.url_to_path(photo.image_url) if photo else None
+        if photo and thumbnail_url and file_reaper.url_to_path(thumbnail_url) not in (
+            thumbnail_path_for(image_path), thumbnail_path_for(image_path, draft=True)
+        ):
+            # Oryginał przeniesiono w trakcie generowania (zmiana widoczności albumu) -
+            # miniatura leży w starym drzewie; nie podpinamy jej, odświeżenie zrobi nową
+            db.close()
+            file_reaper.remove_files([file_reaper.url_to_path(thumbnail_url)])
+            return False
+        if photo:
+            photo.thumbnail_url = thumbnail_url
+            photo.thumbnail_profile = profile_key
+            if size is not None:
+                photo.width, photo.height = size
+            db.commit()
+            db.refresh(photo)
+        db.close()
+        return photo is not None
+    except Exception:
+        logger.exception("Could not update thumbnail_url for photo %s", photo_id, extra={"photo_id": photo_id})
+        return False
+
+
+def generate_and_store_thumbnail(
+    file_path: str, thumbnail_path: str, photo_id: int, album_id: int, timings: dict[str, float] | None = None
+) -> bool:
+    """
+    Background task: generate thumbnail and update photo record.
+    Runs in a thread pool worker (does not block request).
+    Publishes progress events (rendering -> done/failed) for the SSE stream.
+    With deferred optimization the thumbnail is a fast-encoded draft, re-encoded when idle.
+    Returns True when the thumbnail was generated and stored.
+    """
+    timings = {} if timings is None else timings
+    profile = renditions.THUMBNAIL
+    fast = _uses_drafts(profile)
+    photo_events.publish_photo_event(album_id, photo_id, photo_events.RENDERING)
+    success, thumbnail_url, size = generate_thumbnail_sync(file_path, thumbnail_path, timings, profile, fast)
+    if success:
+        with span(timings, "db_update"):
+            success = update_photo_thumbnail(
+                photo_id, thumbnail_url, size, profile.draft_key if fast else profile.key
+            )
+    if success:
+        if fast:
+            thumbnail_optimizer.schedule_optimization()
+        photo_events.publish_photo_event(album_id, photo_id, photo_events.DONE, thumbnail_url)
+        # Manifest i odpowiedzi API albumu z nową miniaturą (bez ponownego uzupełniania miniatur)
+        cache_warmer.schedule_album_warmup(album_id)
+        return True
+    photo_events.publish_photo_event(album_id, photo_id, photo_events.FAILED)
+    return False
+
+
+def is_idle(quiet_seconds: float) -> bool:
+    """Brak zadań miniatur w kolejce i w toku od co najmniej `quiet_seconds`."""
+    with _pending_lock:
+        return _pending_jobs == 0 and time.monotonic() - _last_job_finished >= quiet_seconds
+
+
+def _run_thumbnail_job(queued_at: float, request_id: str | None, file_path: str, photo_id: int, album_id: int) -> bool:
+    global _pending_jobs, _last_job_finished
+    metrics.THUMBNAIL_QUEUE_DEPTH.dec()
+    started = time.perf_counter()
+    metrics.THUMBNAIL_QUEUE_WAIT.observe(started - queued_at)
+    # Logi zadania niosą request_id uploadu, który je zlecił
+    with request_context(request_id):
+        timings: dict[str, float] = {}
+        try:
+            success = generate_and_store_thumbnail(
+                file_path, thumbnail_path_for(file_path, draft=_uses_drafts(renditions.THUMBNAIL)),
+                photo_id, album_id, timings,
+            )
+        finally:
+            with _pending_lock:
+                _pending_jobs -= 1
+                _last_job_finished = time.monotonic()
+        duration = time.perf_counter() - started
+        metrics.THUMBNAIL_JOB_DURATION.labels("done" if success else "failed").observe(duration)
+        logger.log(
+            logging.INFO if success else logging.WARNING,
+            "Thumbnail job for photo %s %s", photo_id, "done" if success else "failed",
+            extra={
+                "event": "thumbnail.job",
+                "photo_id": photo_id,
+                "album_id": album_id,
+                "success": success,
+                "queue_wait_ms": round((started - queued_at) * 1000, 2),
+                "duration_ms": round(duration * 1000, 2),
+                **timings,
+                "sampled": success,
+            },
+        )
+    return success
+
+
+def thumbnail_path_for(
+    file_path: str, profile: renditions.RenditionProfile = renditions.THUMBNAIL, draft: bool = False
+) -> str:
+    """
+    Ścieżka miniatury dla oryginału z kluczem profilu w nazwie, w katalogu `thumbnails`
+    obok oryginału - miniatura zdjęcia z albumu prywatnego też jest w uploads/private/
+    (np. uploads/a.jpg -> uploads/thumbnails/a.jpg.thumbnail-v1-1a2b3c4d.webp).
+    Szkic (draft=True) ma osobną nazwę: ...thumbnail-v1-1a2b3c4d.draft.webp.
+    """
+    directory = os.path.join(os.path.dirname(file_path), os.path.basename(THUMB_DIR))
+    suffix = renditions.DRAFT_FILE_SUFFIX if draft else ""
+    return os.path.join(directory, f"{os.path.basename(file_path)}.{profile.key}{suffix}.webp")
+
+
+def _uses_drafts(profile: renditions.RenditionProfile) -> bool:
+    """Czy miniatura przy uploadzie jest szybkim szkicem (docelowa kompresja - thumbnail_optimizer)."""
+    return settings.THUMBNAIL_DEFERRED_OPTIMIZATION and profile.fast_webp_method is not None
+
+
+def schedule_thumbnail(file_path: str, photo_id: int, album_id: int) -> Future:
+    """Kolejkuje wygenerowanie miniatury zdjęcia (jeden wątek - patrz _thumbnail_executor)."""
+    global _pending_jobs
+    with _pending_lock:
+        _pending_jobs += 1
+    metrics.THUMBNAIL_QUEUE_DEPTH.inc()
+    return _thumbnail_executor.submit(
+        _run_thumbnail_job, time.perf_counter(), request_id_var.get(), file_path, photo_id, album_id
+    )
+
+
+def _schedule_stale_thumbnails(album_id: int) -> None:
+    db = SessionLocal()
+    try:
+        stale = crud_photo.get_photos_needing_thumbnail(
+            db, album_id=album_id, profile_keys=renditions.THUMBNAIL.current_keys
+        )
+    except Exception:
+        logger.exception("Could not look up stale thumbnails in album %s", album_id)
+        # Następne żądanie albumu spróbuje ponownie
+        with _stale_checked_lock:
+            _stale_checked.pop(album_id, None)
+        return
+    finally:
+        db.close()
+    for photo_id, image_url in stale:
+        file_path = image_url.lstrip("/")
+        if os.path.exists(file_path):
+            schedule_thumbnail(file_path, photo_id, album_id)
+
+
+def refresh_stale_thumbnails(album_id: int) -> None:
+    """
+    Leniwe odświeżanie miniatur: przy pierwszym żądaniu albumu w procesie (i potem
+    najwyżej co STALE_CHECK_TTL) zleca w tle wygenerowanie miniatur brakujących albo
+    z innym kluczem profilu niż bieżący. Do tego czasu klienci dostają poprzednie
+    miniatury (ich pliki zostają do sprzątania sierot).
+    """
+    now = time.monotonic()
+    with _stale_checked_lock:
+        checked_at = _stale_checked.get(album_id)
+        if checked_at is not None and now - checked_at < STALE_CHECK_TTL:
+            return
+        # Wygasłe wpisy usuwamy przy okazji - słownik nie rośnie z liczbą albumów w historii procesu
+        for expired in [key for key, value in _stale_checked.items() if now - value >= STALE_CHECK_TTL]:
+            del _stale_checked[expired]
+        _stale_checked[album_id] = now
+    _thumbnail_executor.submit(_schedule_stale_thumbnails, album_id)
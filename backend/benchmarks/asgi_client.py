@@ -0,0 +1,63 @@
+# benchmarks/asgi_client.py
+"""Minimalne wywołania HTTP bezpośrednio przez ASGI (bez sieci i klienta HTTP) dla benchmarków."""
+import asyncio
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ASGIResult:
+    status: int = 0
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    size: int = 0  # liczba bajtów treści (także gdy body nie jest zachowywane)
+
+
+async def asgi_request(app, method: str, path: str, query: str = "", headers: dict[str, str] | None = None,
+                       body: bytes = b"", keep_body: bool = True) -> ASGIResult:
+    """Wysyła żądanie (z opcjonalną treścią) do aplikacji ASGI; status błędu nie przerywa pomiaru."""
+    raw_headers = [(b"host", b"bench")]
+    raw_headers += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": raw_headers,
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    result = ASGIResult()
+    response_body = bytearray()
+    received = 0
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Klient się nie rozłącza - czekamy, aż aplikacja przestanie nasłuchiwać
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.start":
+            result.status = message["status"]
+            result.headers = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if keep_body:
+                response_body.extend(chunk)
+
+    await app(scope, receive, send)
+    result.body = bytes(response_body)
+    result.size = received
+    return result
+
+
+async def asgi_get(app, path: str, query: str = "", headers: dict[str, str] | None = None,
+                   method: str = "GET", keep_body: bool = True) -> ASGIResult:
+    """Wysyła żądanie do aplikacji ASGI. keep_body=False liczy tylko bajty (duże pliki)."""
+    result = await asgi_request(app, method, path, query, headers, keep_body=keep_body)
+    if result.status >= 400:
+        raise RuntimeError(f"{method} {path} -> HTTP {result.status}")
+    return result
@@ -0,0 +1,115 @@
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+# Benchmark działa na osobnej, tymczasowej bazie SQLite - nie dotyka danych z .env
+_db_file = os.path.join(tempfile.mkdtemp(prefix="bench_lists_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file}"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ["NOTIFICATIONS_ENABLED"] = "false"
+
+# --- Ten sam trik, co w create_admin.py ---
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+# ------------------------------------------
+
+from typing import List
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.api.v1.endpoints import photos
+from app.database import Base, SessionLocal, engine
+from app.dependencies import get_db_session
+from app.models.album import Album
+from app.models.photo import Photo
+from benchmarks.asgi_client import asgi_get
+
+
+def build_app() -> FastAPI:
+    """Aplikacja z obecnym endpointem i jego dawną wersją (ORM + response_model)."""
+    app = FastAPI()
+    app.include_router(photos.router, prefix="/photos")
+
+    @app.get("/legacy/album/{album_id}", response_model=List[schemas.photo.PhotoRead])
+    def legacy_read_photos_for_album(
+        album_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db_session)
+    ):
+        return crud.crud_photo.get_photos_by_album(db, album_id=album_id, skip=skip, limit=limit)
+
+    return app
+
+
+def seed(photo_count: int) -> int:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        album = Album(title="Benchmark", description="Album testowy", is_public=True)
+        db.add(album)
+        db.flush()
+        db.execute(insert(Photo), [
+            {
+                "title": f"Zdjęcie {i}",
+                "description": "Opis zdjęcia" if i % 2 else None,
+                "image_url": f"/uploads/bench_{i}.jpg",
+                "thumbnail_url": f"/uploads/thumbnails/bench_{i}.webp",
+                "album_id": album.id,
+                "position": float(i * 1024),
+                "width": 6000,
+                "height": 4000,
+            }
+            for i in range(photo_count)
+        ])
+        db.commit()
+        return album.id
+    finally:
+        db.close()
+
+
+async def measure(app: FastAPI, path: str, query: str, requests: int) -> tuple[list[float], int]:
+    size = len((await asgi_get(app, path, query)).body)  # rozgrzewka
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await asgi_get(app, path, query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, size
+
+
+def report(name: str, timings: list[float], size: int) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<28} mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms"
+          f"   p95 {p95:7.2f} ms   {size / 1024:.0f} KiB")
+
+
+async def run(photo_count: int, requests: int) -> None:
+    album_id = seed(photo_count)
+    app = build_app()
+    query = f"limit={photo_count}"
+    legacy, legacy_size = await measure(app, f"/legacy/album/{album_id}", query, requests)
+    fast, fast_size = await measure(app, f"/photos/album/{album_id}", query, requests)
+
+    print(f"GET lista zdjęć albumu: {photo_count} zdjęć, {requests} żądań na wariant\n")
+    report("ORM + response_model", legacy, legacy_size)
+    report("krotki + RowsJSONResponse", fast, fast_size)
+    print(f"\nPrzyspieszenie (mediana): {statistics.median(legacy) / statistics.median(fast):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Porównuje czas odpowiedzi listy zdjęć albumu: dawna ścieżka ORM vs krotki + szybki JSON."
+    )
+    parser.add_argument("--photos", type=int, default=1000, help="Liczba zdjęć w albumie (domyślnie 1000)")
+    parser.add_argument("--requests", type=int, default=200, help="Liczba żądań na wariant")
+    args = parser.parse_args()
+    asyncio.run(run(args.photos, args.requests))
+
+if __name__ == "__main__":
+    main()
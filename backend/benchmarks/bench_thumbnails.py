@@ -0,0 +1,219 @@
+import sys
+import os
+import argparse
+import io
+import multiprocessing
+import shutil
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+# Benchmark nie korzysta z bazy, ale import app.* wymaga konfiguracji
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_thumbnails.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+# --- Ten sam trik, co w create_admin.py ---
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+# ------------------------------------------
+
+from benchmarks.results import latency_summary, peak_rss_mb, run_metadata, write_results
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff")
+# Korpus syntetyczny: typowe rozmiary zdjęć z telefonu/aparatu i grafika z przezroczystością
+SYNTHETIC_CORPUS = [
+    ("phone_4000x3000.jpg", (4000, 3000), "RGB"),
+    ("camera_6000x4000.jpg", (6000, 4000), "RGB"),
+    ("web_1600x1067.jpg", (1600, 1067), "RGB"),
+    ("graphic_2000x2000.png", (2000, 2000), "RGBA"),
+]
+
+
+def build_synthetic_corpus(directory: str) -> list[str]:
+    from PIL import Image
+
+    paths = []
+    for name, size, mode in SYNTHETIC_CORPUS:
+        path = os.path.join(directory, name)
+        # Szum + gradient - treść, która nie kompresuje się trywialnie
+        image = Image.merge("RGB", [Image.effect_noise(size, 30), Image.linear_gradient("L").resize(size),
+                                    Image.effect_noise(size, 60)])
+        if mode == "RGBA":
+            image.putalpha(Image.radial_gradient("L").resize(size))
+        if path.endswith(".jpg"):
+            image.save(path, quality=92)
+        else:
+            image.save(path)
+        paths.append(path)
+    return paths
+
+
+def load_corpus(corpus: str | None) -> tuple[list[str], str]:
+    if corpus:
+        paths = sorted(
+            os.path.join(corpus, name) for name in os.listdir(corpus) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not paths:
+            raise SystemExit(f"Brak obrazów w {corpus}")
+        return paths, corpus
+    directory = tempfile.mkdtemp(prefix="bench_thumbnails_corpus_")
+    return build_synthetic_corpus(directory), "synthetic"
+
+
+def run_configuration(paths: list[str], workers: int, gc_enabled: bool, rounds: int) -> dict:
+    """Jeden wariant w osobnym procesie - szczytowy RSS dotyczy tylko tego wariantu."""
+    from PIL import Image
+
+    from app.services import thumbnails
+
+    if not gc_enabled:
+        # Wariant bez wymuszonego gc.collect() po każdej miniaturze
+        thumbnails.gc = types.SimpleNamespace(collect=lambda: 0)
+
+    output_dir = tempfile.mkdtemp(prefix="bench_thumbnails_out_")
+    megapixels = {}
+    for path in paths:
+        with Image.open(path) as image:
+            megapixels[path] = image.width * image.height / 1e6
+    jobs = [(path, os.path.join(output_dir, f"{i}_{n}.webp")) for n in range(rounds) for i, path in enumerate(paths)]
+
+    def job(args):
+        source, target = args
+        started = time.perf_counter()
+        success, _, _ = thumbnails.generate_thumbnail_sync(source, target)
+        return source, success, (time.perf_counter() - started) * 1000
+
+    thumbnails.generate_thumbnail_sync(paths[0], os.path.join(output_dir, "warmup.webp"))  # rozgrzewka
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(job, jobs))
+    elapsed = time.perf_counter() - started
+
+    timings = [ms for _, success, ms in results if success]
+    output_bytes = [os.path.getsize(target) for _, target in jobs if os.path.exists(target)]
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return {
+        "workers": workers,
+        "gc_collect": gc_enabled,
+        "images": len(results),
+        "failures": sum(1 for _, success, _ in results if not success),
+        "images_per_s": round(len(results) / elapsed, 2),
+        "megapixels_per_s": round(sum(megapixels[source] for source, _, _ in results) / elapsed, 2),
+        "latency": latency_summary(timings),
+        "output_bytes_mean": round(sum(output_bytes) / max(len(output_bytes), 1)),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_encoders(paths: list[str], webp_methods: list[int], rounds: int) -> list[dict]:
+    """
+    Bajty i czas samego kodowania miniatury (już zdekodowanej i przeskalowanej) dla metod
+    WebP i wariantów zapasowego PNG - koszt wyboru enkodera w profilu bez dekodowania.
+    """
+    from PIL import Image, ImageOps
+
+    from app.services.renditions import THUMBNAIL
+
+    prepared = []
+    for path in paths:
+        with Image.open(path) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            image.thumbnail((THUMBNAIL.max_size, THUMBNAIL.max_size), Image.Resampling.LANCZOS)
+            prepared.append(image)
+
+    def webp(method):
+        return lambda image, out: image.save(out, format="WEBP", quality=THUMBNAIL.webp_quality, method=method)
+
+    def png(quantize_method, optimize):
+        def encode(image, out):
+            # Jak w generate_thumbnail_sync: bez kwantyzacji, gdy metoda nie obsługuje trybu obrazu
+            try:
+                image = image.quantize(colors=THUMBNAIL.png_colors, method=quantize_method)
+            except ValueError:
+                pass
+            image.save(out, format="PNG", optimize=optimize)
+        return encode
+
+    encoders = [(f"webp method={method}", webp(method)) for method in webp_methods] + [
+        ("png mediancut+optimize", png(Image.MEDIANCUT, True)),
+        ("png fastoctree", png(Image.FASTOCTREE, False)),
+    ]
+    results = []
+    for name, encode in encoders:
+        timings, sizes = [], []
+        for _ in range(rounds):
+            for image in prepared:
+                out = io.BytesIO()
+                started = time.perf_counter()
+                encode(image, out)
+                timings.append((time.perf_counter() - started) * 1000)
+                sizes.append(out.tell())
+        results.append({
+            "encoder": name,
+            "latency": latency_summary(timings),
+            "bytes_mean": round(sum(sizes) / len(sizes)),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mikrobenchmark generate_thumbnail_sync: przepustowość, percentyle czasu i szczytowy RSS."
+    )
+    parser.add_argument("--corpus", help="Katalog z przykładowymi zdjęciami (domyślnie korpus syntetyczny)")
+    parser.add_argument("--rounds", type=int, default=3, help="Ile razy przetworzyć cały korpus")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2], help="Liczby wątków do porównania")
+    parser.add_argument("--gc", choices=["on", "off", "both"], default="both",
+                        help="Wymuszone gc.collect() po każdej miniaturze (jak w produkcji) - porównanie")
+    parser.add_argument("--webp-methods", type=int, nargs="*", default=[0, 2, 4, 6],
+                        help="Metody WebP do porównania kodowania (bajty i ms na obraz)")
+    parser.add_argument("--encoders-only", action="store_true",
+                        help="Tylko porównanie enkoderów, bez wariantów wątków i gc")
+    parser.add_argument("--output", help="Plik JSON z wynikami ('-' = stdout)")
+    args = parser.parse_args()
+
+    paths, corpus_name = load_corpus(args.corpus)
+    gc_variants = {"on": [True], "off": [False], "both": [True, False]}[args.gc]
+    configurations = [] if args.encoders_only else [
+        (workers, gc_enabled) for workers in args.workers for gc_enabled in gc_variants
+    ]
+
+    print(f"Korpus: {corpus_name} ({len(paths)} obrazów), {args.rounds} przebiegi na wariant\n")
+    results = []
+    encoders = []
+    context = multiprocessing.get_context("spawn")
+    try:
+        if configurations:
+            print(f"{'wątki':>5} {'gc':>4} {'obr/s':>7} {'MP/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'RSS MiB':>8}")
+        for workers, gc_enabled in configurations:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_configuration, (paths, workers, gc_enabled, args.rounds))
+            results.append(result)
+            latency = result["latency"]
+            print(f"{workers:>5} {'tak' if gc_enabled else 'nie':>4} {result['images_per_s']:>7.2f} "
+                  f"{result['megapixels_per_s']:>7.1f} {latency['p50_ms']:>8.1f} {latency['p95_ms']:>8.1f} "
+                  f"{latency['p99_ms']:>8.1f} {result['peak_rss_mb']:>8.1f}")
+
+        encoders = compare_encoders(paths, args.webp_methods, args.rounds)
+        print(f"\n{'enkoder':<24} {'śr. ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'śr. bajty':>10}")
+        for result in encoders:
+            latency = result["latency"]
+            print(f"{result['encoder']:<24} {latency['mean_ms']:>8.2f} {latency['p50_ms']:>8.2f} "
+                  f"{latency['p95_ms']:>8.2f} {result['bytes_mean']:>10}")
+    finally:
+        if not args.corpus:
+            shutil.rmtree(os.path.dirname(paths[0]), ignore_errors=True)
+
+    write_results(args.output, {
+        **run_metadata("thumbnails", vars(args)),
+        "corpus": {"name": corpus_name, "images": [os.path.basename(p) for p in paths]},
+        "configurations": results,
+        "encoders": encoders,
+    })
+
+if __name__ == "__main__":
+    main()
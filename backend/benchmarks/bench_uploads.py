@@ -0,0 +1,95 @@
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+import time
+
+# --- Ten sam trik, co w create_admin.py ---
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+# ------------------------------------------
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.core.uploads import IMMUTABLE_CACHE_CONTROL, UploadsStaticFiles
+from benchmarks.asgi_client import asgi_get
+
+
+class LegacyStaticFiles(StaticFiles):
+    """Dawny CacheControlStaticFiles: nagłówek dopisywany po zbudowaniu odpowiedzi."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class LegacyCacheControlMiddleware(BaseHTTPMiddleware):
+    """Dawny CacheControlMiddleware - owija strumień każdej odpowiedzi."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith("/uploads") and response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def build_apps(directory: str) -> dict[str, Starlette]:
+    return {
+        "StaticFiles + BaseHTTPMiddleware": Starlette(
+            routes=[Mount("/uploads", LegacyStaticFiles(directory=directory))],
+            middleware=[Middleware(LegacyCacheControlMiddleware)],
+        ),
+        "UploadsStaticFiles": Starlette(
+            routes=[Mount("/uploads", UploadsStaticFiles(directory=directory))],
+        ),
+    }
+
+
+async def measure(app: Starlette, path: str, requests: int) -> tuple[float, float]:
+    """Zwraca (MB/s, średni czas żądania w ms) dla pełnych pobrań pliku."""
+    await asgi_get(app, path, keep_body=False)  # rozgrzewka (cache stron systemu plików)
+    total = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        total += (await asgi_get(app, path, keep_body=False)).size
+    elapsed = time.perf_counter() - started
+    return total / (1024 * 1024) / elapsed, elapsed / requests * 1000
+
+
+async def run(size_mb: int, requests: int) -> None:
+    directory = tempfile.mkdtemp(prefix="bench_uploads_")
+    with open(os.path.join(directory, "original.jpg"), "wb") as f:
+        f.write(os.urandom(size_mb * 1024 * 1024))
+    path = "/uploads/original.jpg"
+
+    print(f"GET pełnego oryginału: {size_mb} MiB, {requests} żądań na wariant\n")
+    for name, app in build_apps(directory).items():
+        throughput, latency = await measure(app, path, requests)
+        print(f"{name:<34} {throughput:8.1f} MB/s   {latency:7.2f} ms/żądanie")
+
+    # Sprawdzenie obsługi nagłówków warunkowych i zakresów w nowym handlerze
+    app = build_apps(directory)["UploadsStaticFiles"]
+    full = await asgi_get(app, path, keep_body=False)
+    partial = await asgi_get(app, path, headers={"Range": "bytes=0-1023"})
+    cached = await asgi_get(app, path, headers={"If-None-Match": full.headers["etag"]})
+    print(f"\nETag {full.headers['etag']}, Cache-Control: {full.headers['cache-control']}")
+    print(f"Range bytes=0-1023 -> {partial.status}, {partial.size} B; If-None-Match -> {cached.status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mierzy przepustowość (MB/s) serwowania pełnowymiarowych oryginałów z uploads/."
+    )
+    parser.add_argument("--size-mb", type=int, default=20, help="Rozmiar pliku testowego w MiB")
+    parser.add_argument("--requests", type=int, default=30, help="Liczba pobrań na wariant")
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mb, args.requests))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import sys
+import os
+import argparse
+import asyncio
+import io
+import random
+import secrets
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+# --- Ten sam trik, co w create_admin.py ---
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+# ------------------------------------------
+
+from benchmarks.asgi_client import asgi_request
+from benchmarks.results import latency_summary, peak_rss_mb, run_metadata, write_results
+
+BENCH_ADMIN_EMAIL = "benchmark@fotograf.local"
+SERVICES = ["Sesja portretowa", "Reportaż ślubny", "Sesja rodzinna", "Sesja produktowa"]
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: str = ""
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+@dataclass
+class Step:
+    """Krok scenariusza: nazwa w raporcie, waga losowania i budowa żądania."""
+    name: str
+    weight: float
+    build: Callable[["Context", random.Random], Request]
+
+
+@dataclass
+class Context:
+    album_ids: list[int]
+    public_album_ids: list[int]
+    admin_headers: dict[str, str]
+    upload_body: bytes
+
+
+# --- Przygotowanie środowiska i danych ---
+
+def configure_environment(args) -> str:
+    """Ustawia zmienne dla app.* i katalog roboczy z uploads/ (przed importem aplikacji)."""
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+    os.environ["NOTIFICATIONS_ENABLED"] = "false"
+    # Kompresja szkiców miniatur zaraz po uploadach - drain_background_jobs nie czeka długo
+    os.environ.setdefault("THUMBNAIL_OPTIMIZE_IDLE_SECONDS", "0.5")
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    # Przesłane pliki i miniatury trafiają do tymczasowego uploads/, nie do danych aplikacji
+    os.makedirs(os.path.join(workdir, "uploads"))
+    os.chdir(workdir)
+    return workdir
+
+
+def photo_counts(albums: int, photos: int, rng: random.Random) -> list[int]:
+    """Nierówny rozkład zdjęć między albumy (kilka dużych, wiele małych)."""
+    weights = [rng.paretovariate(1.5) for _ in range(albums)]
+    total = sum(weights)
+    counts = [int(photos * w / total) for w in weights]
+    counts[0] += photos - sum(counts)
+    return counts
+
+
+def seed(args, rng: random.Random) -> dict:
+    from sqlalchemy import func, insert, select
+
+    from app.core.security import get_password_hash
+    from app.database import Base, SessionLocal, engine
+    from app.models.album import Album
+    from app.models.booking import Booking, BookingStatus
+    from app.models.photo import Photo
+    from app.models.user import User
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        if db.scalar(select(User.id).where(User.email == BENCH_ADMIN_EMAIL)) is None:
+            db.add(User(email=BENCH_ADMIN_EMAIL, hashed_password=get_password_hash(secrets.token_hex(16))))
+            db.commit()
+
+        existing = db.scalar(select(func.count()).select_from(Album))
+        if existing and not args.reuse_data:
+            raise SystemExit(
+                f"Baza zawiera już {existing} albumów - użyj osobnej bazy albo --reuse-data."
+            )
+        started = time.perf_counter()
+        if not existing:
+            db.execute(insert(Album), [
+                {"title": f"Album {i}", "description": "Album testowy", "is_public": rng.random() < 0.8, "sort_order": i}
+                for i in range(args.albums)
+            ])
+            db.commit()
+            album_ids = list(db.scalars(select(Album.id).order_by(Album.id)))
+            batch: list[dict] = []
+            for album_id, count in zip(album_ids, photo_counts(len(album_ids), args.photos, rng)):
+                for i in range(count):
+                    batch.append({
+                        "title": f"Zdjęcie {i}",
+                        "description": "Opis zdjęcia" if i % 3 == 0 else None,
+                        "image_url": f"/uploads/seed_{album_id}_{i}.jpg",
+                        "thumbnail_url": f"/uploads/thumbnails/seed_{album_id}_{i}.jpg.webp",
+                        "album_id": album_id,
+                        "position": float((i + 1) * 1024),
+                        "width": 6000,
+                        "height": 4000,
+                    })
+                    if len(batch) >= 10_000:
+                        db.execute(insert(Photo), batch)
+                        db.commit()
+                        batch = []
+            if batch:
+                db.execute(insert(Photo), batch)
+            now = datetime.now()
+            db.execute(insert(Booking), [
+                {
+                    "client_name": f"Klient {i}",
+                    "client_email": f"klient{i}@example.com",
+                    "service_name": rng.choice(SERVICES),
+                    "booking_date": now + timedelta(days=rng.randint(-365, 365)),
+                    "status": rng.choice(list(BookingStatus)),
+                }
+                for i in range(args.bookings)
+            ])
+            db.commit()
+
+        albums = db.execute(select(Album.id, Album.is_public).where(Album.deleted_at.is_(None))).all()
+        return {
+            "album_ids": [a.id for a in albums],
+            "public_album_ids": [a.id for a in albums if a.is_public],
+            "albums": len(albums),
+            "photos": db.scalar(select(func.count()).select_from(Photo)),
+            "bookings": db.scalar(select(func.count()).select_from(Booking)),
+            "seed_seconds": round(time.perf_counter() - started, 2),
+        }
+    finally:
+        db.close()
+
+
+def init_cache(redis_url: str | None) -> str:
+    from fastapi_cache import FastAPICache
+
+    if redis_url:
+        import redis.asyncio as aioredis
+        from fastapi_cache.backends.redis import RedisBackend
+
+        from app.core.tiered_cache import TieredBackend
+
+        client = aioredis.from_url(redis_url)
+        FastAPICache.init(TieredBackend(RedisBackend(client), client), prefix="fastapi-cache")
+        return "redis+local"
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+
+    FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
+    return "memory"
+
+
+def sample_upload(size: tuple[int, int]) -> bytes:
+    """Zdjęcie JPEG o rozmiarze zbliżonym do zdjęć z aparatu (szum nie kompresuje się dobrze)."""
+    from PIL import Image
+
+    image = Image.effect_noise(size, 40).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def multipart(fields: dict[str, str], filename: str, content: bytes) -> tuple[bytes, str]:
+    boundary = f"bench-{secrets.token_hex(8)}"
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'.encode() + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+# --- Scenariusze ---
+
+def gallery_steps() -> list[Step]:
+    """Niezalogowany gość: strona główna, album, kolejne strony zdjęć, czasem rezerwacja."""
+    def booking(ctx: Context, rng: random.Random) -> Request:
+        date = (datetime.now() + timedelta(days=rng.randint(1, 180))).isoformat(timespec="minutes")
+        body = (
+            f'{{"client_name": "Gość", "client_email": "gosc{rng.randint(1, 10**6)}@example.com", '
+            f'"service_name": "{rng.choice(SERVICES)}", "booking_date": "{date}"}}'
+        ).encode()
+        return Request("POST", "/api/v1/bookings/", headers={"Content-Type": "application/json"}, body=body)
+
+    return [
+        Step("GET /albums/", 2, lambda ctx, rng: Request("GET", "/api/v1/albums/")),
+        Step("GET /albums/{id}", 2, lambda ctx, rng: Request("GET", f"/api/v1/albums/{rng.choice(ctx.public_album_ids)}")),
+        Step("GET /photos/album/{id}", 5, lambda ctx, rng: Request(
+            "GET", f"/api/v1/photos/album/{rng.choice(ctx.public_album_ids)}",
+            query=f"skip={rng.choice([0, 0, 0, 100, 200])}&limit=100",
+        )),
+        Step("POST /bookings/", 0.2, booking),
+    ]
+
+
+def dashboard_steps() -> list[Step]:
+    """Administrator: pełne listy albumów i zdjęć, rezerwacje, upload zdjęć."""
+    def upload(ctx: Context, rng: random.Random) -> Request:
+        body, content_type = multipart(
+            {"title": "Upload testowy", "album_id": str(rng.choice(ctx.album_ids))}, "bench.jpg", ctx.upload_body
+        )
+        return Request("POST", "/api/v1/photos/", headers={**ctx.admin_headers, "Content-Type": content_type}, body=body)
+
+    return [
+        Step("admin GET /albums/", 1, lambda ctx, rng: Request("GET", "/api/v1/albums/", headers=ctx.admin_headers)),
+        Step("admin GET /photos/album/{id}", 4, lambda ctx, rng: Request(
+            "GET", f"/api/v1/photos/album/{rng.choice(ctx.album_ids)}", query="limit=500", headers=ctx.admin_headers,
+        )),
+        Step("admin GET /bookings/", 1, lambda ctx, rng: Request(
+            "GET", "/api/v1/bookings/", query="limit=100", headers=ctx.admin_headers,
+        )),
+        Step("admin POST /photos/", 0.5, upload),
+    ]
+
+
+async def user_loop(app, ctx: Context, steps: list[Step], rng: random.Random,
+                    warmup_until: float, until: float, timings: dict, errors: dict) -> None:
+    weights = [step.weight for step in steps]
+    while (now := time.perf_counter()) < until:
+        step = rng.choices(steps, weights)[0]
+        request = step.build(ctx, rng)
+        started = time.perf_counter()
+        result = await asgi_request(
+            app, request.method, request.path, request.query, request.headers, request.body, keep_body=False
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if now < warmup_until:
+            continue
+        timings.setdefault(step.name, []).append(elapsed_ms)
+        if result.status >= 400:
+            errors[step.name] = errors.get(step.name, 0) + 1
+
+
+async def run_traffic(app, ctx: Context, args) -> tuple[dict, dict, float]:
+    timings: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    started = time.perf_counter()
+    warmup_until = started + args.warmup
+    until = warmup_until + args.duration
+    users = [(gallery_steps(), i) for i in range(args.gallery_users)]
+    users += [(dashboard_steps(), args.gallery_users + i) for i in range(args.dashboard_users)]
+    await asyncio.gather(*[
+        user_loop(app, ctx, steps, random.Random(args.seed + index), warmup_until, until, timings, errors)
+        for steps, index in users
+    ])
+    return timings, errors, time.perf_counter() - warmup_until
+
+
+def thumbnail_stats() -> dict:
+    from prometheus_client import REGISTRY
+
+    count = REGISTRY.get_sample_value("thumbnail_job_duration_seconds_count", {"result": "done"}) or 0
+    total = REGISTRY.get_sample_value("thumbnail_job_duration_seconds_sum", {"result": "done"}) or 0
+    return {
+        "jobs_done": int(count),
+        "mean_job_ms": round(total / count * 1000, 2) if count else None,
+        "queue_depth_at_end": int(REGISTRY.get_sample_value("thumbnail_queue_depth") or 0),
+    }
+
+
+def drain_background_jobs() -> None:
+    """Czeka na miniatury, ich kompresję i rozgrzewanie cache zlecone przez uploady (przed usunięciem katalogu)."""
+    from app.services import cache_warmer, thumbnail_optimizer, thumbnails
+
+    thumbnails._thumbnail_executor.shutdown(wait=True)
+    thumbnail_optimizer._optimizer_executor.shutdown(wait=True)
+    cache_warmer._warmup_executor.shutdown(wait=True)
+
+
+def report(results: dict) -> None:
+    print(f"\n{'krok':<32} {'żądania':>8} {'błędy':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in results["requests"].items():
+        print(f"{name:<32} {row['count']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    total = results["total"]
+    print(f"\nRazem: {total['count']} żądań, {total['rps']:.1f} req/s, p99 {total['p99_ms']:.2f} ms, "
+          f"szczytowy RSS {results['peak_rss_mb']} MiB")
+    thumbs = results["thumbnails"]
+    print(f"Miniatury: {thumbs['jobs_done']} gotowe, średnio {thumbs['mean_job_ms']} ms, "
+          f"w kolejce na koniec: {thumbs['queue_depth_at_end']}")
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    print("Przygotowanie danych...")
+    seeded = seed(args, rng)
+    print(f"Albumy: {seeded['albums']}, zdjęcia: {seeded['photos']}, rezerwacje: {seeded['bookings']}")
+    cache_backend = init_cache(args.redis_url)
+
+    from app.core.security import create_access_token
+    from app.main import app
+
+    token = create_access_token({"sub": BENCH_ADMIN_EMAIL}, expires_delta=timedelta(hours=12))
+    ctx = Context(
+        album_ids=seeded["album_ids"],
+        public_album_ids=seeded["public_album_ids"] or seeded["album_ids"],
+        admin_headers={"Authorization": f"Bearer {token}"},
+        upload_body=sample_upload((args.upload_width, args.upload_height)),
+    )
+    print(f"Ruch: {args.gallery_users} gości + {args.dashboard_users} adminów, "
+          f"{args.warmup}s rozgrzewki + {args.duration}s pomiaru (cache: {cache_backend})")
+    timings, errors, elapsed = await run_traffic(app, ctx, args)
+
+    requests = {}
+    for name, values in sorted(timings.items()):
+        requests[name] = {
+            **latency_summary(values), "errors": errors.get(name, 0), "rps": round(len(values) / elapsed, 2),
+        }
+    everything = [t for values in timings.values() for t in values]
+    return {
+        **run_metadata("load_test", {k: v for k, v in vars(args).items() if k != "database_url"}),
+        "database": "postgresql" if (args.database_url or "").startswith("postgres") else "sqlite",
+        "cache_backend": cache_backend,
+        "dataset": {k: v for k, v in seeded.items() if not k.endswith("_ids")},
+        "duration_s": round(elapsed, 2),
+        "requests": requests,
+        "total": {
+            **latency_summary(everything),
+            "errors": sum(errors.values()),
+            "rps": round(len(everything) / elapsed, 2),
+        },
+        "thumbnails": thumbnail_stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Test obciążeniowy API (galeria gości + dashboard admina) na zasianej bazie, w procesie (ASGI)."
+    )
+    parser.add_argument("--database-url", help="Baza do testu, np. postgresql://... (domyślnie tymczasowy SQLite)")
+    parser.add_argument("--reuse-data", action="store_true", help="Użyj danych już zasianych w bazie")
+    parser.add_argument("--redis-url", help="Cache odpowiedzi w Redisie (domyślnie cache w pamięci procesu)")
+    parser.add_argument("--albums", type=int, default=200)
+    parser.add_argument("--photos", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=2_000)
+    parser.add_argument("--gallery-users", type=int, default=16, help="Równoległe sesje gości")
+    parser.add_argument("--dashboard-users", type=int, default=2, help="Równoległe sesje administratora")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Sekundy rozgrzewki (bez pomiaru)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Sekundy pomiaru")
+    parser.add_argument("--upload-width", type=int, default=3000)
+    parser.add_argument("--upload-height", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1, help="Ziarno losowania (powtarzalny ruch)")
+    parser.add_argument("--output", help="Plik JSON z wynikami ('-' = stdout)")
+    parser.add_argument("--keep-files", action="store_true", help="Nie usuwaj katalogu roboczego z uploadami")
+    args = parser.parse_args()
+    if args.output and args.output != "-":
+        # Test działa w katalogu tymczasowym - ścieżka wyników względem bieżącego katalogu
+        args.output = os.path.abspath(args.output)
+
+    workdir = configure_environment(args)
+    try:
+        results = asyncio.run(run(args))
+        report(results)
+        write_results(args.output, results)
+        drain_background_jobs()
+    finally:
+        if not args.keep_files:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/results.py
+"""Wspólne statystyki i zapis wyników benchmarków (JSON do porównywania przebiegów)."""
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+
+def latency_summary(timings_ms: list[float]) -> dict:
+    """Średnia, percentyle i maksimum czasów (w ms)."""
+    if not timings_ms:
+        return {"count": 0}
+    ordered = sorted(timings_ms)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return round(ordered[index], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Szczytowe zużycie pamięci (RSS) bieżącego procesu w MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KiB, macOS bajty
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run_metadata(benchmark: str, parameters: dict) -> dict:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "benchmark": benchmark,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+    }
+
+
+def write_results(path: str | None, results: dict) -> None:
+    """Zapisuje wyniki jako JSON (ścieżka '-' = stdout)."""
+    if not path:
+        return
+    payload = json.dumps(results, indent=2, ensure_ascii=False)
+    if path == "-":
+        print(payload)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(payload + "\n")
+    print(f"\nWyniki zapisane w {path}")
@@ -0,0 +1,30 @@
+import sys
+import os
+import argparse
+
+# --- Ten sam trik, co w create_admin.py ---
+# Dodaje folder 'backend' do ścieżki, abyśmy mogli importować 'app'
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '.')))
+# ------------------------------------------
+
+from app.services import orphan_gc
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Wyszukuje (i opcjonalnie usuwa) osierocone pliki w uploads/ oraz rekordy zdjęć bez plików."
+    )
+    parser.add_argument("--delete", action="store_true", help="Usuń znalezione sieroty (domyślnie tylko raport)")
+    parser.add_argument("--batch-size", type=int, default=orphan_gc.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--grace-seconds", type=int, default=orphan_gc.DEFAULT_GRACE_SECONDS,
+                        help="Pomijaj pliki młodsze niż podana liczba sekund")
+    args = parser.parse_args()
+
+    report = orphan_gc.run_orphan_scan(
+        dry_run=not args.delete,
+        batch_size=args.batch_size,
+        grace_seconds=args.grace_seconds,
+    )
+    print(report.model_dump_json(indent=2))
+
+if __name__ == "__main__":
+    main()
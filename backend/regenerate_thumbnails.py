@@ -0,0 +1,44 @@
+import sys
+import os
+import argparse
+
+# --- Ten sam trik, co w create_admin.py ---
+# Dodaje folder 'backend' do ścieżki, abyśmy mogli importować 'app'
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '.')))
+# ------------------------------------------
+
+from app.services import thumbnail_regeneration
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generuje ponownie miniatury istniejących zdjęć (np. po zmianie parametrów miniatur). "
+                    "Postęp jest zapisywany po każdej paczce - przerwany przebieg można wznowić."
+    )
+    parser.add_argument("--batch-size", type=int, default=thumbnail_regeneration.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, help="Liczba procesów roboczych (domyślnie połowa rdzeni)")
+    parser.add_argument("--nice", type=int, default=thumbnail_regeneration.DEFAULT_NICE,
+                        help="Obniżenie priorytetu procesów roboczych")
+    parser.add_argument("--cpu-budget", type=float, default=1.0,
+                        help="Część czasu przeznaczona na pracę (np. 0.5 = przerwa tak długa jak paczka)")
+    parser.add_argument("--max-read-mb", type=float, help="Limit odczytu oryginałów w MB/s")
+    parser.add_argument("--checkpoint", default=thumbnail_regeneration.DEFAULT_CHECKPOINT_PATH,
+                        help="Plik z punktem kontrolnym")
+    parser.add_argument("--restart", action="store_true", help="Zignoruj punkt kontrolny i zacznij od początku")
+    args = parser.parse_args()
+
+    if not 0 < args.cpu_budget <= 1:
+        parser.error("--cpu-budget musi być w przedziale (0, 1]")
+
+    report = thumbnail_regeneration.regenerate_thumbnails(
+        checkpoint_path=args.checkpoint,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        nice=args.nice,
+        cpu_budget=args.cpu_budget,
+        max_read_mb_per_s=args.max_read_mb,
+        restart=args.restart,
+    )
+    print(report.model_dump_json(indent=2))
+
+if __name__ == "__main__":
+    main()
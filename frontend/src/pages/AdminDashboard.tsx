@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { getAlbums, createAlbum, updateAlbum, deleteAlbum, getPhotos, uploadPhoto, updatePhoto, deletePhoto, reorderAlbums, getBookings, updateBookingStatus, deleteBooking } from '../services/api';
+import { getAlbums, createAlbum, updateAlbum, deleteAlbum, getAlbumDeletionStatus, getPhotos, getPhotosByAlbum, uploadPhoto, updatePhoto, deletePhoto, movePhoto, reorderAlbums, getBookings, updateBookingStatus, deleteBooking, photoEventsUrl } from '../services/api';
 
 interface Album {
   id: number;
@@ -9,6 +9,14 @@ interface Album {
   sort_order?: number;
 }
 
+// Postęp usuwania albumu w tle (GET /albums/{id}/deletion)
+interface AlbumDeletion {
+  album_id: number;
+  title: string;
+  status: string;
+  remaining_photos: number;
+}
+
 interface Photo {
   id: number;
   title: string;
@@ -45,6 +53,12 @@ const AdminDashboard = () => {
   const [uploading, setUploading] = useState(false);
   const [draggingId, setDraggingId] = useState<number | null>(null);
   const [initialOrder, setInitialOrder] = useState<number[]>([]);
+  // Zdjęcia jednego albumu w kolejności z albumu - tylko w tym widoku można je przeciągać
+  const [photoAlbumFilter, setPhotoAlbumFilter] = useState<number | null>(null);
+  const [albumPhotos, setAlbumPhotos] = useState<Photo[]>([]);
+  const [draggingPhotoId, setDraggingPhotoId] = useState<number | null>(null);
+  const [photoOrderBeforeDrag, setPhotoOrderBeforeDrag] = useState<number[]>([]);
+  const [albumDeletions, setAlbumDeletions] = useState<AlbumDeletion[]>([]);
 
   useEffect(() => {
     loadAlbums();
@@ -82,6 +96,27 @@ const AdminDashboard = () => {
     }
   };
 
+  const loadAlbumPhotos = async (albumId: number) => {
+    try {
+      const response = await getPhotosByAlbum(albumId);
+      setAlbumPhotos(response.data);
+    } catch (error) {
+      console.error('Błąd ładowania zdjęć albumu:', error);
+    }
+  };
+
+  const reloadPhotos = () => {
+    loadPhotos();
+    if (photoAlbumFilter !== null) loadAlbumPhotos(photoAlbumFilter);
+  };
+
+  const handlePhotoAlbumFilter = (value: string) => {
+    const albumId = value ? parseInt(value) : null;
+    setPhotoAlbumFilter(albumId);
+    setAlbumPhotos([]);
+    if (albumId !== null) loadAlbumPhotos(albumId);
+  };
+
   const loadBookings = async () => {
     try {
       const response = await getBookings();
@@ -114,10 +149,36 @@ const AdminDashboard = () => {
     setShowAddForm(true);
   };
 
+  // Album znika z listy od razu, a zdjęcia usuwa backend w tle - odpytujemy postęp,
+  // aż wiersz albumu zniknie z bazy
+  const watchAlbumDeletion = (albumId: number) => {
+    const update = (status: Partial<AlbumDeletion>) =>
+      setAlbumDeletions(prev => prev.map(d => d.album_id === albumId ? { ...d, ...status } : d));
+    const forget = () => setAlbumDeletions(prev => prev.filter(d => d.album_id !== albumId));
+
+    const interval = window.setInterval(async () => {
+      try {
+        const response = await getAlbumDeletionStatus(albumId);
+        update(response.data);
+        if (response.data.status === 'deleted') {
+          window.clearInterval(interval);
+          window.setTimeout(forget, 5000);
+        }
+      } catch (error) {
+        console.error('Błąd odczytu postępu usuwania albumu:', error);
+        window.clearInterval(interval);
+        forget();
+      }
+    }, 2000);
+  };
+
   const handleDelete = async (id: number) => {
     if (!confirm('Czy na pewno chcesz usunąć ten album?')) return;
     try {
-      await deleteAlbum(id);
+      const response = await deleteAlbum(id);
+      const title = albums.find(a => a.id === id)?.title || `#${id}`;
+      setAlbumDeletions(prev => [...prev.filter(d => d.album_id !== id), { ...response.data, title }]);
+      watchAlbumDeletion(id);
       loadAlbums();
     } catch (error) {
       console.error('Błąd usuwania albumu:', error);
@@ -130,6 +191,51 @@ const AdminDashboard = () => {
     setFormData({ title: '', description: '', is_public: true });
   };
 
+  // Nasłuchuje zdarzeń przetwarzania (SSE) dla albumu i uzupełnia miniatury w stanie,
+  // zamiast ponownie pobierać listę zdjęć. Otwierane PRZED uploadem, żeby nie zgubić zdarzeń.
+  const watchPhotoProcessing = (albumId: number) => {
+    const source = new EventSource(photoEventsUrl(albumId));
+    const finished = new Set<number>();
+    const thumbnails = new Map<number, string>();
+    let expected: number[] | null = null;
+    const timeout = window.setTimeout(() => source.close(), 10 * 60 * 1000);
+
+    const close = () => {
+      window.clearTimeout(timeout);
+      source.close();
+    };
+    const closeWhenFinished = () => {
+      if (expected && expected.every(id => finished.has(id))) close();
+    };
+
+    source.addEventListener('done', (e) => {
+      const event = JSON.parse((e as MessageEvent).data);
+      thumbnails.set(event.photo_id, event.thumbnail_url);
+      setPhotos(prev => prev.map(p => p.id === event.photo_id ? { ...p, thumbnail_url: event.thumbnail_url } : p));
+      setAlbumPhotos(prev => prev.map(p => p.id === event.photo_id ? { ...p, thumbnail_url: event.thumbnail_url } : p));
+      finished.add(event.photo_id);
+      closeWhenFinished();
+    });
+    source.addEventListener('failed', (e) => {
+      const event = JSON.parse((e as MessageEvent).data);
+      finished.add(event.photo_id);
+      closeWhenFinished();
+    });
+
+    return {
+      // Dodaje przesłane zdjęcia do listy (z miniaturami, które mogły już dotrzeć)
+      track: (uploaded: Photo[]) => {
+        expected = uploaded.map(p => p.id);
+        setPhotos(prev => [
+          ...prev,
+          ...uploaded.map(p => thumbnails.has(p.id) ? { ...p, thumbnail_url: thumbnails.get(p.id) } : p),
+        ]);
+        closeWhenFinished();
+      },
+      close,
+    };
+  };
+
   const handlePhotoUpload = async (e: React.FormEvent) => {
     e.preventDefault();
     if (selectedFiles.length === 0) {
@@ -138,6 +244,7 @@ const AdminDashboard = () => {
     }
 
     setUploading(true);
+    const processing = watchPhotoProcessing(photoFormData.album_id);
 
     try {
       // KROK 1: Zapisywanie na frontendzie (public/uploads)
@@ -154,14 +261,17 @@ const AdminDashboard = () => {
         return uploadPhoto(formData);
       });
 
-      await Promise.all(uploadPromises);
+      const results = await Promise.all(uploadPromises);
+      processing.track(results.map(r => r.data as Photo));
+      if (photoAlbumFilter !== null) loadAlbumPhotos(photoAlbumFilter);
       
       setShowPhotoUpload(false);
       setPhotoFormData({ title: '', description: '', album_id: 1 });
       setSelectedFiles([]);
-      loadPhotos();
       alert(`Przesłano ${selectedFiles.length} zdjęć`);
     } catch (error) {
+      processing.close();
+      reloadPhotos();
       console.error('Błąd uploadu zdjęć:', error);
       // Spróbuj pokazać szczegół błędu z backendu (np. 404 Album o ID ... nie istnieje.)
       const any = error as any;
@@ -191,7 +301,7 @@ const AdminDashboard = () => {
       setShowPhotoUpload(false);
       setEditingPhoto(null);
       setPhotoFormData({ title: '', description: '', album_id: 1 });
-      loadPhotos();
+      reloadPhotos();
     } catch (error) {
       console.error('Błąd aktualizacji zdjęcia:', error);
       alert('Nie udało się zaktualizować zdjęcia');
@@ -203,6 +313,7 @@ const AdminDashboard = () => {
     try {
       // Optymistyczna aktualizacja UI
       setPhotos(prevPhotos => prevPhotos.filter(photo => photo.id !== id));
+      setAlbumPhotos(prevPhotos => prevPhotos.filter(photo => photo.id !== id));
       
       await deletePhoto(id);
       // Opcjonalnie: załaduj ponownie, aby upewnić się, że stan jest zgodny z serwerem
@@ -210,7 +321,7 @@ const AdminDashboard = () => {
     } catch (error) {
       console.error('Błąd usuwania zdjęcia:', error);
       // W razie błędu przywróć stan (trzeba by go wcześniej zapisać lub po prostu przeładować)
-      loadPhotos();
+      reloadPhotos();
       alert('Wystąpił błąd podczas usuwania zdjęcia.');
     }
   };
@@ -277,6 +388,47 @@ const AdminDashboard = () => {
     setDraggingId(null);
   };
 
+  // Przeciąganie zdjęć w albumie: podgląd kolejności lokalnie, a po upuszczeniu
+  // jeden zapis - zdjęcie trafia za swojego nowego poprzednika (null = na początek)
+  const onPhotoDragStart = (e: React.DragEvent, id: number) => {
+    setDraggingPhotoId(id);
+    setPhotoOrderBeforeDrag(albumPhotos.map(p => p.id));
+    e.dataTransfer.effectAllowed = 'move';
+  };
+
+  const onPhotoDragOver = (e: React.DragEvent, overId: number) => {
+    if (draggingPhotoId === null) return;
+    e.preventDefault();
+    if (draggingPhotoId === overId) return;
+    const newOrder = [...albumPhotos];
+    const fromIndex = newOrder.findIndex(p => p.id === draggingPhotoId);
+    const toIndex = newOrder.findIndex(p => p.id === overId);
+    if (fromIndex === -1 || toIndex === -1) return;
+    const [moved] = newOrder.splice(fromIndex, 1);
+    newOrder.splice(toIndex, 0, moved);
+    setAlbumPhotos(newOrder);
+  };
+
+  const onPhotoDragEnd = async () => {
+    const photoId = draggingPhotoId;
+    setDraggingPhotoId(null);
+    if (photoId === null || photoAlbumFilter === null) return;
+    if (photoOrderBeforeDrag.join(',') === albumPhotos.map(p => p.id).join(',')) return;
+    const index = albumPhotos.findIndex(p => p.id === photoId);
+    const afterPhotoId = index > 0 ? albumPhotos[index - 1].id : null;
+    try {
+      await movePhoto(photoId, afterPhotoId);
+    } catch (error) {
+      console.error('Błąd przenoszenia zdjęcia:', error);
+      const any = error as any;
+      const detail = any?.response?.data?.detail || any?.message || '';
+      alert(`Nie udało się zmienić kolejności zdjęć. ${detail}`.trim());
+      loadAlbumPhotos(photoAlbumFilter);
+    }
+  };
+
+  const visiblePhotos = photoAlbumFilter === null ? photos : albumPhotos;
+
   const handleSaveOrder = async () => {
     try {
       const albumIds = albums.map(a => a.id);
@@ -345,6 +497,18 @@ const AdminDashboard = () => {
           </form>
         )}
 
+        {albumDeletions.length > 0 && (
+          <div style={{ marginBottom: 12, fontSize: 14, color: '#666' }}>
+            {albumDeletions.map(deletion => (
+              <div key={deletion.album_id}>
+                {deletion.status === 'deleted'
+                  ? `Album "${deletion.title}" został usunięty`
+                  : `Usuwanie albumu "${deletion.title}"... pozostało zdjęć: ${deletion.remaining_photos}`}
+              </div>
+            ))}
+          </div>
+        )}
+
         <div className="albums-list">
           {isOrderDirty && (
             <div style={{ display: 'flex', justifyContent: 'flex-end', marginBottom: 8 }}>
@@ -489,12 +653,37 @@ const AdminDashboard = () => {
           </form>
         )}
 
+        <div style={{ display: 'flex', alignItems: 'center', gap: 8, marginBottom: 12 }}>
+          <select
+            value={photoAlbumFilter ?? ''}
+            onChange={e => handlePhotoAlbumFilter(e.target.value)}
+            className="form-input"
+            style={{ maxWidth: 320, marginBottom: 0 }}
+          >
+            <option value="">Wszystkie albumy</option>
+            {albums.map(album => (
+              <option key={album.id} value={album.id}>{album.title}</option>
+            ))}
+          </select>
+          {photoAlbumFilter !== null && (
+            <span style={{ fontSize: 14, color: '#666' }}>Przeciągnij zdjęcie, aby zmienić kolejność w albumie</span>
+          )}
+        </div>
+
         <div className="photos-grid">
-          {photos.length === 0 ? (
+          {visiblePhotos.length === 0 ? (
             <p>Brak zdjęć. Dodaj pierwsze zdjęcie!</p>
           ) : (
-            photos.map(photo => (
-              <div key={photo.id} className="photo-card">
+            visiblePhotos.map(photo => (
+              <div
+                key={photo.id}
+                className="photo-card"
+                draggable={photoAlbumFilter !== null}
+                onDragStart={(e) => onPhotoDragStart(e, photo.id)}
+                onDragOver={(e) => onPhotoDragOver(e, photo.id)}
+                onDragEnd={onPhotoDragEnd}
+                style={photoAlbumFilter !== null ? { cursor: 'grab', opacity: draggingPhotoId === photo.id ? 0.6 : 1 } : undefined}
+              >
                 <div className="bg-gray-200 overflow-hidden rounded" style={{ height: '300px' }}>
                   <img src={getImageUrl(photo.thumbnail_url || photo.image_url)} alt={photo.title} className="w-full h-full object-cover" />
                 </div>
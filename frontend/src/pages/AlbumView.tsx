@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
-import { getAlbum, getPhotosByAlbum } from '../services/api';
+import { getAlbum, getAlbumManifest, getPhotosByAlbum } from '../services/api';
 
 interface Photo {
   id: number;
@@ -8,6 +8,8 @@ interface Photo {
   thumbnail_url?: string;
   title: string;
   description?: string;
+  width?: number | null;
+  height?: number | null;
 }
 
 interface Album {
@@ -29,6 +31,19 @@ const AlbumView = () => {
 
   const loadAlbumData = async () => {
     if (!albumId) return;
+    // Najpierw statyczny manifest (bez API); brak manifestu = album prywatny
+    // albo jeszcze niezbudowany - wtedy pobieramy dane z API
+    try {
+      const manifestRes = await getAlbumManifest(parseInt(albumId));
+      if (manifestRes.data?.album) {
+        setAlbum(manifestRes.data.album);
+        setPhotos(manifestRes.data.photos);
+        setLoading(false);
+        return;
+      }
+    } catch {
+      // fallback do API poniżej
+    }
     try {
       const [albumRes, photosRes] = await Promise.all([
         getAlbum(parseInt(albumId)),
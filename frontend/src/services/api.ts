@@ -26,12 +26,17 @@ export const createAlbum = (data: { title: string; description?: string; is_publ
 export const updateAlbum = (id: number, data: { title?: string; description?: string; is_public?: boolean }) =>
   api.patch(`/api/v1/albums/${id}`, data);
 export const deleteAlbum = (id: number) => api.delete(`/api/v1/albums/${id}`);
+// Usuwanie albumu trwa w tle - postęp (liczba pozostałych zdjęć)
+export const getAlbumDeletionStatus = (id: number) => api.get(`/api/v1/albums/${id}/deletion`);
 export const reorderAlbums = (albumIds: number[]) =>
   api.post('/api/v1/albums/reorder', { album_ids: albumIds });
 
 // Photos
 export const getPhotos = () => api.get('/api/v1/photos/');
 export const getPhotosByAlbum = (albumId: number) => api.get(`/api/v1/photos/album/${albumId}`);
+// Gotowy manifest publicznego albumu (album + zdjęcia) serwowany statycznie przez nginx
+export const getAlbumManifest = (albumId: number) =>
+  axios.get(`/uploads/manifests/albums/${albumId}.json`);
 export const uploadPhoto = (formData: FormData) =>
   api.post('/api/v1/photos/', formData, {
     headers: { 'Content-Type': 'multipart/form-data' }
@@ -39,6 +44,20 @@ export const uploadPhoto = (formData: FormData) =>
 export const updatePhoto = (id: number, data: { title?: string; description?: string; album_id?: number }) =>
   api.patch(`/api/v1/photos/${id}`, data);
 export const deletePhoto = (id: number) => api.delete(`/api/v1/photos/${id}`);
+// Przeniesienie zdjęcia w albumie za wskazane zdjęcie (null = na początek) - jeden zapis
+export const movePhoto = (id: number, afterPhotoId: number | null) =>
+  api.post(`/api/v1/photos/${id}/move`, { after_photo_id: afterPhotoId });
+// Operacje zbiorcze - jedno zapytanie zamiast osobnego requestu na każde zdjęcie
+export const bulkUpdatePhotos = (data: { photo_ids: number[]; album_id?: number; title?: string; description?: string }) =>
+  api.patch('/api/v1/photos/bulk', data);
+export const bulkDeletePhotos = (photoIds: number[]) =>
+  api.post('/api/v1/photos/bulk/delete', { photo_ids: photoIds });
+// Strumień SSE z postępem przetwarzania zdjęć albumu.
+// EventSource nie pozwala ustawić nagłówka Authorization, dlatego token idzie w query.
+export const photoEventsUrl = (albumId: number) => {
+  const token = localStorage.getItem('token') || '';
+  return `${API_URL}/api/v1/photos/album/${albumId}/events?access_token=${encodeURIComponent(token)}`;
+};
 
 // Bookings
 export const createBooking = (data: {